@@ -2,6 +2,8 @@
 
 from typing import TypedDict
 
+from opthub_runner_admin.scorer.cache_format import CacheFormat
+
 
 class Args(TypedDict):
     """The type of arguments for the CLI."""
@@ -9,7 +11,20 @@ class Args(TypedDict):
     interval: int
     timeout: int
     num: int
+    concurrency: int
+    persistent: bool
+    persistent_idle_timeout: int
+    persistent_max_uses: int
+    indicator_delta: bool
+    evaluation_batch_size: int
+    batch_wait: float
+    score_batch_size: int
+    reorder_wait: float
+    cache_max_trials: int
+    cache_format: CacheFormat
     rm: bool
+    image_pull_ttl: float
+    prewarm_matches: list[str]
     mode: str
     dev: bool
     command: list[str]
@@ -4,29 +4,90 @@ import json
 import logging
 import signal
 import sys
-from time import sleep
+from collections.abc import Callable
+from time import monotonic, sleep
 from traceback import format_exc
+from typing import Any, TypedDict
 
 from opthub_runner_admin.args import Args
-from opthub_runner_admin.lib.docker_executor import execute_in_docker
+from opthub_runner_admin.lib.docker_executor import (
+    DockerConfig,
+    PersistentContainerPool,
+    execute_batch_in_docker,
+    execute_in_docker,
+)
 from opthub_runner_admin.lib.dynamodb import DynamoDB
 from opthub_runner_admin.lib.sqs import EvaluationMessage, EvaluatorSQS
 from opthub_runner_admin.models.evaluation import (
     FailedEvaluationCreateParams,
-    is_evaluation_exists,
+    SuccessEvaluationCreateParams,
     save_failed_evaluation,
     save_success_evaluation,
 )
 from opthub_runner_admin.models.exception import ContainerRuntimeError, DockerImageNotFoundError
 from opthub_runner_admin.models.match import Match, fetch_match_by_id
-from opthub_runner_admin.models.solution import fetch_solution_by_primary_key
+from opthub_runner_admin.models.solution import fetch_solutions_to_evaluate
 from opthub_runner_admin.utils.process import delete_flag_file, is_stop_flag_set
 from opthub_runner_admin.utils.time import get_utcnow
 from opthub_runner_admin.utils.truncate import truncate_text_center
+from opthub_runner_admin.utils.worker_pool import WorkerPool
 
 LOGGER = logging.getLogger(__name__)
 
 
+class EvaluationWorker(TypedDict):
+    """The resources owned by an evaluation worker.
+
+    sqs (EvaluatorSQS): The SQS instance shared by the workers.
+    dynamodb (DynamoDB): The DynamoDB instance.
+    execute (Callable[[DockerConfig, list[str]], dict[str, Any]]): The function to execute in docker.
+    execute_batch (Callable[[DockerConfig, list[str]], list[dict[str, Any]]]): The function to execute in docker
+        for a batch of solutions.
+    """
+
+    sqs: EvaluatorSQS
+    dynamodb: DynamoDB
+    execute: Callable[[DockerConfig, list[str]], dict[str, Any]]
+    execute_batch: Callable[[DockerConfig, list[str]], list[dict[str, Any]]]
+
+
+class EvaluationEntry(TypedDict):
+    """A message in an evaluation job.
+
+    message (EvaluationMessage): The message to evaluate.
+    receipt_handle (str): The receipt handle of the message.
+    """
+
+    message: EvaluationMessage
+    receipt_handle: str
+
+
+class EvaluationJob(TypedDict):
+    """The evaluation run by a worker. The solutions of the entries are evaluated in one container run.
+
+    entries (list[EvaluationEntry]): The messages to evaluate. They all belong to the same match.
+    started_at (str | None): The time when the evaluation started. ISOString format.
+    finished_at (str | None): The time when the evaluation finished. ISOString format.
+    """
+
+    entries: list[EvaluationEntry]
+    started_at: str | None
+    finished_at: str | None
+
+
+class FailedEntry(TypedDict):
+    """A message whose evaluation failed.
+
+    entry (EvaluationEntry): The message.
+    error_message (str): The error message to show to the participant.
+    admin_error_message (str): The error message to show to the admin.
+    """
+
+    entry: EvaluationEntry
+    error_message: str
+    admin_error_message: str
+
+
 def setup_sqs(args: Args) -> EvaluatorSQS:
     """Set up the SQS instance.
 
@@ -71,16 +132,36 @@ def setup_dynamodb(args: Args) -> DynamoDB:
     return dynamodb
 
 
-def get_message_from_queue(sqs: EvaluatorSQS, interval: float, process_name: str) -> EvaluationMessage | None:
+def setup_persistent_containers(args: Args) -> PersistentContainerPool | None:
+    """Set up the pool of persistent containers if the persistent mode is enabled.
+
+    Args:
+        args (Args): The arguments.
+
+    Returns:
+        PersistentContainerPool | None: The pool of persistent containers, or None if the mode is disabled.
+    """
+    if not args["persistent"]:
+        return None
+    return PersistentContainerPool(args["persistent_idle_timeout"], args["persistent_max_uses"])
+
+
+def get_message_from_queue(
+    sqs: EvaluatorSQS,
+    interval: float,
+    process_name: str,
+    max_messages: int,
+) -> EvaluationEntry | None:
     """Get message from the queue.
 
     Args:
-        sqs (ScorerSQS): Scorer SQS
-        interval (float): Polling interval.
+        sqs (EvaluatorSQS): Evaluator SQS
+        interval (float): Seconds to wait before retrying when failing to fetch the message.
         process_name (str): The process name.
+        max_messages (int): The maximum number of messages to receive into the buffer at once.
 
     Returns:
-        EvaluationMessage: Evaluation message
+        EvaluationEntry | None: Evaluation message and its receipt handle
     """
     LOGGER.info("Finding Solution to evaluate...")
     try:
@@ -95,14 +176,16 @@ def get_message_from_queue(sqs: EvaluatorSQS, interval: float, process_name: str
                 LOGGER.info("...Deleted")
                 sys.exit(0)
 
-            # Try to get the message from the queue
-            message = sqs.get_message_from_queue()
+            # Try to get the message from the queue. The poll waits for up to 20 seconds while the queue is empty.
+            message = sqs.receive_sqs_message(max_messages=max_messages)
 
             if message is not None:  # If the message is found, start to evaluate the solution
+                entry: EvaluationEntry = {
+                    "message": sqs.parse_message(message),
+                    "receipt_handle": message["receipt_handle"],
+                }
                 break
 
-            sleep(interval)
-
     except KeyboardInterrupt:
         signal.signal(signal.SIGTERM, signal.SIG_IGN)
         signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -112,11 +195,12 @@ def get_message_from_queue(sqs: EvaluatorSQS, interval: float, process_name: str
         sys.exit(1)
     except Exception:
         LOGGER.exception("Error occurred while fetching message from SQS.")
+        sleep(interval)
         return None
     else:  # If the message is found, return the message
         LOGGER.debug("Message: %s", message)
         LOGGER.info("...Found")
-        return message
+        return entry
 
 
 def get_match_by_message(process_name: str, message: EvaluationMessage, dev: bool) -> Match | None:
@@ -152,74 +236,144 @@ def get_match_by_message(process_name: str, message: EvaluationMessage, dev: boo
         return match
 
 
-def evaluate(process_name: str, args: Args) -> None:  # noqa: PLR0915, C901, PLR0912
-    """The function that controls the evaluation process.
+def collect_batch(args: Args, sqs: EvaluatorSQS, first: EvaluationEntry, limit: int, n_idle: int) -> EvaluationJob:
+    """Collect the messages of the same match as the first one into a batch.
+
+    The buffered messages of the match are taken first. If the batch is not full, more messages are received into
+    the buffer until `args["batch_wait"]` seconds have passed. The messages of the other matches stay in the buffer.
+    The messages received are limited to the room left in the batch and a message for each of the other idle workers.
 
     Args:
         args (Args): The arguments for the evaluation process.
-    """
-    sqs = setup_sqs(args)
-    dynamodb = setup_dynamodb(args)
+        sqs (EvaluatorSQS): The SQS instance.
+        first (EvaluationEntry): The first message of the batch.
+        limit (int): The maximum number of messages in the batch.
+        n_idle (int): The number of the other idle workers.
 
-    n_evaluation = 0
+    Returns:
+        EvaluationJob: The batch.
+    """
+    batch: EvaluationJob = {"entries": [first], "started_at": None, "finished_at": None}
+    match_id = first["message"]["match_id"]
+    limit = min(limit, args["evaluation_batch_size"])
+    deadline = monotonic() + args["batch_wait"]
 
     while True:
-        n_evaluation += 1
+        for message in sqs.take_buffered(
+            lambda message: sqs.parse_message(message)["match_id"] == match_id,
+            limit - len(batch["entries"]),
+        ):
+            LOGGER.debug("Message: %s", message)
+            batch["entries"].append(
+                {"message": sqs.parse_message(message), "receipt_handle": message["receipt_handle"]},
+            )
 
-        if args["num"] > 0 and n_evaluation > args["num"]:
-            LOGGER.info("Reached the maximum number of evaluations.")
+        if len(batch["entries"]) >= limit or monotonic() >= deadline:
+            break
+        try:
+            max_messages = n_idle + limit - len(batch["entries"]) - len(sqs.buffer)
+            if sqs.fill_buffer(min(int(deadline - monotonic()), 20), max_messages) == 0:
+                break
+        except Exception:
+            LOGGER.exception("Error occurred while fetching message from SQS.")
             break
 
-        LOGGER.info("==================== Evaluation: %d ====================", n_evaluation)
+    return batch
 
-        message = get_message_from_queue(sqs, args["interval"], process_name)
 
-        if message is None:
-            continue
+def run_evaluation_job(
+    process_name: str,
+    args: Args,
+    worker: EvaluationWorker,
+    job: EvaluationJob,
+    claim: Callable[[], bool],
+) -> None:
+    """Evaluate a job, making its messages visible again if the job is abandoned.
 
-        match = get_match_by_message(process_name, message, args["dev"])
+    The messages that are neither deleted nor saved as failed (e.g. when the match can not be fetched or an unexpected
+    error occurs) are released, so that they are received again after a backoff instead of their visibility timeout.
 
-        if match is None:
-            continue
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments for the evaluation process.
+        worker (EvaluationWorker): The resources of the worker.
+        job (EvaluationJob): The evaluation job.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    try:
+        evaluate_message(process_name, args, worker, job, claim)
+    finally:
+        worker["sqs"].release_unprocessed([entry["receipt_handle"] for entry in job["entries"]])
 
-        if is_evaluation_exists(dynamodb, message["match_id"], message["participant_id"], message["trial_no"]):
-            LOGGER.warning("The evaluation already exists.")
-            sqs.delete_message_from_queue()
-            continue
 
-        try:
-            started_at = None
-            finished_at = None
-
-            LOGGER.info("Fetching Solution from DB...")
-            solution = fetch_solution_by_primary_key(
-                dynamodb,
-                match["id"],
-                message["participant_id"],
-                message["trial"],
-            )
-            LOGGER.debug("Solution: %s", solution)
-            LOGGER.info("...Fetched")
-
-            LOGGER.info("Evaluating...")
-            started_at = get_utcnow()
-            info_msg = "Started at : " + started_at
-            LOGGER.info(info_msg)
-
-            evaluation_result = execute_in_docker(
-                {
-                    "image": match["problem_docker_image"],
-                    "environments": match["problem_environments"],
-                    "command": args["command"],
-                    "timeout": args["timeout"],
-                    "rm": args["rm"],
-                },
-                [json.dumps(solution["variable"]) + "\n"],
-            )
+def evaluate_message(  # noqa: C901, PLR0912
+    process_name: str,
+    args: Args,
+    worker: EvaluationWorker,
+    job: EvaluationJob,
+    claim: Callable[[], bool],
+) -> None:
+    """Evaluate the solutions of the messages in a job on a worker.
+
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments for the evaluation process.
+        worker (EvaluationWorker): The resources of the worker.
+        job (EvaluationJob): The evaluation job.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    match = get_match_by_message(process_name, job["entries"][0]["message"], args["dev"])
+
+    if match is None:
+        return
+
+    entries, std_in, failures = fetch_entries_to_evaluate(worker, match["id"], job["entries"])
+    if len(entries) == 0:
+        if len(failures) > 0:
+            save_evaluations(worker, job, match["id"], [], failures, claim)
+        return
 
+    successes: list[tuple[EvaluationEntry, dict[str, Any]]] = []
+    try:
+        LOGGER.info("Evaluating...")
+        started_at = get_utcnow()
+        job["started_at"] = started_at
+        info_msg = "Started at : " + started_at
+        LOGGER.info(info_msg)
+
+        config: DockerConfig = {
+            "image": match["problem_docker_image"],
+            "environments": match["problem_environments"],
+            "command": args["command"],
+            "timeout": args["timeout"],
+            "rm": args["rm"],
+        }
+        if len(entries) == 1:
+            evaluation_results = [worker["execute"](config, std_in)]
+        else:
+            LOGGER.info("Batch of %d solutions", len(entries))
+            evaluation_results = worker["execute_batch"](config, std_in)
+
+        LOGGER.info("...Evaluated")
+        finished_at = get_utcnow()
+        job["finished_at"] = finished_at
+        info_msg = "Finished at : " + finished_at
+        LOGGER.info(info_msg)
+
+    except Exception as error:
+        error_msg = format_exc() if isinstance(error, ContainerRuntimeError) else "Internal Server Error"
+        LOGGER.exception("Error occurred while evaluating solution.")
+        failures.extend(
+            {"entry": entry, "error_message": error_msg, "admin_error_message": format_exc()} for entry in entries
+        )
+
+    else:
+        for entry, evaluation_result in zip(entries, evaluation_results, strict=True):
             if "error" in evaluation_result:
-                msg = "Error occurred while evaluating solution:\n" + evaluation_result["error"]
-                raise ContainerRuntimeError(msg)
+                LOGGER.error("Error occurred while evaluating solution:\n%s", evaluation_result["error"])
+                error_msg = "Error occurred while evaluating solution:\n" + evaluation_result["error"]
+                failures.append({"entry": entry, "error_message": error_msg, "admin_error_message": error_msg})
+                continue
             if "feasible" not in evaluation_result:
                 evaluation_result["feasible"] = None
             if "constraint" not in evaluation_result:
@@ -228,77 +382,238 @@ def evaluate(process_name: str, args: Args) -> None:  # noqa: PLR0915, C901, PLR
                 evaluation_result["info"] = {}
 
             LOGGER.debug("Evaluation Result: %s", evaluation_result)
+            successes.append((entry, evaluation_result))
+
+    save_evaluations(worker, job, match["id"], successes, failures, claim)
+
+
+def fetch_entries_to_evaluate(
+    worker: EvaluationWorker,
+    match_id: str,
+    entries: list[EvaluationEntry],
+) -> tuple[list[EvaluationEntry], list[str], list[FailedEntry]]:
+    """Fetch the solutions of the messages, deleting the messages whose evaluation already exists.
 
-            LOGGER.info("...Evaluated")
-            finished_at = get_utcnow()
-            info_msg = "Finished at : " + finished_at
-            LOGGER.info(info_msg)
+    A message whose solution is not found fails alone, and the solutions of the other messages are evaluated.
 
+    Args:
+        worker (EvaluationWorker): The resources of the worker.
+        match_id (str): The match ID.
+        entries (list[EvaluationEntry]): The messages of the job.
+
+    Returns:
+        tuple[list[EvaluationEntry], list[str], list[FailedEntry]]: The messages to evaluate, the standard input lines
+            of their solutions, and the messages that failed, e.g. because their solutions were not found.
+    """
+    try:
+        LOGGER.info("Fetching Solution from DB...")
+        solutions = fetch_solutions_to_evaluate(
+            worker["dynamodb"],
+            match_id,
+            [(entry["message"]["participant_id"], entry["message"]["trial"]) for entry in entries],
+        )
+        LOGGER.info("...Fetched")
+    except Exception:
+        LOGGER.exception("Error occurred while fetching solutions.")
+        admin_error_msg = format_exc()
+        return (
+            [],
+            [],
+            [
+                {"entry": entry, "error_message": "Internal Server Error", "admin_error_message": admin_error_msg}
+                for entry in entries
+            ],
+        )
+
+    entries_to_evaluate: list[EvaluationEntry] = []
+    std_in: list[str] = []
+    failures: list[FailedEntry] = []
+    for entry, solution in zip(entries, solutions, strict=True):
+        if solution["evaluated"]:
+            LOGGER.warning("The evaluation already exists.")
+            worker["sqs"].delete_message_from_queue(entry["receipt_handle"])
+            continue
+        if solution["solution"] is None:
+            LOGGER.error("Solution not found: %s", entry["message"])
+            failures.append(
+                {"entry": entry, "error_message": "Internal Server Error", "admin_error_message": "Solution not found"},
+            )
+            continue
+        LOGGER.debug("Solution: %s", solution["solution"])
+        entries_to_evaluate.append(entry)
+        std_in.append(json.dumps(solution["solution"]["variable"]) + "\n")
+
+    return entries_to_evaluate, std_in, failures
+
+
+def save_evaluations(  # noqa: PLR0913
+    worker: EvaluationWorker,
+    job: EvaluationJob,
+    match_id: str,
+    successes: list[tuple[EvaluationEntry, dict[str, Any]]],
+    failures: list[FailedEntry],
+    claim: Callable[[], bool],
+) -> None:
+    """Claim the job and save the results of its messages.
+
+    Args:
+        worker (EvaluationWorker): The resources of the worker.
+        job (EvaluationJob): The evaluation job.
+        match_id (str): The match ID.
+        successes (list[tuple[EvaluationEntry, dict[str, Any]]]): The messages and their evaluation results.
+        failures (list[FailedEntry]): The messages whose evaluation failed.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    if not claim():
+        LOGGER.warning("The evaluation has been taken over. The result is discarded.")
+        return
+
+    for entry, evaluation_result in successes:
+        message = entry["message"]
+        try:
             LOGGER.info("Saving Evaluation...")
-            save_success_evaluation(
-                dynamodb,
-                {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "objective": evaluation_result["objective"],
-                    "constraint": evaluation_result["constraint"],
-                    "info": evaluation_result["info"],
-                    "feasible": evaluation_result["feasible"],
-                },
+            success_evaluation: SuccessEvaluationCreateParams = {
+                "match_id": match_id,
+                "participant_id": message["participant_id"],
+                "trial_no": message["trial_no"],
+                "created_at": get_utcnow(),
+                "started_at": job["started_at"] if job["started_at"] is not None else get_utcnow(),
+                "finished_at": job["finished_at"] if job["finished_at"] is not None else get_utcnow(),
+                "objective": evaluation_result["objective"],
+                "constraint": evaluation_result["constraint"],
+                "info": evaluation_result["info"],
+                "feasible": evaluation_result["feasible"],
+            }
+            save_success_evaluation(worker["dynamodb"], success_evaluation)
+            LOGGER.debug("Evaluation to save: %s", success_evaluation)
+            LOGGER.info("...Saved")
+
+            worker["sqs"].delete_message_from_queue(entry["receipt_handle"])
+
+        except Exception:
+            LOGGER.exception("Error occurred while saving evaluation.")
+            failures.append(
+                {"entry": entry, "error_message": "Internal Server Error", "admin_error_message": format_exc()},
             )
-            LOGGER.debug(
-                "Evaluation to save: %s",
-                {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "objective": evaluation_result["objective"],
-                    "constraint": evaluation_result["constraint"],
-                    "info": evaluation_result["info"],
-                    "feasible": evaluation_result["feasible"],
-                },
+
+    for failure in failures:
+        save_failed_entry(worker, job, failure)
+
+
+def save_failed_entry(worker: EvaluationWorker, job: EvaluationJob, failure: FailedEntry) -> None:
+    """Save the evaluation of a message as failed and delete the message.
+
+    Args:
+        worker (EvaluationWorker): The resources of the worker.
+        job (EvaluationJob): The evaluation job the message belongs to.
+        failure (FailedEntry): The message and the error messages.
+    """
+    message = failure["entry"]["message"]
+    try:
+        LOGGER.info("Saving Failed Evaluation...")
+        failed_evaluation: FailedEvaluationCreateParams = {
+            "match_id": "Match#" + message["match_id"],
+            "participant_id": message["participant_id"],
+            "trial_no": message["trial_no"],
+            "created_at": get_utcnow(),
+            "started_at": job["started_at"] if job["started_at"] is not None else get_utcnow(),
+            "finished_at": job["finished_at"] if job["finished_at"] is not None else get_utcnow(),
+            "error_message": truncate_text_center(failure["error_message"], 16384),
+            "admin_error_message": truncate_text_center(failure["admin_error_message"], 16384),
+        }
+        LOGGER.debug("Evaluation to save: %s", failed_evaluation)
+        save_failed_evaluation(worker["dynamodb"], failed_evaluation)
+        LOGGER.info("...Saved")
+        worker["sqs"].delete_message_from_queue(failure["entry"]["receipt_handle"])
+    except Exception:
+        LOGGER.exception("Error occurred while handling failed evaluation.")
+        LOGGER.exception(format_exc())
+
+
+def save_interrupted_evaluations(pool: WorkerPool[EvaluationWorker, EvaluationJob]) -> None:
+    """Save the evaluations in flight as failed when the process is interrupted.
+
+    Args:
+        pool (WorkerPool[EvaluationWorker, EvaluationJob]): The pool of the evaluation workers.
+    """
+    admin_error_msg = format_exc()
+    for worker, job in pool.take_over():
+        for entry in job["entries"]:
+            save_failed_entry(
+                worker,
+                job,
+                {"entry": entry, "error_message": "Internal Server Error", "admin_error_message": admin_error_msg},
             )
-            LOGGER.info("...Saved")
 
-            sqs.delete_message_from_queue()
-
-        except (KeyboardInterrupt, Exception) as error:
-            if isinstance(error, KeyboardInterrupt):
-                signal.signal(signal.SIGTERM, signal.SIG_IGN)
-                signal.signal(signal.SIGINT, signal.SIG_IGN)
-            try:
-                started_at = started_at if started_at is not None else get_utcnow()
-                finished_at = finished_at if finished_at is not None else get_utcnow()
-                error_msg = format_exc() if isinstance(error, ContainerRuntimeError) else "Internal Server Error"
-                admin_error_msg = format_exc()
-                LOGGER.exception("Error occurred while evaluating solution.")
-                LOGGER.info("Saving Failed Evaluation...")
-                failed_evaluation: FailedEvaluationCreateParams = {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "error_message": truncate_text_center(error_msg, 16384),
-                    "admin_error_message": truncate_text_center(admin_error_msg, 16384),
-                }
-                LOGGER.debug("Evaluation to save: %s", failed_evaluation)
-                save_failed_evaluation(dynamodb, failed_evaluation)
-                LOGGER.info("...Saved")
-                sqs.delete_message_from_queue()
-            except Exception:
-                LOGGER.exception("Error occurred while handling failed evaluation.")
-                LOGGER.exception(format_exc())
-            if isinstance(error, KeyboardInterrupt):
-                signal.signal(signal.SIGTERM, signal.SIG_DFL)
-                signal.signal(signal.SIGINT, signal.SIG_DFL)
-                sys.exit(1)
-            continue
+
+def evaluate(process_name: str, args: Args) -> None:
+    """The function that controls the evaluation process.
+
+    Up to `args["concurrency"]` jobs are evaluated at the same time. Each worker has its own DynamoDB instance,
+    while the SQS instance (message buffer and visibility extender) is shared.
+    Up to `args["evaluation_batch_size"]` solutions of the same match are evaluated in one container run.
+
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments for the evaluation process.
+    """
+    sqs = setup_sqs(args)
+    containers = setup_persistent_containers(args)
+    execute = containers.execute if containers is not None else execute_in_docker
+    execute_batch = containers.execute_batch if containers is not None else execute_batch_in_docker
+    workers: list[EvaluationWorker] = [
+        {"sqs": sqs, "dynamodb": setup_dynamodb(args), "execute": execute, "execute_batch": execute_batch}
+        for _ in range(max(args["concurrency"], 1))
+    ]
+    pool: WorkerPool[EvaluationWorker, EvaluationJob] = WorkerPool(
+        workers,
+        lambda worker, job, claim: run_evaluation_job(process_name, args, worker, job, claim),
+    )
+
+    n_evaluation = 0
+
+    try:
+        while True:
+            n_evaluation += 1
+
+            if args["num"] > 0 and n_evaluation > args["num"]:
+                LOGGER.info("Reached the maximum number of evaluations.")
+                break
+
+            worker = pool.acquire()
+
+            LOGGER.info("==================== Evaluation: %d ====================", n_evaluation)
+
+            limit = args["num"] - n_evaluation + 1 if args["num"] > 0 else args["evaluation_batch_size"]
+            limit = min(limit, args["evaluation_batch_size"])
+            # Receive no more messages than the idle workers can take soon, leaving the rest to the other processes.
+            entry = get_message_from_queue(sqs, args["interval"], process_name, pool.idle_count + limit)
+
+            if entry is None:
+                pool.release(worker)
+                continue
+
+            job = collect_batch(args, sqs, entry, limit, pool.idle_count)
+            pool.submit(worker, job)
+            n_evaluation += len(job["entries"]) - 1  # the first message is already counted
+
+    except SystemExit as error:
+        if error.code == 0:  # stop flag detected: let the evaluations in flight finish
+            pool.join()
+        else:
+            save_interrupted_evaluations(pool)
+        raise
+    except KeyboardInterrupt:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        LOGGER.exception("Evaluator interrupted.")
+        save_interrupted_evaluations(pool)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        sys.exit(1)
+    else:
+        pool.join()
+    finally:
+        sqs.close()
+        if containers is not None:
+            containers.close()
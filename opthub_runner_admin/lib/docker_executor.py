@@ -2,15 +2,31 @@
 
 import json
 import logging
+import socket
+import struct
+from collections import deque
+from collections.abc import Callable, Sequence
+from threading import Event, Lock, Thread
+from time import monotonic
 from typing import Any, TypedDict, cast
 
 import docker
-from docker.errors import APIError
+from docker.errors import DockerException
+from docker.models.containers import Container
 
+from opthub_runner_admin.lib.docker_image import IMAGE_RESOLVER
 from opthub_runner_admin.utils.converter import float_to_json_float
+from opthub_runner_admin.utils.docker import DOCKER_CLIENT
 
 LOGGER = logging.getLogger(__name__)
 
+FRAME_HEADER_SIZE = 8  # the size of the header of a frame in the attach socket
+STDOUT = 1  # the stream type of stdout in the attach socket
+STDOUT_TAIL_LINES = 100  # the number of the last non-empty lines of stdout kept by a container run
+STDOUT_MAX_LINE_BYTES = 1 << 20  # the maximum bytes of a line of stdout. The rest of a longer line is dropped
+
+StdinLine = str | bytes  # a line of the standard input. bytes are sent as they are (e.g. JSON serialized in advance)
+
 
 class DockerConfig(TypedDict):
     """A type for docker execution configuration."""
@@ -24,73 +40,203 @@ class DockerConfig(TypedDict):
 
 def execute_in_docker(
     config: DockerConfig,
-    std_in: list[str],
+    std_in: Sequence[StdinLine],
 ) -> dict[str, Any]:
     """Execute command in docker container.
 
     Args:
         config (DockerConfig): docker image name
-        std_in (list[str]): standard input
+        std_in (Sequence[StdinLine]): standard input
 
     Returns:
         dict[str, Any]: parsed standard output
     """
-    LOGGER.info("Connect to docker daemon...")
-    client = docker.from_env()
-    LOGGER.info("...Connected")
+    stdout = run_container(config, std_in)
+
+    LOGGER.info("Parse stdout...")
+    out: dict[str, Any] | None = parse_stdout(stdout)
+
+    if out is None:
+        msg = "Failed to parse stdout."
+        raise RuntimeError(msg)
+
+    LOGGER.debug(out)
+    LOGGER.info("...Parsed")
+
+    return cast(dict[str, Any], float_to_json_float(out))
+
+
+def execute_batch_in_docker(
+    config: DockerConfig,
+    std_in: Sequence[StdinLine],
+    n_outputs: int | None = None,
+) -> list[dict[str, Any]]:
+    """Execute command in docker container for a batch of inputs. The container writes one JSON line per input line.
+
+    Args:
+        config (DockerConfig): docker image name
+        std_in (Sequence[StdinLine]): standard input, one line per input
+        n_outputs (int | None): the number of JSON lines to receive. Defaults to the number of input lines.
+
+    Returns:
+        list[dict[str, Any]]: parsed standard output, one per input
+    """
+    n_outputs = len(std_in) if n_outputs is None else n_outputs
+    stdout = run_container(config, std_in, max(n_outputs, STDOUT_TAIL_LINES))
+
+    LOGGER.info("Parse stdout...")
+    outs: list[dict[str, Any]] | None = parse_stdout_lines(stdout, n_outputs)
+
+    if outs is None:
+        msg = f"Failed to parse stdout. Expected {n_outputs} lines of output."
+        raise RuntimeError(msg)
+
+    LOGGER.debug(outs)
+    LOGGER.info("...Parsed")
+
+    return [cast(dict[str, Any], float_to_json_float(out)) for out in outs]
+
+
+def encode_stdin_line(line: StdinLine) -> bytes:
+    """Encode a line of the standard input.
+
+    Args:
+        line (StdinLine): The line. bytes are returned as they are.
+
+    Returns:
+        bytes: The encoded line.
+    """
+    return line if isinstance(line, bytes) else line.encode("utf-8")
 
-    LOGGER.info("Pull image...")
-    try:
-        client.images.pull(config["image"])  # pull image
-    except APIError:
-        client.images.get(config["image"])  # If image in local, get it
 
-    LOGGER.debug(config["image"])
-    LOGGER.info("...Pulled")
+def run_container(
+    config: DockerConfig,
+    std_in: Sequence[StdinLine],
+    tail_lines: int = STDOUT_TAIL_LINES,
+) -> str:
+    """Run a container, send the standard input, and read the standard output until the container exits.
+
+    The standard output is read from the attach socket while the container runs, keeping only its last non-empty lines,
+    so a container printing a lot of progress messages does not use much memory. The standard input is sent from
+    another thread, so a container writing stdout before reading all of stdin does not block the exchange.
+    The standard input is closed after the last line, so the container can read the lines until the end of stdin.
+    If the execution fails (e.g. times out), the container is killed.
+
+    Args:
+        config (DockerConfig): docker image name
+        std_in (Sequence[StdinLine]): standard input
+        tail_lines (int): The number of the last non-empty lines of stdout to keep.
+
+    Returns:
+        str: The last non-empty lines of standard output
+    """
+    IMAGE_RESOLVER.resolve(config["image"])
+    client = DOCKER_CLIENT.get()
+
     # run container
     LOGGER.info("Start container...")
 
-    container = client.containers.run(
+    # Without detach, the container is created with StdinOnce, so its stdin is closed when the attach socket is
+    # half-closed. The socket is attached before the container starts, so no output is missed.
+    container = client.containers.create(
         image=config["image"],
         command=config["command"],
         environment=config["environments"],
         stdin_open=True,
-        detach=True,
+        detach=False,
     )
-    LOGGER.info("...Started: %s", container.name)
 
-    LOGGER.info("Send stdin...")
-    socket = container.attach_socket(params={"stdin": 1, "stream": 1, "stdout": 1, "stderr": 1})
+    try:
+        container_socket = container.attach_socket(params={"stdin": 1, "stream": 1, "stdout": 1})
+        try:
+            container.start()
+            LOGGER.info("...Started: %s", container.name)
+            deadline = monotonic() + config["timeout"]
+            start_stdin_writer(container_socket._sock, std_in, close=True)  # noqa: SLF001
 
-    for line in std_in:
-        socket._sock.sendall(line.encode("utf-8"))  # noqa: SLF001
-    LOGGER.info("...Send")
+            LOGGER.info("Receive stdout...")
+            reader = StdoutReader(container_socket._sock)  # noqa: SLF001
+            tail: deque[str] = deque(maxlen=tail_lines)
+            while (stdout_line := reader.readline(deadline)) is not None:
+                LOGGER.debug(stdout_line)
+                if stdout_line.strip():
+                    tail.append(stdout_line)
+            LOGGER.info("...Received")
+        finally:
+            container_socket.close()
 
-    LOGGER.info("Wait for execution...")
-    container.wait(timeout=config["timeout"])
-    LOGGER.info("...Executed")
+        LOGGER.info("Wait for execution...")
+        container.wait(timeout=max(deadline - monotonic(), 1))
+        LOGGER.info("...Executed")
+    except BaseException:
+        kill_container(container)
+        raise
+    finally:
+        if config["rm"]:
+            remove_container(container)
 
-    LOGGER.info("Receive stdout...")
-    stdout = container.logs(stdout=True, stderr=False).decode("utf-8")
-    LOGGER.debug(stdout)
-    LOGGER.info("...Received")
+    return "\n".join(tail)
 
-    if config["rm"]:
-        LOGGER.info("Remove container...")
-        container.remove()
+
+def kill_container(container: Container) -> None:
+    """Kill a container that may still be running, e.g. after its execution timed out.
+
+    Args:
+        container (Container): The container.
+    """
+    LOGGER.warning("Kill container %s...", container.name)
+    try:
+        container.kill()
+    except DockerException:
+        LOGGER.warning("Failed to kill container %s. It may have exited.", container.name)
+    else:
+        LOGGER.info("...Killed")
+
+
+def remove_container(container: Container) -> None:
+    """Remove a container, killing it if it is still running.
+
+    Args:
+        container (Container): The container.
+    """
+    LOGGER.info("Remove container...")
+    try:
+        container.remove(force=True)
+    except DockerException:
+        LOGGER.warning("Failed to remove container %s.", container.name)
+    else:
         LOGGER.info("...Removed")
 
-    LOGGER.info("Parse stdout...")
-    out: dict[str, Any] | None = parse_stdout(stdout)
 
-    if out is None:
-        msg = "Failed to parse stdout."
-        raise RuntimeError(msg)
+def start_stdin_writer(sock: socket.socket, std_in: Sequence[StdinLine], close: bool) -> Thread:
+    """Send the standard input to a container from another thread.
 
-    LOGGER.debug(out)
-    LOGGER.info("...Parsed")
+    Args:
+        sock (socket.socket): The attach socket of the container.
+        std_in (Sequence[StdinLine]): standard input
+        close (bool): Whether to close the standard input after the last line by half-closing the socket,
+            so that the container reads the end of stdin.
 
-    return cast(dict[str, Any], float_to_json_float(out))
+    Returns:
+        Thread: The thread sending the standard input.
+    """
+
+    def send() -> None:
+        LOGGER.info("Send stdin...")
+        try:
+            for line in std_in:
+                sock.sendall(encode_stdin_line(line))
+            if close:
+                sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            # e.g. the container exited or was killed before reading all of stdin
+            LOGGER.warning("Failed to send stdin to the container.")
+            return
+        LOGGER.info("...Send")
+
+    writer = Thread(target=send, daemon=True)
+    writer.start()
+    return writer
 
 
 def parse_stdout(stdout: str) -> dict[str, Any] | None:
@@ -102,10 +248,444 @@ def parse_stdout(stdout: str) -> dict[str, Any] | None:
     Returns:
         dict[str, Any] | None: parsed stdout
     """
-    lines = stdout.split("\n")
-    lines.reverse()
-    for line in lines:
+    for line in reversed(stdout.split("\n")):
         if line:
             line_dict: dict[str, Any] = json.loads(line)
             return line_dict
     return None
+
+
+def parse_stdout_lines(stdout: str, n: int) -> list[dict[str, Any]] | None:
+    """Parse the last n non-empty lines of stdout.
+
+    Args:
+        stdout (str): stdout
+        n (int): the number of lines to parse
+
+    Returns:
+        list[dict[str, Any]] | None: parsed lines in the order of output, or None if stdout has fewer lines
+    """
+    lines = [line for line in stdout.split("\n") if line]
+    if len(lines) < n:
+        return None
+    return [json.loads(line) for line in lines[len(lines) - n :]]
+
+
+class StdoutReader:
+    """Read the stdout of a container line by line from its attach socket.
+
+    The attach socket of a container without tty multiplexes stdout and stderr into frames,
+    each of which has an 8-byte header of the stream type and the payload size.
+    The complete lines of a frame are split at once, and the lines longer than `max_line_bytes` are truncated,
+    so reading takes time linear in the output and the memory used does not grow with it.
+    """
+
+    def __init__(self, sock: socket.socket, max_line_bytes: int = STDOUT_MAX_LINE_BYTES) -> None:
+        """Initialize the reader.
+
+        Args:
+            sock (socket.socket): The attach socket of the container.
+            max_line_bytes (int): The maximum bytes of a line. The rest of a longer line is dropped.
+        """
+        self.__sock = sock
+        self.__max_line_bytes = max_line_bytes
+        self.__received = bytearray()  # bytes received but not parsed into frames yet
+        self.__stdout = bytearray()  # the last line of stdout, not terminated by a line break yet
+        self.__lines: deque[str] = deque()  # the complete lines not read yet
+        self.__dropping = False  # whether the rest of the last line is dropped
+
+    def readline(self, deadline: float | None) -> str | None:
+        """Read a line of stdout.
+
+        Args:
+            deadline (float | None): The time (time.monotonic) by which the line must be read.
+
+        Returns:
+            str | None: The line without the line break, or None if the container closed stdout.
+        """
+        while not self.__lines:
+            if not self.__read_frame(deadline):
+                if self.__stdout:  # the last line without a line break
+                    line = self.__stdout.decode("utf-8", errors="replace")
+                    self.__stdout.clear()
+                    return line
+                return None
+        return self.__lines.popleft()
+
+    def __read_frame(self, deadline: float | None) -> bool:
+        """Read a frame and keep its payload if it is stdout.
+
+        Args:
+            deadline (float | None): The time (time.monotonic) by which the frame must be read.
+
+        Returns:
+            bool: False if the socket is closed, True otherwise.
+        """
+        if not self.__receive(FRAME_HEADER_SIZE, deadline):
+            return False
+        stream, size = struct.unpack_from(">BxxxL", self.__received)
+        if not self.__receive(FRAME_HEADER_SIZE + size, deadline):
+            return False
+        if stream == STDOUT:
+            self.__append_stdout(FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + size)
+        del self.__received[: FRAME_HEADER_SIZE + size]
+        return True
+
+    def __append_stdout(self, start: int, end: int) -> None:
+        """Append the payload of a stdout frame and split its complete lines.
+
+        Args:
+            start (int): The position in the received bytes where the payload starts.
+            end (int): The position in the received bytes where the payload ends.
+        """
+        if self.__dropping:  # skip to the end of the truncated line
+            newline = self.__received.find(b"\n", start, end)
+            if newline < 0:
+                return
+            start = newline
+            self.__dropping = False
+
+        scanned = len(self.__stdout)  # no line break before this position
+        with memoryview(self.__received) as received:
+            self.__stdout += received[start:end]
+
+        last = self.__stdout.rfind(b"\n", scanned)
+        if last >= 0:
+            # A line break is never a part of a multi-byte character, so the lines can be decoded at once.
+            lines = self.__stdout[:last].decode("utf-8", errors="replace").split("\n")
+            del self.__stdout[: last + 1]
+            if last > self.__max_line_bytes:
+                lines = [self.__truncate(line) for line in lines]
+            self.__lines.extend(lines)
+
+        if len(self.__stdout) > self.__max_line_bytes:
+            LOGGER.warning("A line of stdout is longer than %d bytes. It is truncated.", self.__max_line_bytes)
+            del self.__stdout[self.__max_line_bytes :]
+            self.__dropping = True
+
+    def __truncate(self, line: str) -> str:
+        """Truncate a line to `max_line_bytes` characters.
+
+        Args:
+            line (str): The line.
+
+        Returns:
+            str: The truncated line.
+        """
+        if len(line) <= self.__max_line_bytes:
+            return line
+        LOGGER.warning("A line of stdout is longer than %d bytes. It is truncated.", self.__max_line_bytes)
+        return line[: self.__max_line_bytes]
+
+    def __receive(self, size: int, deadline: float | None) -> bool:
+        """Receive bytes from the socket until `size` bytes are received.
+
+        Args:
+            size (int): The number of bytes to receive.
+            deadline (float | None): The time (time.monotonic) by which the bytes must be received.
+
+        Returns:
+            bool: False if the socket is closed, True otherwise.
+        """
+        while len(self.__received) < size:
+            if deadline is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    msg = "Timed out while reading stdout of the container."
+                    raise TimeoutError(msg)
+                self.__sock.settimeout(remaining)
+            else:
+                self.__sock.settimeout(None)
+            chunk = self.__sock.recv(65536)
+            if not chunk:
+                return False
+            self.__received += chunk
+        return True
+
+
+class PersistentContainer:
+    """A long-lived container that reads inputs from stdin and writes one JSON line to stdout per input."""
+
+    def __init__(self, client: docker.DockerClient, config: DockerConfig) -> None:
+        """Start the container.
+
+        Args:
+            client (docker.DockerClient): docker client
+            config (DockerConfig): docker execution configuration
+        """
+        LOGGER.info("Start persistent container...")
+        self.container = client.containers.run(
+            image=config["image"],
+            command=config["command"],
+            environment=config["environments"],
+            stdin_open=True,
+            detach=True,
+        )
+        self.socket = self.container.attach_socket(params={"stdin": 1, "stream": 1, "stdout": 1})
+        self.reader = StdoutReader(self.socket._sock)  # noqa: SLF001
+        self.rm = config["rm"]
+        self.uses = 0
+        self.synced = 0  # the number of history entries sent to the container
+        self.last_used = monotonic()
+        LOGGER.info("...Started: %s", self.container.name)
+
+    def exchange(self, std_in: Sequence[StdinLine], timeout: float, n_outputs: int) -> list[dict[str, Any]]:
+        """Send the standard input and receive the JSON lines written in response.
+
+        Args:
+            std_in (Sequence[StdinLine]): standard input
+            timeout (float): timeout in seconds
+            n_outputs (int): the number of JSON lines to receive
+
+        Returns:
+            list[dict[str, Any]]: parsed standard output
+        """
+        deadline = monotonic() + timeout
+
+        start_stdin_writer(self.socket._sock, std_in, close=False)  # noqa: SLF001
+
+        LOGGER.info("Receive stdout...")
+        outs: list[dict[str, Any]] = []
+        while len(outs) < n_outputs:
+            stdout_line = self.reader.readline(deadline)
+            if stdout_line is None:
+                msg = f"The persistent container {self.container.name} closed stdout without a response."
+                raise RuntimeError(msg)
+            LOGGER.debug(stdout_line)
+            if not stdout_line.strip():
+                continue
+            try:
+                out = json.loads(stdout_line)
+            except json.JSONDecodeError:
+                continue  # not a response, e.g. a progress message
+            if isinstance(out, dict):
+                outs.append(out)
+        LOGGER.info("...Received")
+
+        self.uses += 1
+        self.last_used = monotonic()
+
+        return [cast(dict[str, Any], float_to_json_float(out)) for out in outs]
+
+    def stop(self) -> None:
+        """Stop the container."""
+        LOGGER.info("Stop persistent container %s...", self.container.name)
+        try:
+            self.socket.close()
+            if self.rm:
+                self.container.remove(force=True)
+            else:
+                self.container.kill()
+        except DockerException:
+            LOGGER.warning("Failed to stop the persistent container %s.", self.container.name)
+        LOGGER.info("...Stopped")
+
+
+class PersistentContainerPool:
+    """A pool of persistent containers for each (image, environments, command).
+
+    The containers are reused across executions to skip the startup of a container.
+    A container is recycled when it has been idle for `idle_timeout` seconds or used `max_uses` times.
+    A container is used by one execution at a time.
+    The containers executed with a history (`execute_with_history`) are kept separately for each session, because
+    they keep the history they have received.
+    """
+
+    def __init__(self, idle_timeout: float, max_uses: int) -> None:
+        """Initialize the pool.
+
+        Args:
+            idle_timeout (float): The seconds after which an idle container is stopped.
+            max_uses (int): The number of executions after which a container is stopped.
+        """
+        self.__idle_timeout = idle_timeout
+        self.__max_uses = max_uses
+        self.__lock = Lock()
+        self.__idle: dict[tuple[str, str, str, str], list[PersistentContainer]] = {}
+        self.__closed = Event()
+
+        # Stop the idle containers even when no execution comes.
+        reaper = Thread(target=self.__reap_periodically, daemon=True)
+        reaper.start()
+
+    def execute(self, config: DockerConfig, std_in: Sequence[StdinLine]) -> dict[str, Any]:
+        """Execute in a persistent container.
+
+        Args:
+            config (DockerConfig): docker execution configuration
+            std_in (Sequence[StdinLine]): standard input
+
+        Returns:
+            dict[str, Any]: parsed standard output
+        """
+        return self.__exchange(config, std_in, 1)[0]
+
+    def execute_batch(
+        self,
+        config: DockerConfig,
+        std_in: Sequence[StdinLine],
+        n_outputs: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Execute in a persistent container for a batch of inputs. The container writes one JSON line per input line.
+
+        Args:
+            config (DockerConfig): docker execution configuration
+            std_in (Sequence[StdinLine]): standard input, one line per input
+            n_outputs (int | None): the number of JSON lines to receive. Defaults to the number of input lines.
+
+        Returns:
+            list[dict[str, Any]]: parsed standard output, one per input
+        """
+        return self.__exchange(config, std_in, len(std_in) if n_outputs is None else n_outputs)
+
+    def execute_with_history(  # noqa: PLR0913
+        self,
+        config: DockerConfig,
+        session: str,
+        current: StdinLine,
+        history_length: int,
+        serialize_history: Callable[[int], StdinLine],
+        n_outputs: int = 1,
+    ) -> list[dict[str, Any]]:
+        """Execute in the persistent container of a session, sending only the history it has not received yet.
+
+        The container receives two lines per input: the current input and a JSON array of the history entries
+        appended since its previous input. A new container receives the whole history. The container must keep the
+        history it has received. A container that has received more entries than history_length (e.g. after the
+        history is truncated) is replaced with a new one.
+
+        Args:
+            config (DockerConfig): docker execution configuration
+            session (str): The session of the history, e.g. the match and the participant.
+            current (StdinLine): The line of the current input.
+            history_length (int): The number of entries in the history.
+            serialize_history (Callable[[int], StdinLine]): The function to serialize the history entries from
+                the given index into a line.
+            n_outputs (int): the number of JSON lines to receive
+
+        Returns:
+            list[dict[str, Any]]: parsed standard output
+        """
+        key, container = self.__acquire(config, session)
+        if container.synced > history_length:
+            container.stop()
+            container = PersistentContainer(DOCKER_CLIENT.get(), config)
+
+        LOGGER.info("Send %d of %d history entries.", history_length - container.synced, history_length)
+        std_in = [current, serialize_history(container.synced)]
+        container.synced = history_length  # the container is stopped if the exchange fails
+        return self.__exchange_with(key, container, std_in, config, n_outputs)
+
+    def close(self) -> None:
+        """Stop all the idle containers."""
+        self.__closed.set()
+        with self.__lock:
+            containers = [container for containers in self.__idle.values() for container in containers]
+            self.__idle.clear()
+        for container in containers:
+            container.stop()
+
+    def __exchange(self, config: DockerConfig, std_in: Sequence[StdinLine], n_outputs: int) -> list[dict[str, Any]]:
+        """Exchange the standard input and output with a persistent container.
+
+        Args:
+            config (DockerConfig): docker execution configuration
+            std_in (Sequence[StdinLine]): standard input
+            n_outputs (int): the number of JSON lines to receive
+
+        Returns:
+            list[dict[str, Any]]: parsed standard output
+        """
+        key, container = self.__acquire(config, "")
+        return self.__exchange_with(key, container, std_in, config, n_outputs)
+
+    def __acquire(self, config: DockerConfig, session: str) -> tuple[tuple[str, str, str, str], PersistentContainer]:
+        """Take an idle container for the configuration and the session, starting a new one if there is none.
+
+        Args:
+            config (DockerConfig): docker execution configuration
+            session (str): The session. An empty string for the containers without a history.
+
+        Returns:
+            tuple[tuple[str, str, str, str], PersistentContainer]: The key of the container and the container.
+        """
+        key = (
+            config["image"],
+            json.dumps(config["environments"], sort_keys=True),
+            json.dumps(config["command"]),
+            session,
+        )
+
+        container = self.__pop_idle(key)
+        if container is None:
+            IMAGE_RESOLVER.resolve(config["image"])
+            container = PersistentContainer(DOCKER_CLIENT.get(), config)
+        return key, container
+
+    def __exchange_with(  # noqa: PLR0913
+        self,
+        key: tuple[str, str, str, str],
+        container: PersistentContainer,
+        std_in: Sequence[StdinLine],
+        config: DockerConfig,
+        n_outputs: int,
+    ) -> list[dict[str, Any]]:
+        """Exchange the standard input and output with a container and return it to the idle containers.
+
+        Args:
+            key (tuple[str, str, str, str]): The key of the container.
+            container (PersistentContainer): The container.
+            std_in (Sequence[StdinLine]): standard input
+            config (DockerConfig): docker execution configuration
+            n_outputs (int): the number of JSON lines to receive
+
+        Returns:
+            list[dict[str, Any]]: parsed standard output
+        """
+        try:
+            outs = container.exchange(std_in, config["timeout"], n_outputs)
+        except BaseException:
+            container.stop()  # the state of the container is unknown
+            raise
+
+        if container.uses >= self.__max_uses:
+            container.stop()
+        else:
+            with self.__lock:
+                self.__idle.setdefault(key, []).append(container)
+
+        return outs
+
+    def __pop_idle(self, key: tuple[str, str, str, str]) -> PersistentContainer | None:
+        """Pop an idle container for the key.
+
+        Args:
+            key (tuple[str, str, str, str]): The image, environments, command, and session.
+
+        Returns:
+            PersistentContainer | None: The idle container, or None if there is no idle container.
+        """
+        self.__reap()
+        with self.__lock:
+            containers = self.__idle.get(key, [])
+            return containers.pop() if containers else None
+
+    def __reap(self) -> None:
+        """Stop the containers idle for more than `idle_timeout` seconds."""
+        now = monotonic()
+        expired: list[PersistentContainer] = []
+        with self.__lock:
+            for key, containers in list(self.__idle.items()):
+                expired.extend(container for container in containers if now - container.last_used > self.__idle_timeout)
+                self.__idle[key] = [
+                    container for container in containers if now - container.last_used <= self.__idle_timeout
+                ]
+                if not self.__idle[key]:
+                    del self.__idle[key]
+        for container in expired:
+            container.stop()
+
+    def __reap_periodically(self) -> None:
+        """Stop the idle containers periodically until the pool is closed."""
+        while not self.__closed.wait(timeout=max(self.__idle_timeout / 2, 1)):
+            self.__reap()
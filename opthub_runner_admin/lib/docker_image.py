@@ -0,0 +1,264 @@
+"""This module provides the resolver of the Docker images, skipping the pulls of the images checked recently."""
+
+import logging
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Any, TypedDict
+
+import docker
+from docker.errors import APIError
+
+from opthub_runner_admin.models.exception import DockerImageNotFoundError
+from opthub_runner_admin.utils.docker import DOCKER_CLIENT
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300.0  # the default seconds during which a checked image is not pulled again
+PROGRESS_LOG_INTERVAL = 5.0  # the seconds between the logs of the progress of a pull
+MAX_PREWARM_WORKERS = 4  # the maximum number of images pulled at the same time by the warm-up
+
+
+class PullFlight(TypedDict):
+    """A pull in progress, shared by the workers waiting for the same image.
+
+    done (Event): Set when the pull finishes.
+    digest (str | None): The ID of the pulled image, or None if the pull failed.
+    """
+
+    done: Event
+    digest: str | None
+
+
+class ResolvedImage(TypedDict):
+    """An image resolved to a local image.
+
+    digest (str): The ID of the local image.
+    checked_at (float): The time (time.monotonic) when the image was last checked against the registry.
+    """
+
+    digest: str
+    checked_at: float
+
+
+def pull_image(client: docker.DockerClient, image: str) -> str:
+    """Pull the image, logging the progress and the duration. If the image can not be pulled, use the local one.
+
+    Args:
+        client (docker.DockerClient): docker client
+        image (str): docker image name
+
+    Returns:
+        str: The ID of the local image.
+    """
+    LOGGER.info("Pull image %s...", image)
+    started_at = monotonic()
+    try:
+        log_pull_progress(image, client.api.pull(image, stream=True, decode=True))  # pull image
+    except APIError:
+        LOGGER.warning("Failed to pull image %s. The local image is used.", image)
+    pulled = client.images.get(image)  # the pulled image, or the local one if the pull failed
+
+    LOGGER.info("...Pulled in %.1f seconds", monotonic() - started_at)
+    return str(pulled.id)
+
+
+def log_pull_progress(image: str, progress: Iterable[dict[str, Any]]) -> None:
+    """Consume the progress of a pull, logging the bytes downloaded every PROGRESS_LOG_INTERVAL seconds.
+
+    Args:
+        image (str): docker image name
+        progress (Iterable[dict[str, Any]]): The decoded progress events of the pull.
+    """
+    layers: dict[str, tuple[int, int]] = {}  # the downloaded and total bytes of each layer
+    logged_at = monotonic()
+    for event in progress:
+        LOGGER.debug(event)
+        if "error" in event:
+            LOGGER.warning("Error occurred while pulling image %s: %s", image, event["error"])
+            continue
+        detail = event.get("progressDetail") or {}
+        if event.get("status") == "Downloading" and detail.get("total"):
+            layers[event["id"]] = (detail.get("current", 0), detail["total"])
+        elif event.get("status") == "Download complete" and event.get("id") in layers:
+            layers[event["id"]] = (layers[event["id"]][1], layers[event["id"]][1])
+
+        if layers and monotonic() - logged_at >= PROGRESS_LOG_INTERVAL:
+            LOGGER.info(
+                "Pulling image %s: %.1f / %.1f MB in %d layers",
+                image,
+                sum(current for current, _ in layers.values()) / 1e6,
+                sum(total for _, total in layers.values()) / 1e6,
+                len(layers),
+            )
+            logged_at = monotonic()
+
+
+class ImageResolver:
+    """Resolve the image references to local images, pulling them from the registry at most once per TTL.
+
+    Within the TTL after an image is checked, the local image is used without contacting the registry.
+    After the TTL, the local image is still used while the image is pulled again in the background,
+    so the executions are never blocked on the registry once the image is present.
+    An image is pulled by one worker at a time. The other workers needing the image wait for the pull in progress
+    and share its result.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        """Initialize the resolver.
+
+        Args:
+            ttl (float): The seconds during which a checked image is not pulled again. If 0, the image is pulled
+                before every execution.
+        """
+        self.__ttl = ttl
+        self.__lock = Lock()
+        self.__images: dict[str, ResolvedImage] = {}
+        self.__refreshing: set[str] = set()
+        self.__flights: dict[str, PullFlight] = {}
+
+    def configure(self, ttl: float) -> None:
+        """Set the TTL of the checked images.
+
+        Args:
+            ttl (float): The seconds during which a checked image is not pulled again.
+        """
+        with self.__lock:
+            self.__ttl = ttl
+
+    def resolve(self, image: str) -> str:
+        """Make the image available locally.
+
+        Args:
+            image (str): The image reference.
+
+        Raises:
+            DockerImageNotFoundError: If the image can not be pulled and is not present locally.
+
+        Returns:
+            str: The ID of the local image.
+        """
+        with self.__lock:
+            resolved = self.__images.get(image)
+            if resolved is not None and self.__ttl > 0:
+                if monotonic() - resolved["checked_at"] < self.__ttl:
+                    LOGGER.debug("Image %s was checked recently. The pull is skipped.", image)
+                    return resolved["digest"]
+                if image not in self.__refreshing:
+                    self.__refreshing.add(image)
+                    Thread(target=self.__refresh, args=(image,), daemon=True).start()
+                return resolved["digest"]
+
+        return self.__pull(image)
+
+    def prewarm(self, images: list[str]) -> None:
+        """Pull the images in parallel, e.g. before the first executions. The images that can not be pulled are skipped.
+
+        Args:
+            images (list[str]): The image references.
+        """
+        images = list(dict.fromkeys(images))  # remove the duplicates, keeping the order
+        if len(images) == 0:
+            return
+
+        LOGGER.info("Pre-warm %d images...", len(images))
+        started_at = monotonic()
+        with ThreadPoolExecutor(max_workers=min(len(images), MAX_PREWARM_WORKERS)) as executor:
+            results = list(executor.map(self.__prewarm_one, images))
+        LOGGER.info(
+            "...Pre-warmed %d of %d images in %.1f seconds",
+            sum(results),
+            len(images),
+            monotonic() - started_at,
+        )
+
+    def __prewarm_one(self, image: str) -> bool:
+        """Pull an image for the warm-up.
+
+        Args:
+            image (str): The image reference.
+
+        Returns:
+            bool: True if the image is available locally, False otherwise.
+        """
+        try:
+            self.resolve(image)
+        except DockerImageNotFoundError:
+            LOGGER.warning("Failed to pre-warm image %s.", image)
+            return False
+        return True
+
+    def __pull(self, image: str) -> str:
+        """Pull the image and record its ID, or wait for the pull of the image in progress.
+
+        Args:
+            image (str): The image reference.
+
+        Raises:
+            DockerImageNotFoundError: If the image can not be pulled and is not present locally.
+
+        Returns:
+            str: The ID of the local image.
+        """
+        with self.__lock:
+            flight = self.__flights.get(image)
+            is_leader = flight is None
+            if flight is None:
+                flight = {"done": Event(), "digest": None}
+                self.__flights[image] = flight
+
+        if not is_leader:
+            LOGGER.info("Wait for the pull of image %s by another worker...", image)
+            flight["done"].wait()
+            if flight["digest"] is None:
+                raise DockerImageNotFoundError
+            LOGGER.info("...Pulled")
+            return flight["digest"]
+
+        try:
+            digest = self.__pull_and_record(image)
+        except Exception as error:
+            LOGGER.exception("Failed to pull image %s.", image)
+            raise DockerImageNotFoundError from error
+        else:
+            flight["digest"] = digest
+            return digest
+        finally:
+            with self.__lock:
+                del self.__flights[image]
+            flight["done"].set()
+
+    def __pull_and_record(self, image: str) -> str:
+        """Pull the image and record its ID.
+
+        Args:
+            image (str): The image reference.
+
+        Returns:
+            str: The ID of the local image.
+        """
+        digest = pull_image(DOCKER_CLIENT.get(), image)
+        with self.__lock:
+            previous = self.__images.get(image)
+            if previous is not None and previous["digest"] != digest:
+                LOGGER.info("Image %s is updated: %s -> %s", image, previous["digest"], digest)
+            self.__images[image] = {"digest": digest, "checked_at": monotonic()}
+        return digest
+
+    def __refresh(self, image: str) -> None:
+        """Pull the image in the background.
+
+        Args:
+            image (str): The image reference.
+        """
+        try:
+            self.__pull(image)
+        except Exception:
+            LOGGER.exception("Failed to refresh image %s. The local image is used.", image)
+        finally:
+            with self.__lock:
+                self.__refreshing.discard(image)
+
+
+IMAGE_RESOLVER = ImageResolver(DEFAULT_TTL)  # the image resolver shared in the process
@@ -1,17 +1,35 @@
 """This module provides a wrapper class for Amazon DynamoDB."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
 from typing import Any, TypedDict, cast
 
 import boto3
 from boto3.dynamodb.conditions import Key
-from boto3.dynamodb.types import TypeSerializer
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
 from botocore.exceptions import BotoCoreError
 
 from opthub_runner_admin.models.schema import FlagSchema, Schema
 
 LOGGER = logging.getLogger(__name__)
 
+MAX_BATCH_GET_KEYS = 100  # The maximum number of keys in a BatchGetItem request
+MAX_BATCH_GET_ATTEMPTS = 8  # The maximum number of BatchGetItem requests for a chunk of keys
+MAX_QUERY_WORKERS = 8  # The maximum number of range queries run at the same time
+
+
+class UnprocessedKeysError(Exception):
+    """Exception raised when some keys of BatchGetItem are still unprocessed after the retries."""
+
+    def __init__(self, n_keys: int) -> None:
+        """Initialize the exception.
+
+        Args:
+            n_keys (int): The number of the unprocessed keys.
+        """
+        super().__init__(f"{n_keys} keys are unprocessed after {MAX_BATCH_GET_ATTEMPTS} BatchGetItem requests.")
+
 
 class PrimaryKey(TypedDict):
     """This class represents the primary key."""
@@ -20,6 +38,21 @@ class PrimaryKey(TypedDict):
     Trial: str
 
 
+class RangeQuery(TypedDict):
+    """This class represents a query of the items between two sort keys.
+
+    partition_key (str): The partition key.
+    least_trial (str): The least trial.
+    greatest_trial (str): The greatest trial.
+    attributes (list[str]): The attributes to get.
+    """
+
+    partition_key: str
+    least_trial: str
+    greatest_trial: str
+    attributes: list[str]
+
+
 class DynamoDBOptions(TypedDict):
     """The options for DynamoDB."""
 
@@ -58,6 +91,7 @@ class DynamoDB:
         )
 
         self.serializer = TypeSerializer()
+        self.deserializer = TypeDeserializer()
 
     def check_accessible(self) -> None:
         """Check if the table is accessible."""
@@ -87,6 +121,60 @@ class DynamoDB:
         item = self.get_item(primary_key_value)
         return item is not None
 
+    def batch_get_items(self, primary_key_values: list[PrimaryKey], attributes: list[str]) -> list[dict[str, Any]]:
+        """Get items from DynamoDB by primary keys with BatchGetItem.
+
+        The keys are requested in chunks of 100, and the unprocessed keys are requested again with backoff,
+        up to MAX_BATCH_GET_ATTEMPTS requests for each chunk.
+
+        Args:
+            primary_key_values (list[PrimaryKey]): The primary key values.
+            attributes (list[str]): The attributes to get. All the attributes are fetched if empty.
+
+        Returns:
+            list[dict[str, Any]]: The items found, in no particular order.
+
+        Raises:
+            UnprocessedKeysError: If some keys are still unprocessed after the retries, an error occurs.
+        """
+        items: list[dict[str, Any]] = []
+
+        for i in range(0, len(primary_key_values), MAX_BATCH_GET_KEYS):
+            request: dict[str, Any] = {
+                "Keys": [cast(dict[str, Any], key) for key in primary_key_values[i : i + MAX_BATCH_GET_KEYS]],
+            }
+            if attributes:
+                request["ProjectionExpression"] = ",".join([f"#attr{j}" for j in range(len(attributes))])
+                request["ExpressionAttributeNames"] = {f"#attr{j}": attr for j, attr in enumerate(attributes)}
+
+            request_items: dict[str, Any] = {self.table_name: request}
+            for attempt in range(MAX_BATCH_GET_ATTEMPTS):
+                if attempt > 0:
+                    sleep(min(0.05 * 2**attempt, 1.0))  # exponential backoff for the unprocessed keys
+                response = self.dynamoDB.batch_get_item(RequestItems=request_items)
+                items.extend(response.get("Responses", {}).get(self.table_name, []))
+                request_items = cast(dict[str, Any], response.get("UnprocessedKeys", {}))
+                if not request_items:
+                    break
+            else:
+                n_keys = sum(len(unprocessed["Keys"]) for unprocessed in request_items.values())
+                LOGGER.error("Failed to get %d items from DynamoDB.", n_keys)
+                raise UnprocessedKeysError(n_keys)
+
+        return items
+
+    def get_existing_keys(self, primary_key_values: list[PrimaryKey]) -> list[PrimaryKey]:
+        """Check which items exist in DynamoDB with a single BatchGetItem, fetching only the key attributes.
+
+        Args:
+            primary_key_values (list[PrimaryKey]): The primary key values.
+
+        Returns:
+            list[PrimaryKey]: The primary key values of the items that exist.
+        """
+        items = self.batch_get_items(primary_key_values, ["ID", "Trial"])
+        return [{"ID": item["ID"], "Trial": item["Trial"]} for item in items]
+
     def put_item(self, item: Schema) -> None:
         """Put item to DynamoDB.
 
@@ -169,3 +257,62 @@ class DynamoDB:
                 break
 
         return items
+
+    def get_items_in_ranges(self, queries: list[RangeQuery]) -> list[list[dict[str, Any]]]:
+        """Run range queries concurrently.
+
+        The queries are run with the low-level client, which can be shared between threads unlike the table resource.
+
+        Args:
+            queries (list[RangeQuery]): The queries.
+
+        Returns:
+            list[list[dict[str, Any]]]: The items of each query, in the order of the queries.
+        """
+        if len(queries) == 0:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(queries), MAX_QUERY_WORKERS)) as executor:
+            return list(executor.map(self.__query_range, queries))
+
+    def __query_range(self, query: RangeQuery) -> list[dict[str, Any]]:
+        """Get items between least_trial and greatest_trial with the low-level client.
+
+        Args:
+            query (RangeQuery): The query.
+
+        Returns:
+            list[dict[str, Any]]: The items.
+        """
+        items: list[dict[str, Any]] = []
+        query_kwargs: dict[str, Any] = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": "#id = :id AND #trial BETWEEN :least AND :greatest",
+            "ExpressionAttributeNames": {"#id": "ID", "#trial": "Trial"},
+            "ExpressionAttributeValues": {
+                ":id": {"S": query["partition_key"]},
+                ":least": {"S": query["least_trial"]},
+                ":greatest": {"S": query["greatest_trial"]},
+            },
+        }
+        if query["attributes"]:
+            query_kwargs["ProjectionExpression"] = ",".join([f"#attr{i}" for i in range(len(query["attributes"]))])
+            query_kwargs["ExpressionAttributeNames"].update(
+                {f"#attr{i}": attr for i, attr in enumerate(query["attributes"])},
+            )
+
+        while True:
+            response = self.client.query(**query_kwargs)
+
+            # Append fetched items
+            items.extend(
+                {key: self.deserializer.deserialize(value) for key, value in item.items()}
+                for item in response.get("Items", [])
+            )
+
+            # Check if there are more items to fetch
+            last_evaluated_key = response.get("LastEvaluatedKey")
+            if not last_evaluated_key:
+                break
+            query_kwargs["ExclusiveStartKey"] = last_evaluated_key
+
+        return items
@@ -2,23 +2,39 @@
 
 import json
 import logging
-from threading import Thread
-from time import sleep, time
+from collections import deque
+from collections.abc import Callable
+from heapq import heappop, heappush
+from threading import Condition, Thread
+from time import monotonic, time
 from traceback import format_exc
-from typing import TypedDict
+from typing import TYPE_CHECKING, TypedDict
 
 import boto3
 import botocore
 import botocore.exceptions
 
+if TYPE_CHECKING:
+    from mypy_boto3_sqs import SQSClient
+
 LOGGER = logging.getLogger(__name__)
 
+VISIBILITY_MARGIN = 8  # Seconds before the visibility timeout expires to extend it
+MAX_EXTEND_BACKOFF = 4  # The maximum seconds to wait before retrying a failed extension, less than VISIBILITY_MARGIN
+MAX_VISIBILITY_TIMEOUT = 43200  # The maximum visibility timeout allowed by SQS (12 hours)
+MAX_BATCH_ENTRIES = 10  # The maximum number of entries in a batch request of SQS
+ACK_FLUSH_INTERVAL = 1.0  # Seconds to hold the processed messages before deleting them
+MAX_DELETE_ATTEMPTS = 3  # The number of attempts to delete a message
+LONG_POLL_SECONDS = 20  # The maximum wait time of a receive request allowed by SQS
+RETRY_VISIBILITY_TIMEOUT = 30  # Seconds before the unprocessed messages of a failed job are received again
+
 
 class Message(TypedDict):
     """The message from SQS."""
 
     receipt_handle: str
     body: str
+    received_at: float  # The time when the message is received (time.time())
 
 
 class SQSOptions(TypedDict):
@@ -48,8 +64,293 @@ class ScoreMessage(TypedDict):
     trial_no: str
 
 
+class VisibilityManager:
+    """Extend the visibility timeout of any number of messages in flight.
+
+    The receipt handles are kept in a heap ordered by the time their visibility timeout has to be extended.
+    The thread sleeps until the earliest deadline and extends all the messages due with ChangeMessageVisibilityBatch,
+    doubling the visibility timeout of each message every time.
+    The thread survives any error of a request, retrying the messages with a backoff of 1 second doubled for each
+    consecutive failure, up to MAX_EXTEND_BACKOFF seconds.
+    """
+
+    def __init__(self, client: "SQSClient", queue_url: str) -> None:
+        """Initialize the manager.
+
+        Args:
+            client (SQSClient): The SQS client.
+            queue_url (str): The URL of the queue.
+        """
+        self.client = client
+        self.queue_url = queue_url
+        self.condition = Condition()
+        self.deadlines: list[tuple[float, str]] = []  # (time to extend (monotonic), receipt handle)
+        self.timeouts: dict[str, int] = {}  # receipt handle -> current visibility timeout
+        self.failures = 0  # the number of consecutive failed requests
+
+    def start(self) -> None:
+        """Start the thread that extends the visibility timeouts."""
+        # Set the thread as a daemon. When the main thread exits, the daemon thread will exit.
+        thread = Thread(target=self.run, daemon=True)
+        thread.start()
+
+    def track(self, receipt_handles: list[str]) -> None:
+        """Start extending the visibility timeout of the messages.
+
+        Args:
+            receipt_handles (list[str]): The receipt handles of the messages received.
+        """
+        now = monotonic()
+        with self.condition:
+            for receipt_handle in receipt_handles:
+                self.timeouts[receipt_handle] = VISIBILITY_MARGIN
+                heappush(self.deadlines, (now, receipt_handle))  # extend as soon as received
+            self.condition.notify()
+
+    def untrack(self, receipt_handle: str) -> bool:
+        """Stop extending the visibility timeout of the message.
+
+        Args:
+            receipt_handle (str): The receipt handle of the message.
+
+        Returns:
+            bool: True if the message was tracked, False otherwise.
+        """
+        with self.condition:
+            # the entry in the heap is skipped when it is due
+            return self.timeouts.pop(receipt_handle, None) is not None
+
+    def run(self) -> None:
+        """Extend the visibility timeouts as they become due."""
+        while True:
+            due = self.wait_for_due()
+            for i in range(0, len(due), MAX_BATCH_ENTRIES):
+                try:
+                    self.extend(due[i : i + MAX_BATCH_ENTRIES])
+                except Exception:  # e.g. a BotoCoreError on a network failure
+                    LOGGER.exception("Failed to extend the visibility timeouts. They are retried.")
+                    self.retry(due[i : i + MAX_BATCH_ENTRIES])
+
+    def retry(self, due: list[tuple[str, int]]) -> None:
+        """Extend the visibility timeouts of the messages again after the backoff of the failed requests.
+
+        Args:
+            due (list[tuple[str, int]]): The receipt handles and the current visibility timeouts of the messages.
+        """
+        with self.condition:
+            self.failures += 1
+            deadline = monotonic() + min(2 ** (self.failures - 1), MAX_EXTEND_BACKOFF)
+            for receipt_handle, _ in due:
+                if receipt_handle in self.timeouts:  # retried with the same visibility timeout
+                    heappush(self.deadlines, (deadline, receipt_handle))
+
+    def wait_for_due(self) -> list[tuple[str, int]]:
+        """Wait until the visibility timeout of some messages has to be extended.
+
+        Returns:
+            list[tuple[str, int]]: The receipt handles and the current visibility timeouts of the messages due.
+        """
+        with self.condition:
+            while True:
+                now = monotonic()
+                due: list[tuple[str, int]] = []
+                while self.deadlines and self.deadlines[0][0] <= now:
+                    _, receipt_handle = heappop(self.deadlines)
+                    if receipt_handle in self.timeouts:
+                        due.append((receipt_handle, self.timeouts[receipt_handle]))
+                if due:
+                    return due
+                self.condition.wait(self.deadlines[0][0] - now if self.deadlines else None)
+
+    def extend(self, due: list[tuple[str, int]]) -> None:
+        """Extend the visibility timeouts of up to 10 messages.
+
+        The error of the request is raised, and the messages are retried by run.
+
+        Args:
+            due (list[tuple[str, int]]): The receipt handles and the current visibility timeouts of the messages.
+        """
+        new_timeouts = {str(i): min(timeout * 2, MAX_VISIBILITY_TIMEOUT) for i, (_, timeout) in enumerate(due)}
+        now = monotonic()
+        response = self.client.change_message_visibility_batch(
+            QueueUrl=self.queue_url,
+            Entries=[
+                {"Id": str(i), "ReceiptHandle": receipt_handle, "VisibilityTimeout": new_timeouts[str(i)]}
+                for i, (receipt_handle, _) in enumerate(due)
+            ],
+        )
+
+        with self.condition:
+            self.failures = 0
+            for failed in response.get("Failed", []):
+                LOGGER.warning("Failed to extend the visibility timeout: %s", failed.get("Message", failed["Code"]))
+                receipt_handle = due[int(failed["Id"])][0]
+                if failed["SenderFault"]:  # e.g. the receipt handle is invalid because the message has been deleted
+                    self.timeouts.pop(receipt_handle, None)
+                elif receipt_handle in self.timeouts:  # retry soon with the same visibility timeout
+                    heappush(self.deadlines, (now + 1, receipt_handle))
+
+            for successful in response.get("Successful", []):
+                receipt_handle = due[int(successful["Id"])][0]
+                if receipt_handle in self.timeouts:
+                    self.timeouts[receipt_handle] = new_timeouts[successful["Id"]]
+                    heappush(self.deadlines, (now + new_timeouts[successful["Id"]] - VISIBILITY_MARGIN, receipt_handle))
+
+
+class AckCollector:
+    """Collect the receipt handles of the processed messages and delete them with DeleteMessageBatch.
+
+    The messages are deleted when 10 of them are collected, when the oldest one has waited for ACK_FLUSH_INTERVAL
+    seconds, or when the collector is closed. The messages that fail to be deleted are retried up to
+    MAX_DELETE_ATTEMPTS times. The visibility timeout of a message is extended until it is deleted.
+    """
+
+    def __init__(self, client: "SQSClient", queue_url: str, visibility: VisibilityManager) -> None:
+        """Initialize the collector.
+
+        Args:
+            client (SQSClient): The SQS client.
+            queue_url (str): The URL of the queue.
+            visibility (VisibilityManager): The manager extending the visibility timeout of the messages.
+        """
+        self.client = client
+        self.queue_url = queue_url
+        self.visibility = visibility
+        self.condition = Condition()
+        self.pending: list[tuple[str, int]] = []  # (receipt handle, number of failed attempts)
+        self.deleting: set[str] = set()  # The receipt handles added and not yet deleted or given up
+        self.oldest: float | None = None  # The time the oldest pending message was added (monotonic)
+        self.closed = False
+
+        # Set the thread as a daemon. When the main thread exits, the daemon thread will exit.
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def add(self, receipt_handle: str) -> None:
+        """Queue a processed message to be deleted.
+
+        Args:
+            receipt_handle (str): The receipt handle of the message.
+        """
+        with self.condition:
+            if self.oldest is None:
+                self.oldest = monotonic()
+            self.pending.append((receipt_handle, 0))
+            self.deleting.add(receipt_handle)
+            self.condition.notify()
+
+    def is_deleting(self, receipt_handle: str) -> bool:
+        """Check if the message has been queued to be deleted and is not deleted yet.
+
+        Args:
+            receipt_handle (str): The receipt handle of the message.
+
+        Returns:
+            bool: True if the message is being deleted, False otherwise.
+        """
+        with self.condition:
+            return receipt_handle in self.deleting
+
+    def run(self) -> None:
+        """Delete the pending messages when a batch is full or the flush interval has passed."""
+        while True:
+            with self.condition:
+                while not self.closed and not self.is_due():
+                    self.condition.wait(
+                        None if self.oldest is None else self.oldest + ACK_FLUSH_INTERVAL - monotonic(),
+                    )
+                if self.closed:
+                    return
+                batch = self.take(MAX_BATCH_ENTRIES)
+            self.delete(batch)
+
+    def close(self) -> None:
+        """Delete all the pending messages and stop the thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+        while True:
+            with self.condition:
+                batch = self.take(MAX_BATCH_ENTRIES)
+            if not batch:
+                break
+            self.delete(batch)
+
+    def is_due(self) -> bool:
+        """Check if the pending messages have to be deleted now. The lock must be held.
+
+        Returns:
+            bool: True if a batch is full or the oldest message has waited for the flush interval.
+        """
+        return len(self.pending) >= MAX_BATCH_ENTRIES or (
+            self.oldest is not None and monotonic() - self.oldest >= ACK_FLUSH_INTERVAL
+        )
+
+    def take(self, n: int) -> list[tuple[str, int]]:
+        """Take up to n pending messages. The lock must be held.
+
+        Args:
+            n (int): The maximum number of messages to take.
+
+        Returns:
+            list[tuple[str, int]]: The receipt handles and the number of failed attempts of the messages.
+        """
+        batch, self.pending = self.pending[:n], self.pending[n:]
+        self.oldest = monotonic() if self.pending else None
+        return batch
+
+    def delete(self, batch: list[tuple[str, int]]) -> None:
+        """Delete up to 10 messages, queueing the failed ones again.
+
+        Args:
+            batch (list[tuple[str, int]]): The receipt handles and the number of failed attempts of the messages.
+        """
+        if not batch:
+            return
+        try:
+            response = self.client.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": receipt_handle} for i, (receipt_handle, _) in enumerate(batch)
+                ],
+            )
+        except botocore.exceptions.ClientError:
+            LOGGER.warning(format_exc())
+            failed_ids = {str(i) for i in range(len(batch))}
+        else:
+            failed_ids = set()
+            for failed in response.get("Failed", []):
+                LOGGER.warning("Failed to delete the message: %s", failed.get("Message", failed["Code"]))
+                if not failed["SenderFault"]:  # The request is not retried if the receipt handle is invalid.
+                    failed_ids.add(failed["Id"])
+
+        retries: list[tuple[str, int]] = []
+        for i, (receipt_handle, attempts) in enumerate(batch):
+            if str(i) in failed_ids and attempts + 1 < MAX_DELETE_ATTEMPTS:
+                retries.append((receipt_handle, attempts + 1))
+            else:
+                self.visibility.untrack(receipt_handle)
+                with self.condition:
+                    self.deleting.discard(receipt_handle)
+        if retries:
+            with self.condition:
+                if self.oldest is None:
+                    self.oldest = monotonic()
+                self.pending.extend(retries)
+
+
 class RunnerSQS:
-    """The class to communicate with Amazon SQS."""
+    """The class to communicate with Amazon SQS.
+
+    Up to 10 messages are received at once and held in a local buffer. The callers limit the number of messages to
+    what they can process soon, since the buffered messages can not be received by the other processes meanwhile.
+    The messages that can not be parsed are
+    deleted when they are received, so the buffered messages can always be parsed.
+    While the queue is idle, the receive requests wait for messages for up to 20 seconds (long polling).
+    While messages keep arriving, the receive requests return immediately.
+    The visibility timeout of every message in flight (buffered or being processed) is extended until it is deleted.
+    """
 
     def __init__(self, options: SQSOptions) -> None:
         """Initialize the class.
@@ -65,9 +366,15 @@ class RunnerSQS:
         )  # Create an SQS client
 
         self.queue_url = options["queue_url"]
-        self.receipt_handle: str | None = (
-            None  # Receipt handle of the message (Used to delete the message or extend the visibility timeout)
-        )
+        self.receipt_handle: str | None = None  # Receipt handle of the message returned last
+        self.buffer: deque[Message] = deque()  # Messages received but not yet returned
+        self.visibility = VisibilityManager(self.sqs, self.queue_url)  # Extends the messages in flight
+        self.acks = AckCollector(self.sqs, self.queue_url, self.visibility)  # Deletes the processed messages
+
+        self.idle = True  # Whether the last receive request returned no message
+        self.state_since = monotonic()  # The time the queue became idle or busy
+        self.idle_seconds = 0.0  # Total time the queue has been idle
+        self.busy_seconds = 0.0  # Total time the queue has been busy
 
     def check_accessible(self) -> None:
         """Check if the queue is accessible."""
@@ -86,113 +393,227 @@ class RunnerSQS:
 
     def wake_up_visibility_extender(self) -> None:
         """Wake up the visibility extender."""
-        # Launch a thread to extend the queue re-visibility.
-        self.visibility_timeout_extender: Thread = Thread(
-            target=self.extend_visibility_timeout,
-            args=(),
-        )
-
-        # Set the thread as a daemon. When the main thread exits, the daemon thread will exit.
-        self.visibility_timeout_extender.setDaemon(True)
+        self.visibility.start()
 
-        self.visibility_timeout_extender.start()
-        self.start: float | None = None  # The time when the message is received
+    def delete_message_from_queue(self, receipt_handle: str | None = None) -> None:
+        """Delete the message from SQS. The message is deleted in a batch with the others shortly after.
 
-    def delete_message_from_queue(self) -> None:
-        """Delete the message from SQS."""
-        if self.receipt_handle is None:
+        Args:
+            receipt_handle (str | None): The receipt handle of the message. Defaults to the message returned last.
+        """
+        if receipt_handle is None:
+            receipt_handle = self.receipt_handle
+        if receipt_handle is None:
             msg = "No message handled."
             raise RuntimeError(msg)
 
-        self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=self.receipt_handle)
+        self.acks.add(receipt_handle)
 
-        self.receipt_handle = None
-        self.start = None
+        if receipt_handle == self.receipt_handle:
+            self.receipt_handle = None
 
-    def receive_sqs_message(self) -> Message | None:
-        """Receive the message from SQS.
+    def fill_buffer(self, wait_time_seconds: int, max_messages: int) -> int:
+        """Receive messages from SQS into the buffer.
+
+        Args:
+            wait_time_seconds (int): The time to wait for a message to arrive.
+            max_messages (int): The maximum number of messages to receive. It is clamped to between 1 and 10.
 
         Returns:
-            Message | None: The message from SQS.
+            int: The number of messages received.
         """
-        self.receipt_handle = None
-
-        self.start = time()
-
         response = self.sqs.receive_message(
             QueueUrl=self.queue_url,
-            MaxNumberOfMessages=1,
-            WaitTimeSeconds=10,
+            MaxNumberOfMessages=min(max(max_messages, 1), MAX_BATCH_ENTRIES),
+            WaitTimeSeconds=wait_time_seconds,
         )
 
+        received_at = time()
         messages = response.get("Messages", [])
+        self.update_state(idle=len(messages) == 0)
+        self.visibility.track([message["ReceiptHandle"] for message in messages])
+        for message in messages:
+            received: Message = {
+                "receipt_handle": message["ReceiptHandle"],
+                "body": message["Body"],
+                "received_at": received_at,
+            }
+            try:
+                self.parse_message(received)
+            except (ValueError, KeyError, TypeError):
+                # The message can never be processed, so it is deleted instead of being received again and again.
+                LOGGER.exception("Failed to parse the message. The message is deleted: %s", message["Body"])
+                self.acks.add(message["ReceiptHandle"])
+                continue
+            self.buffer.append(received)
+
+        return len(messages)
+
+    def parse_message(self, message: Message) -> EvaluationMessage | ScoreMessage:
+        """Parse the message from SQS.
+
+        Args:
+            message (Message): The message from SQS.
+
+        Raises:
+            NotImplementedError: The message is parsed by the subclasses.
+
+        Returns:
+            EvaluationMessage | ScoreMessage: The parsed message.
+        """
+        raise NotImplementedError
+
+    def update_state(self, idle: bool) -> None:
+        """Record whether the queue is idle or busy, and report the time spent in the previous state.
+
+        Args:
+            idle (bool): Whether the last receive request returned no message.
+        """
+        if idle == self.idle:
+            return
+        now = monotonic()
+        elapsed = now - self.state_since
+        if self.idle:
+            self.idle_seconds += elapsed
+            LOGGER.info("Messages arrived after the queue was idle for %.1f seconds.", elapsed)
+        else:
+            self.busy_seconds += elapsed
+            LOGGER.info("The queue was drained after being busy for %.1f seconds.", elapsed)
+        self.idle = idle
+        self.state_since = now
+
+    def receive_sqs_message(self, wait_time_seconds: int | None = None, max_messages: int = 1) -> Message | None:
+        """Receive the message from the buffer, receiving from SQS if the buffer is empty.
+
+        Args:
+            wait_time_seconds (int | None): The time to wait for a message to arrive.
+                Defaults to 20 seconds while the queue is idle, and 0 seconds while it is busy.
+            max_messages (int): The maximum number of messages to receive into the buffer if it is empty,
+                e.g. the number of messages that the idle workers can process.
+
+        Returns:
+            Message | None: The message from SQS.
+        """
+        self.receipt_handle = None
 
-        if not messages:  # No message in the queue
+        if wait_time_seconds is None:
+            wait_time_seconds = LONG_POLL_SECONDS if self.idle else 0
+
+        if not self.buffer and self.fill_buffer(wait_time_seconds, max_messages) == 0:  # No message in the queue
             return None
 
-        message: Message = {"receipt_handle": messages[0]["ReceiptHandle"], "body": messages[0]["Body"]}
-        self.receipt_handle = messages[0]["ReceiptHandle"]
+        message = self.buffer.popleft()
+        self.receipt_handle = message["receipt_handle"]
 
         return message
 
-    def extend_visibility_timeout(self) -> None:
-        """Extend the visibility timeout of the message."""
-        current_visibility_timeout = 8
+    def take_buffered(self, predicate: Callable[[Message], bool], limit: int) -> list[Message]:
+        """Take the buffered messages that satisfy the predicate out of the buffer, keeping the order.
 
-        while True:
-            if self.receipt_handle is None:
-                current_visibility_timeout = 8
-                sleep(1)
-                continue
+        Args:
+            predicate (Callable[[Message], bool]): The condition of the messages to take.
+            limit (int): The maximum number of messages to take.
+
+        Returns:
+            list[Message]: The messages taken.
+        """
+        taken: list[Message] = []
+        kept: deque[Message] = deque()
+        for message in self.buffer:
+            if len(taken) < limit and predicate(message):
+                taken.append(message)
+            else:
+                kept.append(message)
+        self.buffer = kept
+        return taken
+
+    def close(self) -> None:
+        """Release the buffered messages and delete the processed messages before exiting."""
+        self.release_buffered()
+        self.acks.close()
+
+        elapsed = monotonic() - self.state_since  # the time spent in the current state
+        LOGGER.info(
+            "The queue was idle for %.1f seconds and busy for %.1f seconds.",
+            self.idle_seconds + (elapsed if self.idle else 0),
+            self.busy_seconds + (0 if self.idle else elapsed),
+        )
 
-            if self.start is None:
-                msg = "Message is handled, but start is None."
-                raise ValueError(msg)
+    def release_buffered(self) -> None:
+        """Make the buffered messages visible again so that other processes can receive them."""
+        while self.buffer:
+            self.release_message(self.buffer.popleft()["receipt_handle"])
 
-            current_time = time()
+    def release_unprocessed(self, receipt_handles: list[str]) -> None:
+        """Release the messages of a job that were neither deleted nor saved as failed, e.g. after an error.
 
-            if current_time - self.start < current_visibility_timeout - 8:
-                sleep(1)
-                continue
+        The messages are received again after RETRY_VISIBILITY_TIMEOUT seconds, so that a transient failure does not
+        make the runners receive and fail them again and again.
 
-            try:
-                # To prevent the main thread from changing receipt_handle into None during the except block,
-                # causing error handling to fail, store self.receipt_handle in a temporary variable.
-                current_receipt_handle = self.receipt_handle
+        Args:
+            receipt_handles (list[str]): The receipt handles of the messages of the job.
+        """
+        n_released = sum(self.release_message(handle, RETRY_VISIBILITY_TIMEOUT) for handle in receipt_handles)
+        if n_released > 0:
+            LOGGER.warning(
+                "%d messages were not processed. They are received again in %d seconds.",
+                n_released,
+                RETRY_VISIBILITY_TIMEOUT,
+            )
 
-                self.sqs.change_message_visibility(
-                    QueueUrl=self.queue_url,
-                    ReceiptHandle=current_receipt_handle,
-                    VisibilityTimeout=current_visibility_timeout * 2,
-                )
+    def release_message(self, receipt_handle: str, visibility_timeout: int = 0) -> bool:
+        """Make a received message visible again so that other processes can receive it.
 
-                current_visibility_timeout *= 2
+        Nothing is done if the message has been deleted, is being deleted, or has already been released,
+        so the messages of an abandoned job can be released without checking which of them were processed.
 
-            except botocore.exceptions.ClientError:
-                LOGGER.warning(format_exc())
+        Args:
+            receipt_handle (str): The receipt handle of the message.
+            visibility_timeout (int): The seconds before the message becomes visible again.
 
-            except botocore.exceptions.ParamValidationError as e:
-                if current_receipt_handle is None:
-                    LOGGER.warning("Can not extend visibility since no message handled.")
-                else:
-                    raise botocore.exceptions.ParamValidationError from e
-            finally:
-                sleep(1)
+        Returns:
+            bool: True if the message is released, False if it has already been processed or released.
+        """
+        if self.acks.is_deleting(receipt_handle) or not self.visibility.untrack(receipt_handle):
+            return False
+        try:
+            self.sqs.change_message_visibility(
+                QueueUrl=self.queue_url,
+                ReceiptHandle=receipt_handle,
+                VisibilityTimeout=visibility_timeout,
+            )
+        except botocore.exceptions.ClientError:
+            LOGGER.warning(format_exc())
+        return True
 
 
 class EvaluatorSQS(RunnerSQS):
     """The class to communicate with Amazon SQS for evaluation."""
 
-    def get_message_from_queue(self) -> EvaluationMessage | None:
+    def get_message_from_queue(self, wait_time_seconds: int | None = None) -> EvaluationMessage | None:
         """Get the message from SQS.
 
+        Args:
+            wait_time_seconds (int | None): The time to wait for a message to arrive. Defaults to adaptive polling.
+
         Returns:
             EvaluationMessage | None: The message from SQS for evaluation.
         """
-        message = self.receive_sqs_message()
+        message = self.receive_sqs_message(wait_time_seconds)
         if message is None:  # No message in the queue
             return None
 
+        return self.parse_message(message)
+
+    def parse_message(self, message: Message) -> EvaluationMessage:
+        """Parse the message from SQS.
+
+        Args:
+            message (Message): The message from SQS.
+
+        Returns:
+            EvaluationMessage: The message from SQS for evaluation.
+        """
         body = json.loads(message["body"])
 
         evaluation_message: EvaluationMessage = {
@@ -208,17 +629,31 @@ class EvaluatorSQS(RunnerSQS):
 class ScorerSQS(RunnerSQS):
     """The class to communicate with Amazon SQS for scoring."""
 
-    def get_message_from_queue(self) -> ScoreMessage | None:
+    def get_message_from_queue(self, wait_time_seconds: int | None = None) -> ScoreMessage | None:
         """Get the message from SQS.
 
+        Args:
+            wait_time_seconds (int | None): The time to wait for a message to arrive. Defaults to adaptive polling.
+
         Returns:
             ScoreMessage | None: The message from SQS for scoring.
         """
-        message = self.receive_sqs_message()
+        message = self.receive_sqs_message(wait_time_seconds)
 
         if message is None:  # No message in the queue
             return None
 
+        return self.parse_message(message)
+
+    def parse_message(self, message: Message) -> ScoreMessage:
+        """Parse the message from SQS.
+
+        Args:
+            message (Message): The message from SQS.
+
+        Returns:
+            ScoreMessage: The message from SQS for scoring.
+        """
         body = json.loads(message["body"])
 
         score_message: ScoreMessage = {
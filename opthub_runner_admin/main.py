@@ -11,6 +11,8 @@ import click
 import yaml
 from botocore.exceptions import ClientError
 
+from opthub_runner_admin.lib.docker_image import IMAGE_RESOLVER
+from opthub_runner_admin.models.match import fetch_match_by_id
 from opthub_runner_admin.utils.credentials.credentials import Credentials
 from opthub_runner_admin.utils.docker import check_docker
 from opthub_runner_admin.utils.process import create_flag_file
@@ -18,6 +20,8 @@ from opthub_runner_admin.utils.process import create_flag_file
 if TYPE_CHECKING:
     from opthub_runner_admin.args import Args
 
+LOGGER = logging.getLogger(__name__)
+
 
 def signal_handler(sig_num: int, frame: FrameType | None) -> None:  # noqa: ARG001
     """Signal handler."""
@@ -96,6 +100,29 @@ def auth(process_name: str, username: str, password: str, dev: bool) -> None:
         sys.exit(1)
 
 
+def prewarm_images(process_name: str, args: "Args") -> None:
+    """Pull the Docker images used by the configured matches before consuming the queue.
+
+    The Evaluator pulls the problem images and the Scorer pulls the indicator images.
+    The matches that can not be fetched are skipped.
+
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments.
+    """
+    images: list[str] = []
+    for prewarm_match in args["prewarm_matches"]:
+        match_id = prewarm_match if prewarm_match.startswith("Match#") else "Match#" + prewarm_match
+        try:
+            match = fetch_match_by_id(process_name, match_id, args["dev"])
+        except Exception:
+            LOGGER.exception("Failed to fetch match %s to pre-warm its images.", match_id)
+            continue
+        images.append(match["problem_docker_image" if args["mode"] == "evaluator" else "indicator_docker_image"])
+
+    IMAGE_RESOLVER.prewarm(images)
+
+
 signal.signal(signal.SIGTERM, signal_handler)
 
 
@@ -140,7 +167,20 @@ def run(
         "interval": config_params["interval"],
         "timeout": config_params["timeout"],
         "num": config_params["num"],
+        "concurrency": config_params.get("concurrency", 1),
+        "persistent": config_params.get("persistent", False),
+        "persistent_idle_timeout": config_params.get("persistent_idle_timeout", 600),
+        "persistent_max_uses": config_params.get("persistent_max_uses", 1000),
+        "indicator_delta": config_params.get("indicator_delta", False),
+        "evaluation_batch_size": config_params.get("evaluation_batch_size", 1),
+        "batch_wait": config_params.get("batch_wait", 1.0),
+        "score_batch_size": config_params.get("score_batch_size", 1),
+        "reorder_wait": config_params.get("reorder_wait", 30.0),
+        "cache_max_trials": config_params.get("cache_max_trials", 1000000),
+        "cache_format": config_params.get("cache_format", "jsonl"),
         "rm": config_params["rm"],
+        "image_pull_ttl": config_params.get("image_pull_ttl", 300.0),
+        "prewarm_matches": config_params.get("prewarm_matches") or [],
         "evaluator_queue_url": config_params["evaluator_queue_url"],
         "scorer_queue_url": config_params["scorer_queue_url"],
         "access_key_id": config_params["access_key_id"],
@@ -152,7 +192,8 @@ def run(
         "dev": dev,
     }
 
-    check_docker()
+    check_docker(args["concurrency"])
+    IMAGE_RESOLVER.configure(args["image_pull_ttl"])
 
     auth(process_name, username, password, dev)
 
@@ -160,6 +201,8 @@ def run(
 
     create_flag_file(process_name, config_params["force"])
 
+    prewarm_images(process_name, args)
+
     if args["mode"] == "evaluator":
         from opthub_runner_admin.evaluator.main import evaluate
 
@@ -197,20 +197,10 @@ def is_evaluation_exists(
         bool: True if the evaluation exists, False otherwise.
     """
     partition_key = f"Evaluations#Match#{match_uuid}#{participant_id}"
-    if dynamodb.is_exist(
-        {
-            "ID": partition_key,
-            "Trial": f"Success#{trial_no}",
-        },
-    ):
-        return True
-
-    if dynamodb.is_exist(
-        {
-            "ID": partition_key,
-            "Trial": f"Failed#{trial_no}",
-        },
-    ):
-        return True
-
-    return False
+    existing_keys = dynamodb.get_existing_keys(
+        [
+            {"ID": partition_key, "Trial": f"Success#{trial_no}"},
+            {"ID": partition_key, "Trial": f"Failed#{trial_no}"},
+        ],
+    )
+    return len(existing_keys) > 0
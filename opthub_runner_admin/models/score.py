@@ -5,6 +5,7 @@ from typing import TYPE_CHECKING, TypedDict
 
 from opthub_runner_admin.lib.dynamodb import DynamoDB
 from opthub_runner_admin.utils.converter import number_to_decimal
+from opthub_runner_admin.utils.zfill import zfill
 
 if TYPE_CHECKING:
     from opthub_runner_admin.models.schema import FailedScoreSchema, SuccessScoreSchema
@@ -129,20 +130,43 @@ def is_score_exists(
         bool: True if the score exists, False otherwise.
     """
     partition_key = f"Scores#Match#{match_uuid}#{participant_id}"
-    if dynamodb.is_exist(
-        {
-            "ID": partition_key,
-            "Trial": "Success#" + trial_no,
-        },
-    ):
-        return True
+    existing_keys = dynamodb.get_existing_keys(
+        [
+            {"ID": partition_key, "Trial": f"Success#{trial_no}"},
+            {"ID": partition_key, "Trial": f"Failed#{trial_no}"},
+        ],
+    )
+    return len(existing_keys) > 0
+
+
+def is_previous_trial_settled(
+    dynamodb: DynamoDB,
+    match_uuid: str,
+    participant_id: str,
+    trial_no: str,
+) -> bool:
+    """Check if the trial before trial_no has been scored, or will never be scored because its evaluation failed.
 
-    if dynamodb.is_exist(
-        {
-            "ID": partition_key,
-            "Trial": "Failed#" + trial_no,
-        },
-    ):
+    Args:
+        dynamodb (DynamoDB): Dynamo DB Wrapper object to communicate with Dynamo DB.
+        match_uuid (str): MatchID.
+        participant_id (str): ParticipantID.
+        trial_no (str): The zero-filled trial number.
+
+    Returns:
+        bool: True if the previous trial is settled or trial_no is the first trial, False otherwise.
+    """
+    if int(trial_no) <= 1:
         return True
 
-    return False
+    previous_trial_no = zfill(int(trial_no) - 1, len(trial_no))
+    score_key = f"Scores#Match#{match_uuid}#{participant_id}"
+    evaluation_key = f"Evaluations#Match#{match_uuid}#{participant_id}"
+    existing_keys = dynamodb.get_existing_keys(
+        [
+            {"ID": score_key, "Trial": f"Success#{previous_trial_no}"},
+            {"ID": score_key, "Trial": f"Failed#{previous_trial_no}"},
+            {"ID": evaluation_key, "Trial": f"Failed#{previous_trial_no}"},
+        ],
+    )
+    return len(existing_keys) > 0
@@ -44,3 +44,57 @@ def fetch_solution_by_primary_key(
     return {
         "variable": decimal_to_float(solution["Variable"]),
     }
+
+
+class SolutionToEvaluate(TypedDict):
+    """The solution together with whether it has already been evaluated.
+
+    solution (Solution | None): The solution, or None if it does not exist.
+    evaluated (bool): True if the success or failed evaluation of the solution exists.
+    """
+
+    solution: Solution | None
+    evaluated: bool
+
+
+def fetch_solutions_to_evaluate(
+    dynamodb: DynamoDB,
+    match_id: str,
+    trials: list[tuple[str, str]],
+) -> list[SolutionToEvaluate]:
+    """Fetch the solutions and their evaluation markers in a single BatchGetItem.
+
+    Args:
+        dynamodb (DynamoDB): The DynamoDB instance.
+        match_id (str): The match ID.
+        trials (list[tuple[str, str]]): The participant IDs and the zero-filled trial numbers of the solutions.
+
+    Returns:
+        list[SolutionToEvaluate]: The solutions, in the order of the trials. A trial given more than once gets the same
+            solution each time.
+    """
+    primary_keys: list[PrimaryKey] = []
+    for participant_id, trial_no in dict.fromkeys(trials):  # BatchGetItem rejects the duplicate keys
+        primary_keys.append({"ID": f"Solutions#{match_id}#{participant_id}", "Trial": trial_no})
+        primary_keys.append({"ID": f"Evaluations#{match_id}#{participant_id}", "Trial": f"Success#{trial_no}"})
+        primary_keys.append({"ID": f"Evaluations#{match_id}#{participant_id}", "Trial": f"Failed#{trial_no}"})
+
+    items = {
+        (item["ID"], item["Trial"]): item
+        for item in dynamodb.batch_get_items(primary_keys, ["ID", "Trial", "Variable"])
+    }
+
+    solutions: list[SolutionToEvaluate] = []
+    for participant_id, trial_no in trials:
+        solution = cast(SolutionSchema | None, items.get((f"Solutions#{match_id}#{participant_id}", trial_no)))
+        evaluations = f"Evaluations#{match_id}#{participant_id}"
+        solutions.append(
+            {
+                # Decimal can not be used for evaluation, so convert it to float.
+                "solution": {"variable": decimal_to_float(solution["Variable"])} if solution is not None else None,
+                "evaluated": (evaluations, f"Success#{trial_no}") in items
+                or (evaluations, f"Failed#{trial_no}") in items,
+            },
+        )
+
+    return solutions
@@ -1,11 +1,24 @@
 """The module provides a class to handle the cache file for the score calculation."""
 
 import json
+from bisect import bisect_right
+from collections import OrderedDict
 from pathlib import Path
+from threading import Lock, local
 from typing import TypedDict
 
+from opthub_runner_admin.scorer.cache_format import (
+    CacheFormat,
+    append_trial,
+    find_cache_file,
+    get_latest_trial_no,
+    read_tail,
+    truncate_after,
+)
 from opthub_runner_admin.utils.dir import get_opthub_runner_dir
 
+DEFAULT_MAX_TRIALS = 1000000  # The default maximum number of trials kept in memory
+
 
 class Trial(TypedDict):
     """The type of the trial. Conforming to Docker input by using snake case.
@@ -43,12 +56,36 @@ class CacheReadError(Exception):
 
 
 class Cache:
-    """The class to handle the cache file for the score calculation."""
+    """The class to handle the cache files for the score calculation.
 
-    def __init__(self) -> None:
-        """Initialize the cache class."""
-        self.__loaded_filename: str | None = None  # file name of the loaded cache
-        self.__values: list[Trial] | None = None  # values in the cache
+    The histories of recently used participants are kept in memory (least recently used first out), up to max_trials
+    trials in total. Appends are written through to the cache file. The loaded file is tracked per thread, so a
+    single instance can be shared by the scoring workers.
+    An existing cache file is read and appended in its own format. New cache files are created in cache_format.
+    The latest trial and the truncation are served by the index of the cache file when the history is not in memory.
+    The cache files may be appended by the other Scorer processes on the host, so the tail of a cache file that has
+    grown since it was read is read into memory before the history is used.
+    The histories are also kept serialized as JSON arrays, which grow by one encoded trial per append, so that the
+    history passed to the indicator is not encoded again for every trial.
+    """
+
+    def __init__(self, max_trials: int = DEFAULT_MAX_TRIALS, cache_format: CacheFormat = "jsonl") -> None:
+        """Initialize the cache class.
+
+        Args:
+            max_trials (int): The maximum number of trials kept in memory.
+            cache_format (CacheFormat): The format of new cache files.
+        """
+        self.__local = local()  # file name of the cache loaded by each thread
+        self.__lock = Lock()
+        self.__histories: OrderedDict[str, list[Trial]] = OrderedDict()  # values of the cache files in memory
+        self.__ends: dict[str, int] = {}  # the byte offsets of the cache files read into memory
+        self.__serialized: dict[str, bytearray] = {}  # the histories serialized as JSON arrays without the "]"
+        self.__n_trials = 0  # the number of trials in memory
+        self.__max_trials = max_trials
+        self.__cache_format = cache_format
+        self.hits = 0  # the number of loads served from memory
+        self.misses = 0  # the number of loads read from the cache file
 
         # Create a directory for the cache
         opthub_runner_admin_dir = get_opthub_runner_dir()
@@ -69,28 +106,100 @@ class Cache:
         Raises:
             ValueError: If no file is loaded, an error occurs.
         """
-        if self.__values is None or self.__loaded_filename is None:
-            msg = "No file loaded."
-            raise ValueError(msg)
+        filename = self.__get_loaded_filename()
 
-        try:
-            with Path.open(self.__get_cache_path(), "a") as file:
-                file.write(json.dumps(value) + "\n")
-            self.__values.append(value)
+        with self.__lock:
+            try:
+                offset, end = append_trial(self.__get_cache_path(), value)
+            except Exception as e:
+                raise CacheWriteError from e
 
-        except Exception as e:
-            raise CacheWriteError from e
+            history = self.__histories.get(filename)
+            if history is not None:
+                if offset == self.__ends[filename]:
+                    history.append(value)
+                    self.__n_trials += 1
+                    self.__ends[filename] = end
+                    self.__extend_serialized(filename, [value])
+                    self.__evict(keep=filename)
+                else:  # another process has appended to the cache file since it was read
+                    self.__get_history(filename)
 
-    def get_values(self) -> list[Trial]:
+    def get_values(self, up_to: str | None = None) -> list[Trial]:
         """Get the values in the cache.
 
+        Args:
+            up_to (str | None): The greatest trial number to get. If None, all the values are returned.
+
         Returns:
             list[Trial]: The values in the cache.
         """
-        if self.__values is None:
-            msg = "No file loaded."
-            raise ValueError(msg)
-        return self.__values
+        filename = self.__get_loaded_filename()
+        with self.__lock:
+            history = self.__get_history(filename)
+            if up_to is None:
+                return list(history)
+            return history[: bisect_right(history, int(up_to), key=lambda trial: int(trial["trial_no"]))]
+
+    def get_serialized_values(self, up_to: str | None = None) -> bytes:
+        """Get the values in the cache serialized as a JSON array, the same as json.dumps(get_values(up_to)).
+
+        Args:
+            up_to (str | None): The greatest trial number to get. If None, all the values are returned.
+
+        Returns:
+            bytes: The JSON array of the values, encoded in UTF-8.
+        """
+        filename = self.__get_loaded_filename()
+        with self.__lock:
+            history = self.__get_history(filename)
+            if up_to is not None:
+                n_values = bisect_right(history, int(up_to), key=lambda trial: int(trial["trial_no"]))
+                if n_values < len(history):
+                    return json.dumps(history[:n_values]).encode("utf-8")
+
+            serialized = self.__serialized.get(filename)
+            if serialized is None:
+                serialized = self.__serialized[filename] = bytearray(b"[")
+                self.__extend_serialized(filename, history)
+            return bytes(serialized) + b"]"
+
+    def get_latest_trial_no(self) -> int | None:
+        """Get the latest trial number in the cache.
+
+        Returns:
+            int | None: The latest trial number, or None if the cache is empty.
+        """
+        filename = self.__get_loaded_filename()
+        with self.__lock:
+            if filename in self.__histories:
+                history = self.__get_history(filename)
+                return int(history[-1]["trial_no"]) if len(history) > 0 else None
+            try:
+                path = self.__get_cache_path()
+                return get_latest_trial_no(path) if Path.exists(path) else None
+            except Exception as e:
+                raise CacheReadError from e
+
+    def truncate_after(self, trial_no: int) -> int:
+        """Remove the values after a trial number from the cache (e.g. to score the trials again).
+
+        Args:
+            trial_no (int): The greatest trial number to keep.
+
+        Returns:
+            int: The number of values removed.
+        """
+        filename = self.__get_loaded_filename()
+        with self.__lock:
+            try:
+                path = self.__get_cache_path()
+                n_removed = truncate_after(path, trial_no) if Path.exists(path) else 0
+            except Exception as e:
+                raise CacheWriteError from e
+
+            self.__forget(filename)  # read again on the next use
+            return n_removed
 
     def load(self, filename: str) -> None:
         """Load the cache file.
@@ -98,27 +207,122 @@ class Cache:
         Args:
             filename (str): The filename to load.
         """
-        if self.__loaded_filename is not None and filename == self.__loaded_filename:
-            return
+        self.__local.filename = filename
+        with self.__lock:
+            if filename in self.__histories:
+                self.hits += 1
+            self.__get_history(filename)
+
+    def clear(self) -> None:
+        """Clear the cache."""
+        if self.__loaded_filename() is not None and not Path.exists(self.__get_cache_path()):
+            Path.unlink(self.__get_cache_path())
+        filename = self.__loaded_filename()
+        if filename is not None:
+            with self.__lock:
+                self.__forget(filename)
+        self.__local.filename = None
 
-        self.__loaded_filename = filename
-        self.__values = []
+    def __get_history(self, filename: str) -> list[Trial]:
+        """Get the history in memory, reading the cache file if it is not in memory. The lock must be held.
 
+        Args:
+            filename (str): The filename of the cache.
+
+        Returns:
+            list[Trial]: The values of the cache file.
+        """
         try:
-            if not Path.exists(self.__get_cache_path()):
-                return
-            with Path.open(self.__get_cache_path(), "r") as file:
-                for line in file:
-                    self.__values.append(json.loads(line))
+            path = find_cache_file(self.__cache_dir_path, filename, self.__cache_format)
+            size = path.stat().st_size if Path.exists(path) else 0
+
+            history = self.__histories.get(filename)
+            if history is not None and size < self.__ends[filename]:  # truncated by another process
+                self.__forget(filename)
+                history = None
+            if history is not None:
+                self.__histories.move_to_end(filename)
+                if size > self.__ends[filename]:  # appended by another process
+                    trials, self.__ends[filename] = read_tail(path, self.__ends[filename])
+                    history.extend(trials)
+                    self.__extend_serialized(filename, trials)
+                    self.__n_trials += len(trials)
+                    self.__evict(keep=filename)
+                return history
+
+            self.misses += 1
+            history, end = read_tail(path) if size > 0 else ([], 0)
         except Exception as e:
             raise CacheReadError from e
 
-    def clear(self) -> None:
-        """Clear the cache."""
-        if self.__loaded_filename is not None and not Path.exists(self.__get_cache_path()):
-            Path.unlink(self.__get_cache_path())
-        self.__loaded_filename = None
-        self.__values = None
+        self.__histories[filename] = history
+        self.__ends[filename] = end
+        self.__n_trials += len(history)
+        self.__evict(keep=filename)
+        return history
+
+    def __forget(self, filename: str) -> None:
+        """Remove a history from memory. The lock must be held.
+
+        Args:
+            filename (str): The filename of the cache.
+        """
+        history = self.__histories.pop(filename, None)
+        if history is not None:
+            self.__n_trials -= len(history)
+        self.__ends.pop(filename, None)
+        self.__serialized.pop(filename, None)
+
+    def __extend_serialized(self, filename: str, trials: list[Trial]) -> None:
+        """Append trials to the serialized history, if it has been serialized. The lock must be held.
+
+        Args:
+            filename (str): The filename of the cache.
+            trials (list[Trial]): The trials to append.
+        """
+        serialized = self.__serialized.get(filename)
+        if serialized is None:
+            return
+        for trial in trials:
+            if len(serialized) > 1:
+                serialized += b", "
+            serialized += json.dumps(trial).encode("utf-8")
+
+    def __evict(self, keep: str) -> None:
+        """Evict the least recently used histories until the trials are within the limit. The lock must be held.
+
+        Args:
+            keep (str): The filename of the history not to evict.
+        """
+        for filename in list(self.__histories):
+            if self.__n_trials <= self.__max_trials:
+                break
+            if filename != keep:
+                self.__forget(filename)
+
+    def __loaded_filename(self) -> str | None:
+        """Get the filename of the cache loaded by the current thread.
+
+        Returns:
+            str | None: The filename, or None if no file is loaded.
+        """
+        filename: str | None = getattr(self.__local, "filename", None)
+        return filename
+
+    def __get_loaded_filename(self) -> str:
+        """Get the filename of the cache loaded by the current thread.
+
+        Returns:
+            str: The filename.
+
+        Raises:
+            ValueError: If no file is loaded, an error occurs.
+        """
+        filename = self.__loaded_filename()
+        if filename is None:
+            msg = "No file loaded."
+            raise ValueError(msg)
+        return filename
 
     def __get_cache_path(self) -> Path:
         """Get the file path of the loaded cache.
@@ -126,7 +330,4 @@ class Cache:
         Returns:
             Path: The file path of the loaded cache.
         """
-        if self.__loaded_filename is None:
-            msg = "No file loaded."
-            raise ValueError(msg)
-        return Path(self.__cache_dir_path) / Path(self.__loaded_filename + ".jsonl")
+        return find_cache_file(self.__cache_dir_path, self.__get_loaded_filename(), self.__cache_format)
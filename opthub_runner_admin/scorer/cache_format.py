@@ -0,0 +1,466 @@
+"""The module provides the on-disk formats of the cache files for the score calculation.
+
+Two formats are supported, and the format of an existing file is detected from its header.
+
+- jsonl: One JSON object per trial.
+- binary: The header MAGIC followed by length-prefixed records. Lists of floats are stored as packed doubles,
+  and the other values are stored as length-prefixed JSON blobs.
+
+Each cache file has a sidecar index (the cache file name + ".idx") of INDEX_ENTRY records, which map the trial
+numbers to the byte offsets of their records. The index lets the latest trial be found and the trials after a trial
+number be truncated without parsing the whole file. An index missing or behind
+the cache file (e.g. after a crash between the two writes) is caught up by parsing only the tail of the cache file.
+
+The cache files are shared by the Scorer processes on a host. They are read under the shared lock and written under
+the exclusive lock of a lock file (the cache file name + ".lock"), so that readers do not wait for each other.
+"""
+
+import fcntl
+import json
+import logging
+import struct
+import sys
+import time
+from bisect import bisect_right
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal, cast
+
+import click
+from filelock import FileLock, Timeout
+
+from opthub_runner_admin.utils.dir import get_opthub_runner_dir
+
+if TYPE_CHECKING:
+    from opthub_runner_admin.scorer.cache import Trial
+
+LOGGER = logging.getLogger(__name__)
+
+CacheFormat = Literal["jsonl", "binary"]
+
+EXTENSIONS: dict[CacheFormat, str] = {"jsonl": ".jsonl", "binary": ".bin"}
+MAGIC = b"OPTHUBC\x01"  # The header of the binary cache files
+
+# The tags of the values in the binary format
+TAG_NONE = 0
+TAG_FLOAT = 1
+TAG_FLOATS = 2
+TAG_STR = 3
+TAG_JSON = 4
+
+LENGTH = struct.Struct("<I")
+TAG_AND_LENGTH = struct.Struct("<BI")
+FLOAT = struct.Struct("<d")
+INDEX_ENTRY = struct.Struct("<QQ")  # The trial number and the byte offset of its record
+INDEX_EXTENSION = ".idx"
+LOCK_EXTENSION = ".lock"
+LOCK_TIMEOUT = 60  # seconds to wait for the lock of a cache file
+LOCK_POLL_INTERVAL = 0.05  # seconds between the attempts to acquire the shared lock of a cache file
+
+FIELDS = ("trial_no", "objective", "constraint", "info", "score", "feasible")
+
+
+def encode_value(value: object) -> bytes:
+    """Encode a value of a trial.
+
+    Args:
+        value (object): The value.
+
+    Returns:
+        bytes: The encoded value.
+    """
+    if value is None:
+        return bytes([TAG_NONE])
+    if isinstance(value, float):
+        return bytes([TAG_FLOAT]) + FLOAT.pack(value)
+    if isinstance(value, list) and all(isinstance(v, float) for v in value):
+        return TAG_AND_LENGTH.pack(TAG_FLOATS, len(value)) + struct.pack(f"<{len(value)}d", *value)
+    if isinstance(value, str):
+        encoded = value.encode("utf-8")
+        return TAG_AND_LENGTH.pack(TAG_STR, len(encoded)) + encoded
+    encoded = json.dumps(value).encode("utf-8")
+    return TAG_AND_LENGTH.pack(TAG_JSON, len(encoded)) + encoded
+
+
+def decode_value(data: memoryview, offset: int) -> tuple[object, int]:
+    """Decode a value of a trial.
+
+    Args:
+        data (memoryview): The data.
+        offset (int): The offset of the value.
+
+    Returns:
+        tuple[object, int]: The value and the offset of the next value.
+    """
+    tag = data[offset]
+    if tag == TAG_NONE:
+        return None, offset + 1
+    if tag == TAG_FLOAT:
+        return FLOAT.unpack_from(data, offset + 1)[0], offset + 1 + FLOAT.size
+    _, length = TAG_AND_LENGTH.unpack_from(data, offset)
+    start = offset + TAG_AND_LENGTH.size
+    if tag == TAG_FLOATS:
+        end = start + length * FLOAT.size
+        return list(struct.unpack_from(f"<{length}d", data, start)), end
+    end = start + length
+    text = bytes(data[start:end]).decode("utf-8")
+    if tag == TAG_STR:
+        return text, end
+    return json.loads(text), end
+
+
+def encode_trial(trial: "Trial") -> bytes:
+    """Encode a trial into a length-prefixed record.
+
+    Args:
+        trial (Trial): The trial.
+
+    Returns:
+        bytes: The record.
+    """
+    record = b"".join(encode_value(trial[field]) for field in FIELDS)  # type: ignore[literal-required]
+    return LENGTH.pack(len(record)) + record
+
+
+def decode_trials(data: bytes | memoryview, offset: int = len(MAGIC)) -> tuple[list["Trial"], int]:
+    """Decode the records of a binary cache file.
+
+    A record cut off at the end of the data (e.g. by a crash or by another process while writing) is ignored.
+
+    Args:
+        data (bytes | memoryview): The content of the file.
+        offset (int): The byte offset of the first record.
+
+    Returns:
+        tuple[list[Trial], int]: The trials and the byte offset after the last complete record.
+    """
+    view = memoryview(data)
+    trials: list[Trial] = []
+    while offset + LENGTH.size <= len(view):
+        (length,) = LENGTH.unpack_from(view, offset)
+        start = offset + LENGTH.size
+        if start + length > len(view):
+            LOGGER.warning("The last record of the cache file is incomplete. It is ignored.")
+            break
+        values = {}
+        position = start
+        for field in FIELDS:
+            values[field], position = decode_value(view, position)
+        trials.append(cast("Trial", values))
+        offset = start + length
+    return trials, offset
+
+
+def decode_lines(data: bytes, offset: int = 0) -> tuple[list["Trial"], int]:
+    """Decode the lines of a JSONL cache file.
+
+    A line without the line break at the end of the data is ignored.
+
+    Args:
+        data (bytes): The content of the file.
+        offset (int): The byte offset of the first line.
+
+    Returns:
+        tuple[list[Trial], int]: The trials and the byte offset after the last complete line.
+    """
+    trials: list[Trial] = []
+    while (line_end := data.find(b"\n", offset)) >= 0:
+        if line_end > offset:
+            trials.append(json.loads(data[offset:line_end]))
+        offset = line_end + 1
+    return trials, offset
+
+
+def header_size(path: Path) -> int:
+    """Get the size of the header of a cache file.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        int: The size of the header.
+    """
+    return len(MAGIC) if path.suffix == EXTENSIONS["binary"] else 0
+
+
+def lock_cache_file(path: Path) -> FileLock:
+    """Get the lock of a cache file. The lock can be acquired again by the thread holding it.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        FileLock: The lock.
+    """
+    return FileLock(path.with_name(path.name + LOCK_EXTENSION), timeout=LOCK_TIMEOUT, is_singleton=True)
+
+
+@contextmanager
+def share_cache_file(path: Path) -> Iterator[None]:
+    """Hold the shared lock of a cache file, which lets the other readers in but keeps the writers out.
+
+    The lock file is the one of lock_cache_file. If the current thread holds the exclusive lock, it is used instead.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Raises:
+        Timeout: If the shared lock is not acquired in LOCK_TIMEOUT seconds, an error occurs.
+    """
+    lock = lock_cache_file(path)
+    if lock.is_locked:  # the exclusive lock is held by the current thread, and a shared lock would wait for it
+        yield
+        return
+
+    with Path.open(Path(lock.lock_file), "a") as file:
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+                break
+            except BlockingIOError as e:
+                if time.monotonic() > deadline:
+                    raise Timeout(lock.lock_file) from e
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def read_tail(path: Path, start: int = 0) -> tuple[list["Trial"], int]:
+    """Read the trials from a byte offset of a cache file, detecting its format.
+
+    Args:
+        path (Path): The path of the cache file.
+        start (int): The byte offset of the first record to read. The header is skipped.
+
+    Returns:
+        tuple[list[Trial], int]: The trials and the byte offset after the last complete record.
+    """
+    with share_cache_file(path), Path.open(path, "rb") as file:  # the lock keeps the file from being truncated
+        header = file.read(len(MAGIC))
+        if len(header) == 0:
+            return [], 0
+        if header == MAGIC:
+            start = max(start, len(MAGIC))
+        file.seek(start)
+        data = file.read()
+        trials, offset = decode_trials(data, 0) if header == MAGIC else decode_lines(data)
+        return trials, start + offset
+
+
+def read_trials(path: Path) -> list["Trial"]:
+    """Read the trials from a cache file, detecting its format.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        list[Trial]: The trials.
+    """
+    trials, _ = read_tail(path)
+    return trials
+
+
+def get_index_path(path: Path) -> Path:
+    """Get the path of the index of a cache file.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        Path: The path of the index.
+    """
+    return path.with_name(path.name + INDEX_EXTENSION)
+
+
+def scan_records(path: Path, start: int) -> list[tuple[int, int]]:
+    """Parse the records of a cache file from a byte offset to the end.
+
+    Args:
+        path (Path): The path of the cache file.
+        start (int): The byte offset of the first record to parse.
+
+    Returns:
+        list[tuple[int, int]]: The trial numbers and the byte offsets of the complete records.
+    """
+    with Path.open(path, "rb") as file:
+        file.seek(start)
+        data = file.read()
+
+    entries = []
+    offset = 0
+    if path.suffix == EXTENSIONS["binary"]:
+        view = memoryview(data)
+        while offset + LENGTH.size <= len(view):
+            (length,) = LENGTH.unpack_from(view, offset)
+            if offset + LENGTH.size + length > len(view):
+                break
+            trial_no, _ = decode_value(view, offset + LENGTH.size)
+            entries.append((int(cast("str", trial_no)), start + offset))
+            offset += LENGTH.size + length
+    else:
+        for line in data.splitlines(keepends=True):
+            if line.endswith(b"\n") and line.strip():
+                entries.append((int(json.loads(line)["trial_no"]), start + offset))
+            offset += len(line)
+    return entries
+
+
+def load_index(path: Path) -> list[tuple[int, int]]:
+    """Load the index of a cache file, catching it up with the cache file if it is missing or behind.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        list[tuple[int, int]]: The trial numbers and the byte offsets of the records, in ascending order.
+    """
+    with lock_cache_file(path):
+        index_path = get_index_path(path)
+        indexed: list[tuple[int, int]] = []
+        if index_path.exists():
+            data = index_path.read_bytes()
+            indexed = list(INDEX_ENTRY.iter_unpack(data[: len(data) - len(data) % INDEX_ENTRY.size]))
+        if not path.exists():
+            return []
+
+        # parse only the records from the last indexed one, which is parsed again to check that it is still there
+        size = path.stat().st_size
+        entries = [entry for entry in indexed if entry[1] < size]  # drop the entries of truncated records
+        tail = scan_records(path, entries[-1][1] if len(entries) > 0 else header_size(path))
+        if len(entries) > 0 and (len(tail) == 0 or tail[0] != entries[-1]):
+            LOGGER.warning("The index of the cache file does not match the cache file. It is rebuilt.")
+            entries, tail = [], scan_records(path, header_size(path))
+        entries = entries[:-1] + tail if len(entries) > 0 else tail
+        if entries != indexed or not index_path.exists():
+            with Path.open(index_path, "wb") as file:
+                file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in entries))
+        return entries
+
+
+def get_latest_trial_no(path: Path) -> int | None:
+    """Get the latest trial number in a cache file from its index.
+
+    Args:
+        path (Path): The path of the cache file.
+
+    Returns:
+        int | None: The latest trial number, or None if the cache file has no trials.
+    """
+    entries = load_index(path)
+    return entries[-1][0] if len(entries) > 0 else None
+
+
+def truncate_after(path: Path, trial_no: int) -> int:
+    """Remove the trials after a trial number from a cache file and its index.
+
+    Args:
+        path (Path): The path of the cache file.
+        trial_no (int): The greatest trial number to keep.
+
+    Returns:
+        int: The number of trials removed.
+    """
+    with lock_cache_file(path):
+        entries = load_index(path)
+        position = bisect_right(entries, trial_no, key=lambda entry: entry[0])
+        if position == len(entries):
+            return 0
+        with Path.open(path, "r+b") as file:
+            file.truncate(entries[position][1])
+        with Path.open(get_index_path(path), "r+b") as file:
+            file.truncate(position * INDEX_ENTRY.size)
+        return len(entries) - position
+
+
+def append_trial(path: Path, trial: "Trial") -> tuple[int, int]:
+    """Append a trial to a cache file in the format of the file, and its offset to the index.
+
+    Args:
+        path (Path): The path of the cache file. Its extension decides the format of a new file.
+        trial (Trial): The trial.
+
+    Returns:
+        tuple[int, int]: The byte offsets of the start and the end of the appended record.
+    """
+    with lock_cache_file(path):
+        if path.exists() and not get_index_path(path).exists():
+            load_index(path)  # build the index of a cache file written without one
+
+        with Path.open(path, "ab") as file:
+            if path.suffix == EXTENSIONS["binary"]:
+                if file.tell() == 0:
+                    file.write(MAGIC)
+                record = encode_trial(trial)
+            else:
+                record = (json.dumps(trial) + "\n").encode("utf-8")
+            offset = file.tell()
+            file.write(record)
+        with Path.open(get_index_path(path), "ab") as file:
+            file.write(INDEX_ENTRY.pack(int(trial["trial_no"]), offset))
+        return offset, offset + len(record)
+
+
+def find_cache_file(cache_dir: Path, filename: str, cache_format: CacheFormat) -> Path:
+    """Find the cache file, whichever format it is in.
+
+    Args:
+        cache_dir (Path): The cache directory.
+        filename (str): The filename without the extension.
+        cache_format (CacheFormat): The format of a new file.
+
+    Returns:
+        Path: The path of the existing file, or the path of a new file in cache_format.
+    """
+    for extension in EXTENSIONS.values():
+        path = cache_dir / (filename + extension)
+        if path.exists():
+            return path
+    return cache_dir / (filename + EXTENSIONS[cache_format])
+
+
+def migrate_file(path: Path) -> Path:
+    """Convert a JSONL cache file into the binary format, removing the JSONL file.
+
+    Args:
+        path (Path): The path of the JSONL cache file.
+
+    Returns:
+        Path: The path of the binary cache file.
+    """
+    trials = read_trials(path)
+    binary_path = path.with_suffix(EXTENSIONS["binary"])
+    temporary_path = binary_path.with_suffix(".tmp")
+    with Path.open(temporary_path, "wb") as file:
+        file.write(MAGIC)
+        for trial in trials:
+            file.write(encode_trial(trial))
+    temporary_path.replace(binary_path)
+    get_index_path(binary_path).unlink(missing_ok=True)
+    load_index(binary_path)
+    path.unlink()
+    get_index_path(path).unlink(missing_ok=True)
+    path.with_name(path.name + LOCK_EXTENSION).unlink(missing_ok=True)
+    return binary_path
+
+
+@click.command(help="Convert the JSONL cache files of the Scorer into the binary format.")
+def migrate() -> None:
+    """Convert the JSONL cache files into the binary format. Stop the Scorers before running this."""
+    cache_dir = get_opthub_runner_dir() / "cache"
+    if not cache_dir.exists():
+        click.echo("No cache directory found.")
+        sys.exit(0)
+
+    n_files = 0
+    for path in sorted(cache_dir.glob("*" + EXTENSIONS["jsonl"])):
+        try:
+            migrate_file(path)
+        except Exception as e:
+            click.echo(f"Failed to convert {path.name}: {e}")
+            sys.exit(1)
+        n_files += 1
+    click.echo(f"Converted {n_files} cache files.")
@@ -4,7 +4,7 @@ import json
 from decimal import Decimal
 from typing import TypedDict, cast
 
-from opthub_runner_admin.lib.dynamodb import DynamoDB
+from opthub_runner_admin.lib.dynamodb import DynamoDB, RangeQuery
 from opthub_runner_admin.scorer.cache import Cache, Trial
 from opthub_runner_admin.utils.converter import decimal_to_float
 from opthub_runner_admin.utils.zfill import zfill
@@ -38,6 +38,46 @@ class PartialScore(TypedDict):
     Value: Decimal | None
 
 
+class Current(TypedDict):
+    """The evaluation of the trial to score.
+
+    trial_no (str): The trial number.
+    objective (object | None): The objective value.
+    constraint (object | None): The constraint value.
+    info (object): The information.
+    feasible (bool | None): The feasibility.
+    """
+
+    trial_no: str
+    objective: object | None
+    constraint: object | None
+    info: object
+    feasible: bool | None
+
+
+SUB_RANGE_TRIALS = 1000  # The number of trials fetched by one query when a range of trials is split
+
+
+def split_trial_range(least_trial_no: int, greatest_trial_no: int, digit: int) -> list[tuple[str, str]]:
+    """Split a range of trials into sub-ranges of SUB_RANGE_TRIALS trials.
+
+    Args:
+        least_trial_no (int): The least trial number.
+        greatest_trial_no (int): The greatest trial number.
+        digit (int): The number of digits of the zero-filled trial numbers.
+
+    Returns:
+        list[tuple[str, str]]: The least and greatest sort keys of each sub-range, in ascending order.
+    """
+    return [
+        (
+            "Success#" + zfill(least, digit),
+            "Success#" + zfill(min(least + SUB_RANGE_TRIALS - 1, greatest_trial_no), digit),
+        )
+        for least in range(least_trial_no, greatest_trial_no + 1, SUB_RANGE_TRIALS)
+    ]
+
+
 def make_history(
     match_id: str,
     participant_id: str,
@@ -59,19 +99,59 @@ def make_history(
     """
     load_up_to_trial_no(match_id, participant_id, trial_no, cache, dynamodb)
 
-    history = []
+    return cache.get_values(up_to=trial_no)
+
+
+def make_currents_and_history(
+    match_id: str,
+    participant_id: str,
+    trial_nos: list[str],
+    cache: Cache,
+    dynamodb: DynamoDB,
+) -> tuple[list[Current], list[Trial]]:
+    """Fetch the evaluations of consecutive trials and make the history up to the trial before the first one.
+
+    The evaluations of the trials are fetched by the same range query as the evaluations of the history.
+
+    Args:
+        match_id (str): The match ID.
+        participant_id (str): The participant ID.
+        trial_nos (list[str]): The consecutive trial numbers to score, in ascending order.
+        cache (Cache): The cache instance.
+        dynamodb (DynamoDB): The DynamoDB instance.
+
+    Returns:
+        tuple[list[Current], list[Trial]]: The evaluations of the trials and the history of the trials before them.
+    """
+    previous_trial_no = zfill(int(trial_nos[0]) - 1, len(trial_nos[0]))
+    evaluations = load_up_to_trial_no(match_id, participant_id, previous_trial_no, cache, dynamodb, trial_nos[-1])
 
-    for hist in cache.get_values():
-        if hist["trial_no"] > trial_no:
-            msg = "The trial number in the cache is greater than the requested trial number."
-            raise ValueError(msg)
+    if [evaluation["TrialNo"] for evaluation in evaluations] != trial_nos:
+        msg = "Evaluation not found"
+        raise ValueError(msg)
 
-        history.append(hist)
+    currents: list[Current] = [
+        {
+            "trial_no": evaluation["TrialNo"],
+            "objective": decimal_to_float(evaluation["Objective"]),
+            "constraint": decimal_to_float(evaluation["Constraint"]),
+            "info": decimal_to_float(evaluation["Info"]),
+            "feasible": evaluation["Feasible"],
+        }
+        for evaluation in evaluations
+    ]
 
-    return history
+    return currents, cache.get_values(up_to=previous_trial_no)
 
 
-def load_up_to_trial_no(match_id: str, participant_id: str, trial_no: str, cache: Cache, dynamodb: DynamoDB) -> None:
+def load_up_to_trial_no(  # noqa: PLR0913
+    match_id: str,
+    participant_id: str,
+    trial_no: str,
+    cache: Cache,
+    dynamodb: DynamoDB,
+    current_trial_no: str | None = None,
+) -> list[PartialEvaluation]:
     """Load the history up to trial_no.
 
     Args:
@@ -80,30 +160,56 @@ def load_up_to_trial_no(match_id: str, participant_id: str, trial_no: str, cache
         trial_no (str): The trial number.
         cache (Cache): The cache instance.
         dynamodb (DynamoDB): The DynamoDB instance.
+        current_trial_no (str | None): The greatest trial number to score. If given, the evaluations after trial_no
+            up to current_trial_no are fetched together with the evaluations of the history.
+
+    Returns:
+        list[PartialEvaluation]: The evaluations after trial_no up to current_trial_no that are found.
     """
-    loaded_trial_no = cache.get_values()[-1]["trial_no"] if len(cache.get_values()) > 0 else None
-
-    # If the loaded trial number is greater than or equal to the trial number, do nothing.
-    if loaded_trial_no is not None and loaded_trial_no >= trial_no:
-        return
-
-    # fetch evaluations from the database
-    evaluations = dynamodb.get_items_between_least_and_greatest(
-        f"Evaluations#{match_id}#{participant_id}",
-        "Success#" + (zfill(int(loaded_trial_no) + 1, len(loaded_trial_no)) if loaded_trial_no is not None else ""),
-        "Success#" + zfill(int(trial_no), len(trial_no)),
-        ["Objective", "Constraint", "Info", "Feasible", "TrialNo"],
+    loaded_trial_no = cache.get_latest_trial_no()
+
+    # If the loaded trial number is greater than or equal to the trial number, only the current trial is fetched.
+    is_loaded = loaded_trial_no is not None and loaded_trial_no >= int(trial_no)
+    if is_loaded and current_trial_no is None:
+        return []
+
+    # fetch evaluations and scores from the database concurrently, splitting large ranges into sub-ranges
+    digit = len(trial_no)
+    least_trial_no = 0 if loaded_trial_no is None else loaded_trial_no + 1
+    evaluation_ranges = split_trial_range(
+        int(trial_no) + 1 if is_loaded else least_trial_no,
+        int(current_trial_no) if current_trial_no is not None else int(trial_no),
+        digit,
     )
-    evaluations = cast(list[PartialEvaluation], evaluations)
-
-    # fetch scores from the database
-    scores = dynamodb.get_items_between_least_and_greatest(
-        f"Scores#{match_id}#{participant_id}",
-        "Success#" + (zfill(int(loaded_trial_no) + 1, len(loaded_trial_no)) if loaded_trial_no is not None else ""),
-        "Success#" + zfill(int(trial_no), len(trial_no)),
-        ["TrialNo", "Value"],
+    score_ranges = [] if is_loaded else split_trial_range(least_trial_no, int(trial_no), digit)
+
+    queries: list[RangeQuery] = [
+        {
+            "partition_key": f"Evaluations#{match_id}#{participant_id}",
+            "least_trial": least,
+            "greatest_trial": greatest,
+            "attributes": ["Objective", "Constraint", "Info", "Feasible", "TrialNo"],
+        }
+        for least, greatest in evaluation_ranges
+    ]
+    queries.extend(
+        {
+            "partition_key": f"Scores#{match_id}#{participant_id}",
+            "least_trial": least,
+            "greatest_trial": greatest,
+            "attributes": ["TrialNo", "Value"],
+        }
+        for least, greatest in score_ranges
     )
-    scores = cast(list[PartialScore], scores)
+    results = dynamodb.get_items_in_ranges(queries)  # the results are in the order of the queries
+    evaluations = cast(list[PartialEvaluation], [item for items in results[: len(evaluation_ranges)] for item in items])
+    scores = cast(list[PartialScore], [item for items in results[len(evaluation_ranges) :] for item in items])
+
+    current_evaluations = [evaluation for evaluation in evaluations if evaluation["TrialNo"] > trial_no]
+    evaluations = evaluations[: len(evaluations) - len(current_evaluations)]
+
+    if is_loaded:
+        return current_evaluations
 
     # append the fetched evaluations and scores to the cache
     evaluation_index = 0
@@ -138,3 +244,5 @@ def load_up_to_trial_no(match_id: str, participant_id: str, trial_no: str, cache
                 indent=4,
             )
         raise ValueError("The evaluation and score do not match.")
+
+    return current_evaluations
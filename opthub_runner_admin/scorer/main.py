@@ -4,32 +4,88 @@ import json
 import logging
 import signal
 import sys
+from collections.abc import Callable
 from time import sleep
 from traceback import format_exc
+from typing import Any, TypedDict, cast
 
 from opthub_runner_admin.args import Args
-from opthub_runner_admin.lib.docker_executor import execute_in_docker
+from opthub_runner_admin.lib.docker_executor import (
+    DockerConfig,
+    PersistentContainerPool,
+    StdinLine,
+    execute_batch_in_docker,
+    execute_in_docker,
+)
 from opthub_runner_admin.lib.dynamodb import DynamoDB
-from opthub_runner_admin.lib.sqs import ScoreMessage, ScorerSQS
-from opthub_runner_admin.models.evaluation import fetch_success_evaluation_by_primary_key
+from opthub_runner_admin.lib.sqs import Message, ScoreMessage, ScorerSQS
 from opthub_runner_admin.models.exception import ContainerRuntimeError, DockerImageNotFoundError
 from opthub_runner_admin.models.match import Match, fetch_match_by_id
 from opthub_runner_admin.models.score import (
     FailedScoreCreateParams,
+    is_previous_trial_settled,
     is_score_exists,
     save_failed_score,
     save_success_score,
 )
-from opthub_runner_admin.scorer.cache import Cache, CacheWriteError
-from opthub_runner_admin.scorer.history import make_history
+from opthub_runner_admin.scorer.cache import Cache, CacheWriteError, Trial
+from opthub_runner_admin.scorer.history import Current, make_currents_and_history
+from opthub_runner_admin.scorer.reorder import ReorderBuffer
 from opthub_runner_admin.utils.process import delete_flag_file, is_stop_flag_set
 from opthub_runner_admin.utils.time import get_utcnow
 from opthub_runner_admin.utils.truncate import truncate_text_center
+from opthub_runner_admin.utils.worker_pool import RunningKeys, WorkerPool
 from opthub_runner_admin.utils.zfill import zfill
 
 LOGGER = logging.getLogger(__name__)
 
 
+class ScoreWorker(TypedDict):
+    """The resources owned by a scoring worker.
+
+    sqs (ScorerSQS): The SQS instance shared by the workers.
+    dynamodb (DynamoDB): The DynamoDB instance.
+    execute (Callable[[DockerConfig, list[StdinLine]], dict[str, Any]]): The function to execute in docker.
+    execute_batch (Callable[[DockerConfig, list[StdinLine], int], list[dict[str, Any]]]): The function to execute
+        in docker, receiving the given number of JSON lines.
+    execute_with_history (Callable[..., list[dict[str, Any]]] | None): The function to execute in the persistent
+        container of a participant, sending only the history it has not received. None if the delta protocol
+        is disabled.
+    """
+
+    sqs: ScorerSQS
+    dynamodb: DynamoDB
+    execute: Callable[[DockerConfig, list[StdinLine]], dict[str, Any]]
+    execute_batch: Callable[[DockerConfig, list[StdinLine], int], list[dict[str, Any]]]
+    execute_with_history: (
+        Callable[[DockerConfig, str, StdinLine, int, Callable[[int], StdinLine], int], list[dict[str, Any]]] | None
+    )
+
+
+class ScoreEntry(TypedDict):
+    """A message in a score job.
+
+    message (ScoreMessage): The message to score.
+    receipt_handle (str): The receipt handle of the message.
+    """
+
+    message: ScoreMessage
+    receipt_handle: str
+
+
+class ScoreJob(TypedDict):
+    """The score calculation run by a worker. The consecutive trials of the entries are scored in one container run.
+
+    entries (list[ScoreEntry]): The messages to score. They are consecutive trials of the same participant.
+    started_at (str | None): The time when the score calculation started. ISOString format.
+    finished_at (str | None): The time when the score calculation finished. ISOString format.
+    """
+
+    entries: list[ScoreEntry]
+    started_at: str | None
+    finished_at: str | None
+
+
 def setup_sqs(args: Args) -> ScorerSQS:
     """Setup scorer SQS.
 
@@ -75,16 +131,114 @@ def setup_dynamodb(args: Args) -> DynamoDB:
     return dynamodb
 
 
-def get_message_from_queue(sqs: ScorerSQS, interval: float, process_name: str) -> ScoreMessage | None:
+def setup_persistent_containers(args: Args) -> PersistentContainerPool | None:
+    """Setup the pool of persistent containers if the persistent mode is enabled.
+
+    Args:
+        args (Args): Args
+
+    Returns:
+        PersistentContainerPool | None: The pool of persistent containers, or None if the mode is disabled.
+    """
+    if not args["persistent"]:
+        return None
+    return PersistentContainerPool(args["persistent_idle_timeout"], args["persistent_max_uses"])
+
+
+def setup_workers(args: Args, sqs: ScorerSQS, containers: PersistentContainerPool | None) -> list[ScoreWorker]:
+    """Setup the resources of the scoring workers.
+
+    Args:
+        args (Args): Args
+        sqs (ScorerSQS): The SQS instance shared by the workers.
+        containers (PersistentContainerPool | None): The pool of persistent containers, or None if disabled.
+
+    Returns:
+        list[ScoreWorker]: The resources of each worker.
+    """
+    execute = containers.execute if containers is not None else execute_in_docker
+    execute_batch = containers.execute_batch if containers is not None else execute_batch_in_docker
+    execute_with_history = None
+    if args["indicator_delta"]:
+        if containers is not None:
+            execute_with_history = containers.execute_with_history
+        else:
+            LOGGER.warning("indicator_delta is ignored because it requires persistent containers.")
+    return [
+        {
+            "sqs": sqs,
+            "dynamodb": setup_dynamodb(args),
+            "execute": execute,
+            "execute_batch": execute_batch,
+            "execute_with_history": execute_with_history,
+        }
+        for _ in range(max(args["concurrency"], 1))
+    ]
+
+
+def setup_reorder_buffer(args: Args, running: RunningKeys) -> ReorderBuffer[ScoreEntry]:
+    """Setup the buffer to hold the messages received before the message of the previous trial.
+
+    The messages of a participant whose job is running are also held until the job has finished.
+
+    Args:
+        args (Args): Args
+        running (RunningKeys): The participants whose jobs are running.
+
+    Returns:
+        ReorderBuffer[ScoreEntry]: The reorder buffer.
+    """
+    dynamodb = setup_dynamodb(args) if args["reorder_wait"] > 0 else None
+
+    def is_settled(entry: ScoreEntry) -> bool:
+        if dynamodb is None:
+            return True
+        message = entry["message"]
+        try:
+            return is_previous_trial_settled(
+                dynamodb,
+                message["match_id"],
+                message["participant_id"],
+                message["trial_no"],
+            )
+        except Exception:
+            LOGGER.exception("Error occurred while checking the previous trial. The message is held.")
+            return False
+
+    return ReorderBuffer(args["reorder_wait"], is_settled, running.__contains__)
+
+
+def get_participant_key(message: ScoreMessage) -> str:
+    """Get the key of the participant of a message.
+
+    Args:
+        message (ScoreMessage): The message.
+
+    Returns:
+        str: The key of the participant.
+    """
+    return message["match_id"] + "#" + message["participant_id"]
+
+
+def get_message_from_queue(
+    sqs: ScorerSQS,
+    interval: float,
+    process_name: str,
+    wait_time_seconds: int | None = None,
+    max_messages: int = 1,
+) -> ScoreEntry | None:
     """Get message from the queue.
 
     Args:
         sqs (ScorerSQS): Scorer SQS
-        interval (float): Interval to fetch message.
+        interval (float): Seconds to wait before retrying when failing to fetch the message.
         process_name (str): The process name.
+        wait_time_seconds (int | None): If given, the queue is polled once for up to the given seconds,
+            and None is returned if no message arrives. Otherwise, the queue is polled until a message arrives.
+        max_messages (int): The maximum number of messages to receive into the buffer at once.
 
     Returns:
-        ScoreMessage | None: Scorer Message
+        ScoreEntry | None: The message and its receipt handle
     """
     LOGGER.info("Finding Score Message from SQS...")
     try:
@@ -99,13 +253,14 @@ def get_message_from_queue(sqs: ScorerSQS, interval: float, process_name: str) -
                 LOGGER.info("...Deleted")
                 sys.exit(0)
 
-            # Try to get the message from the queue
-            message = sqs.get_message_from_queue()
+            # Try to get the message from the queue. The poll waits for up to 20 seconds while the queue is empty.
+            message = sqs.receive_sqs_message(wait_time_seconds, max_messages)
 
             if message is not None:  # If the message is found, start to calculate the score
+                entry: ScoreEntry = {"message": sqs.parse_message(message), "receipt_handle": message["receipt_handle"]}
                 break
-
-            sleep(interval)
+            if wait_time_seconds is not None:
+                return None
 
     except KeyboardInterrupt:
         signal.signal(signal.SIGTERM, signal.SIG_IGN)
@@ -116,11 +271,93 @@ def get_message_from_queue(sqs: ScorerSQS, interval: float, process_name: str) -
         sys.exit(1)
     except Exception:
         LOGGER.exception("Error occurred while fetching message from SQS.")
+        sleep(interval)
         return None
     else:  # If the message is found, return the message
         LOGGER.debug("Message: %s", message)
         LOGGER.info("...Found")
-        return message
+        return entry
+
+
+def receive_entry(
+    args: Args,
+    sqs: ScorerSQS,
+    reorder: ReorderBuffer[ScoreEntry],
+    process_name: str,
+    max_messages: int,
+) -> ScoreEntry | None:
+    """Receive the next message to score, passing it through the reorder buffer.
+
+    A held message that has become ready is scored first. Otherwise, a message is received from the queue.
+    While messages are held, the queue is polled only briefly so that they are checked again.
+
+    Args:
+        args (Args): The arguments.
+        sqs (ScorerSQS): The SQS instance.
+        reorder (ReorderBuffer[ScoreEntry]): The buffer of the messages held until the previous trial is settled.
+        process_name (str): The process name.
+        max_messages (int): The maximum number of messages to receive into the buffer at once.
+
+    Returns:
+        ScoreEntry | None: The message to score, or None if no message is ready.
+    """
+    entry = reorder.pop_ready()
+    if entry is not None:
+        return entry
+    entry = get_message_from_queue(sqs, args["interval"], process_name, reorder.poll_seconds(), max_messages)
+    if entry is None:
+        return None
+    reorder.add(entry, get_participant_key(entry["message"]), int(entry["message"]["trial_no"]))
+    return reorder.pop_ready()
+
+
+def collect_batch(
+    args: Args,
+    sqs: ScorerSQS,
+    reorder: ReorderBuffer[ScoreEntry],
+    first: ScoreEntry,
+    limit: int,
+) -> ScoreJob:
+    """Collect the buffered messages of the trials following the first one of the same participant into a batch.
+
+    The batch ends at the first trial whose message is neither held in the reorder buffer nor in the SQS buffer.
+    The other messages stay in the buffers.
+
+    Args:
+        args (Args): The arguments.
+        sqs (ScorerSQS): The SQS instance.
+        reorder (ReorderBuffer[ScoreEntry]): The buffer of the messages held until the previous trial is settled.
+        first (ScoreEntry): The first message of the batch.
+        limit (int): The maximum number of messages in the batch.
+
+    Returns:
+        ScoreJob: The batch.
+    """
+    batch: ScoreJob = {"entries": [first], "started_at": None, "finished_at": None}
+    first_message = first["message"]
+    limit = min(limit, args["score_batch_size"])
+
+    def is_next_trial(message: Message) -> bool:
+        parsed = sqs.parse_message(message)
+        return (
+            parsed["match_id"] == first_message["match_id"]
+            and parsed["participant_id"] == first_message["participant_id"]
+            and int(parsed["trial_no"]) == int(first_message["trial_no"]) + len(batch["entries"])
+        )
+
+    key = get_participant_key(first_message)
+    while len(batch["entries"]) < limit:
+        held = reorder.take(key, int(first_message["trial_no"]) + len(batch["entries"]))
+        if held is not None:
+            batch["entries"].append(held)
+            continue
+        taken = sqs.take_buffered(is_next_trial, 1)
+        if len(taken) == 0:
+            break
+        LOGGER.debug("Message: %s", taken[0])
+        batch["entries"].append({"message": sqs.parse_message(taken[0]), "receipt_handle": taken[0]["receipt_handle"]})
+
+    return batch
 
 
 def get_match_from_message(process_name: str, message: ScoreMessage, dev: bool) -> Match | None:
@@ -156,198 +393,481 @@ def get_match_from_message(process_name: str, message: ScoreMessage, dev: bool)
         return match
 
 
-def calculate_score(process_name: str, args: Args) -> None:  # noqa: PLR0915, C901, PLR0912
-    """The function that controls the score calculation process.
+def run_indicator(  # noqa: PLR0913
+    args: Args,
+    cache: Cache,
+    worker: ScoreWorker,
+    match: Match,
+    message: ScoreMessage,
+    currents: list[dict[str, Any]],
+    history: list[Trial],
+) -> list[dict[str, Any]]:
+    """Run the indicator for the current trials and the history.
+
+    A single trial is sent as a JSON object. Consecutive trials are sent as a JSON array, and the indicator writes
+    one JSON line for each of them, scoring each trial with the history and the trials before it.
+    With the delta protocol, the persistent container of the participant receives only the trials it has not
+    received. Otherwise, the whole history is sent, serialized incrementally by the cache.
 
     Args:
-        process_name (str): The process name
         args (Args): The arguments.
+        cache (Cache): The cache of the histories, loaded for the participant.
+        worker (ScoreWorker): The resources of the worker.
+        match (Match): The match.
+        message (ScoreMessage): The message of the first trial to score.
+        currents (list[dict[str, Any]]): The evaluations of the trials to score.
+        history (list[Trial]): The history of the trials before the trials to score.
+
+    Returns:
+        list[dict[str, Any]]: The outputs of the indicator, one per trial.
     """
-    sqs = setup_sqs(args)
-    dynamodb = setup_dynamodb(args)
+    config: DockerConfig = {
+        "image": match["indicator_docker_image"],
+        "environments": match["indicator_environments"],
+        "command": args["command"],
+        "timeout": args["timeout"],
+        "rm": args["rm"],
+    }
+    current = json.dumps(currents[0] if len(currents) == 1 else currents) + "\n"
+
+    def serialize_history(start: int) -> bytes:
+        if start == 0:  # the history serialized incrementally by the cache, the same as json.dumps(history)
+            previous_trial_no = zfill(int(message["trial_no"]) - 1, len(message["trial_no"]))
+            return cache.get_serialized_values(up_to=previous_trial_no) + b"\n"
+        return (json.dumps(history[start:]) + "\n").encode("utf-8")
+
+    if worker["execute_with_history"] is not None:
+        return worker["execute_with_history"](
+            config,
+            match["id"] + "#" + message["participant_id"],
+            current,
+            len(history),
+            serialize_history,
+            len(currents),
+        )
+    if len(currents) == 1:
+        return [worker["execute"](config, [current, serialize_history(0)])]
+    return worker["execute_batch"](config, [current, serialize_history(0)], len(currents))
+
+
+def run_score_job(  # noqa: PLR0913
+    process_name: str,
+    args: Args,
+    running: RunningKeys,
+    cache: Cache,
+    worker: ScoreWorker,
+    job: ScoreJob,
+    claim: Callable[[], bool],
+) -> None:
+    """Score a job, making its messages visible again if the job is abandoned.
+
+    The messages that are neither deleted nor saved as failed (e.g. when the match can not be fetched or an unexpected
+    error occurs) are released, so that they are received again after a backoff instead of their visibility timeout.
+    The participant of the job is discarded from the running keys on every path, so its next job can be submitted.
 
-    # cache for the trials history
-    cache = Cache()
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments.
+        running (RunningKeys): The participants whose jobs are running.
+        cache (Cache): The cache of the histories shared by the workers.
+        worker (ScoreWorker): The resources of the worker.
+        job (ScoreJob): The score job.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    try:
+        score_message(process_name, args, cache, worker, job, claim)
+    finally:
+        worker["sqs"].release_unprocessed([entry["receipt_handle"] for entry in job["entries"]])
+        running.discard(get_participant_key(job["entries"][0]["message"]))
+
+
+def score_message(  # noqa: PLR0913
+    process_name: str,
+    args: Args,
+    cache: Cache,
+    worker: ScoreWorker,
+    job: ScoreJob,
+    claim: Callable[[], bool],
+) -> None:
+    """Calculate the scores of the messages in a job on a worker.
+
+    No other job of the participant runs at the same time, because the history of a trial consists of all the
+    earlier trials.
+    The consecutive trials of a job are scored in one container run. If the run fails, the trials are scored one at a
+    time, so that the error is saved for the trial that caused it.
 
-    n_score = 0
+    Args:
+        process_name (str): The process name.
+        args (Args): The arguments.
+        cache (Cache): The cache of the histories shared by the workers.
+        worker (ScoreWorker): The resources of the worker.
+        job (ScoreJob): The score job.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    first = job["entries"][0]["message"]
 
-    while True:
-        n_score += 1
+    claimed = False
 
-        if args["num"] > 0 and n_score > args["num"]:
-            LOGGER.info("Reached the maximum number of scores.")
-            break
-        if is_stop_flag_set(process_name):
-            msg = f"Stop flag detected. Stop Scorer on the process {process_name}."
-            LOGGER.info(msg)
-            sys.exit(0)
+    def claim_once() -> bool:
+        """Claim the job, or return True if it has already been claimed for another entry."""
+        nonlocal claimed
+        claimed = claimed or claim()
+        return claimed
 
-        LOGGER.info("==================== Calculating score: %d ====================", n_score)
+    match = get_match_from_message(process_name, first, args["dev"])
+    if match is None:
+        return
 
-        message = get_message_from_queue(sqs, args["interval"], process_name)
-        if message is None:
-            continue
+    entries = drop_scored_entries(worker, job["entries"])
+    trial_nos = [int(entry["message"]["trial_no"]) for entry in entries]
+    if len(entries) > 1 and trial_nos == list(range(trial_nos[0], trial_nos[0] + len(entries))):
+        try:
+            score_entries(args, cache, worker, match, job, entries, claim_once)
+        except Exception:
+            LOGGER.exception("Error occurred while scoring the batch. The trials are scored one at a time.")
+            entries = drop_scored_entries(worker, entries)
+        else:
+            return
+
+    for entry in entries:
+        try:
+            score_entries(args, cache, worker, match, job, [entry], claim_once)
+        except Exception as error:
+            if not claim_once():
+                LOGGER.warning("The score calculation has been taken over. The error is discarded.")
+                return
+            LOGGER.exception("Error occurred while calculating score.")
+            save_failed_entry(
+                worker,
+                job,
+                entry,
+                format_exc() if isinstance(error, ContainerRuntimeError) else "Internal Server Error",
+                format_exc(),
+            )
 
-        match = get_match_from_message(process_name, message, args["dev"])
-        if match is None:
-            continue
 
-        if is_score_exists(dynamodb, message["match_id"], message["participant_id"], message["trial_no"]):
+def drop_scored_entries(worker: ScoreWorker, entries: list[ScoreEntry]) -> list[ScoreEntry]:
+    """Delete the messages of the trials that have already been scored.
+
+    Args:
+        worker (ScoreWorker): The resources of the worker.
+        entries (list[ScoreEntry]): The messages.
+
+    Returns:
+        list[ScoreEntry]: The messages of the trials that have not been scored.
+    """
+    unscored: list[ScoreEntry] = []
+    for entry in entries:
+        message = entry["message"]
+        if is_score_exists(worker["dynamodb"], message["match_id"], message["participant_id"], message["trial_no"]):
             LOGGER.warning("The score already exists.")
-            sqs.delete_message_from_queue()
-            continue
+            worker["sqs"].delete_message_from_queue(entry["receipt_handle"])
+        else:
+            unscored.append(entry)
+    return unscored
+
+
+def score_entries(  # noqa: PLR0913
+    args: Args,
+    cache: Cache,
+    worker: ScoreWorker,
+    match: Match,
+    job: ScoreJob,
+    entries: list[ScoreEntry],
+    claim: Callable[[], bool],
+) -> None:
+    """Calculate the scores of consecutive trials of a participant in one container run and save them.
 
-        try:
-            started_at = None
-            finished_at = None
-            LOGGER.info("Fetching Evaluation from DB...")
+    Args:
+        args (Args): The arguments.
+        cache (Cache): The cache of the histories shared by the workers.
+        worker (ScoreWorker): The resources of the worker.
+        match (Match): The match.
+        job (ScoreJob): The score job the messages belong to.
+        entries (list[ScoreEntry]): The messages of the consecutive trials.
+        claim (Callable[[], bool]): The function to claim the job before saving the result.
+    """
+    message = entries[0]["message"]
 
-            evaluation = fetch_success_evaluation_by_primary_key(
-                dynamodb,
-                match["id"],
-                message["participant_id"],
-                message["trial_no"],
-            )
-            LOGGER.debug("Evaluation: %s", evaluation)
-            LOGGER.info("...Fetched")
-
-            LOGGER.info("Making history...")
-            current = {
-                "objective": evaluation["objective"],
-                "constraint": evaluation["constraint"],
-                "info": evaluation["info"],
-                "feasible": evaluation["feasible"],
-            }
-            LOGGER.debug("Current: %s", current)
-
-            cache.load(match["id"] + "#" + evaluation["participant_id"])  # load cache to make history
-
-            history = make_history(
-                match["id"],
-                evaluation["participant_id"],
-                zfill(int(evaluation["trial_no"]) - 1, len(evaluation["trial_no"])),
-                cache,
-                dynamodb,
-            )
-            LOGGER.debug("History: %s", history)
-            LOGGER.info("...Made")
-
-            LOGGER.info("Calculating score...")
-            started_at = get_utcnow()
-            info_msg = "Started at : " + started_at
-            LOGGER.info(info_msg)
-
-            score_result = execute_in_docker(
-                {
-                    "image": match["indicator_docker_image"],
-                    "environments": match["indicator_environments"],
-                    "command": args["command"],
-                    "timeout": args["timeout"],
-                    "rm": args["rm"],
-                },
-                [json.dumps(current) + "\n", json.dumps(history) + "\n"],
-            )
+    LOGGER.info("Fetching Evaluation and making history...")
 
-            LOGGER.debug("Score Result: %s", score_result)
-
-            if "error" in score_result:
-                msg = "Error occurred while calculating score.\n" + score_result["error"]
-                raise ContainerRuntimeError(msg)
-
-            LOGGER.info("...Calculated")
-            finished_at = get_utcnow()
-            info_msg = "Finished at : " + finished_at
-            LOGGER.info(info_msg)
-
-            LOGGER.info("Saving Score...")
-
-            LOGGER.debug(
-                "Trial written to cache: match_id: %s, participant_id: %s\n%s",
-                match["id"],
-                evaluation["participant_id"],
-                {
-                    "trial_no": evaluation["trial_no"],
-                    "objective": evaluation["objective"],
-                    "constraint": evaluation["constraint"],
-                    "info": evaluation["info"],
-                    "feasible": evaluation["feasible"],
-                    "score": score_result["score"],
-                },
-            )
+    cache.load(match["id"] + "#" + message["participant_id"])  # load cache to make history
+
+    # the cache may have the trial if its score was cached but not saved, so the trial is scored again
+    latest_trial_no = cache.get_latest_trial_no()
+    if latest_trial_no is not None and latest_trial_no >= int(message["trial_no"]):
+        LOGGER.warning("The cache has the trials from %s. They are removed.", message["trial_no"])
+        cache.truncate_after(int(message["trial_no"]) - 1)
+
+    evaluations, history = make_currents_and_history(
+        match["id"],
+        message["participant_id"],
+        [entry["message"]["trial_no"] for entry in entries],
+        cache,
+        worker["dynamodb"],
+    )
+    currents: list[dict[str, Any]] = [
+        {
+            "objective": evaluation["objective"],
+            "constraint": evaluation["constraint"],
+            "info": evaluation["info"],
+            "feasible": evaluation["feasible"],
+        }
+        for evaluation in evaluations
+    ]
+    LOGGER.debug("Current: %s", currents)
+    LOGGER.debug("History: %s", history)
+    LOGGER.info("...Made")
+
+    LOGGER.info("Calculating score...")
+    started_at = get_utcnow()
+    job["started_at"] = started_at
+    info_msg = "Started at : " + started_at
+    LOGGER.info(info_msg)
+
+    score_results = run_indicator(args, cache, worker, match, message, currents, history)
+
+    LOGGER.debug("Score Result: %s", score_results)
+
+    for score_result in score_results:
+        if "error" in score_result:
+            msg = "Error occurred while calculating score.\n" + score_result["error"]
+            raise ContainerRuntimeError(msg)
+
+    LOGGER.info("...Calculated")
+    finished_at = get_utcnow()
+    job["finished_at"] = finished_at
+    info_msg = "Finished at : " + finished_at
+    LOGGER.info(info_msg)
+
+    if not claim():
+        LOGGER.warning("The score calculation has been taken over. The result is discarded.")
+        return
+
+    for entry, evaluation, score_result in zip(entries, evaluations, score_results, strict=True):
+        save_score(cache, worker, match, job, entry, evaluation, score_result["score"])
+
+
+def save_score(  # noqa: PLR0913
+    cache: Cache,
+    worker: ScoreWorker,
+    match: Match,
+    job: ScoreJob,
+    entry: ScoreEntry,
+    evaluation: Current,
+    score: float,
+) -> None:
+    """Save the score of a trial, delete its message, and append the trial to the cache.
+
+    Args:
+        cache (Cache): The cache of the histories, loaded for the participant.
+        worker (ScoreWorker): The resources of the worker.
+        match (Match): The match.
+        job (ScoreJob): The score job the message belongs to.
+        entry (ScoreEntry): The message of the trial.
+        evaluation (Current): The evaluation of the trial.
+        score (float): The score.
+    """
+    message = entry["message"]
+    trial: Trial = {
+        "trial_no": evaluation["trial_no"],
+        "objective": evaluation["objective"],
+        "constraint": evaluation["constraint"],
+        "info": evaluation["info"],
+        "feasible": evaluation["feasible"],
+        "score": score,
+    }
+
+    LOGGER.info("Saving Score...")
+
+    LOGGER.debug(
+        "Trial written to cache: match_id: %s, participant_id: %s\n%s",
+        match["id"],
+        message["participant_id"],
+        trial,
+    )
+
+    save_success_score(
+        worker["dynamodb"],
+        {
+            "match_id": match["id"],
+            "participant_id": message["participant_id"],
+            "trial_no": message["trial_no"],
+            "created_at": get_utcnow(),
+            "started_at": cast(str, job["started_at"]),
+            "finished_at": cast(str, job["finished_at"]),
+            "score": score,
+        },
+    )
+
+    LOGGER.debug(
+        {
+            "match_id": match["id"],
+            "participant_id": message["participant_id"],
+            "trial_no": message["trial_no"],
+            "created_at": get_utcnow(),
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "score": score,
+        },
+    )
+    LOGGER.info("...Saved")
+
+    worker["sqs"].delete_message_from_queue(entry["receipt_handle"])
+
+    try:
+        cache.append(trial)  # append trial scored in this iteration to the cache
+    except CacheWriteError:
+        msg = "Failed to write to cache."
+        LOGGER.warning(msg)
 
-            save_success_score(
-                dynamodb,
-                {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "score": score_result["score"],
-                },
-            )
 
-            LOGGER.debug(
-                {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "score": score_result["score"],
-                },
+def save_failed_entry(
+    worker: ScoreWorker,
+    job: ScoreJob,
+    entry: ScoreEntry,
+    error_msg: str,
+    admin_error_msg: str,
+) -> None:
+    """Save the score of a message as failed and delete the message.
+
+    Args:
+        worker (ScoreWorker): The resources of the worker.
+        job (ScoreJob): The score job the message belongs to.
+        entry (ScoreEntry): The message.
+        error_msg (str): The error message to show to the participant.
+        admin_error_msg (str): The error message to show to the admin.
+    """
+    message = entry["message"]
+    try:
+        failed_score: FailedScoreCreateParams = {
+            "match_id": "Match#" + message["match_id"],
+            "participant_id": message["participant_id"],
+            "trial_no": message["trial_no"],
+            "created_at": get_utcnow(),
+            "started_at": job["started_at"] if job["started_at"] is not None else get_utcnow(),
+            "finished_at": job["finished_at"] if job["finished_at"] is not None else get_utcnow(),
+            "error_message": truncate_text_center(error_msg, 16384),
+            "admin_error_message": truncate_text_center(admin_error_msg, 16384),
+        }
+        LOGGER.info("Saving Failed Score...")
+        LOGGER.debug("Failed Score: %s", failed_score)
+        save_failed_score(worker["dynamodb"], failed_score)
+        LOGGER.info("...Saved")
+        worker["sqs"].delete_message_from_queue(entry["receipt_handle"])
+    except Exception:
+        LOGGER.exception("Error occurred while handling failed score.")
+        LOGGER.exception(format_exc())
+
+
+def save_interrupted_scores(pool: WorkerPool[ScoreWorker, ScoreJob]) -> None:
+    """Save the score calculations in flight as failed when the process is interrupted.
+
+    Args:
+        pool (WorkerPool[ScoreWorker, ScoreJob]): The pool of the scoring workers.
+    """
+    admin_error_msg = format_exc()
+    for worker, job in pool.take_over():
+        for entry in job["entries"]:
+            save_failed_entry(worker, job, entry, "Internal Server Error", admin_error_msg)
+
+
+def calculate_score(process_name: str, args: Args) -> None:  # noqa: PLR0915
+    """The function that controls the score calculation process.
+
+    Up to `args["concurrency"]` scores are calculated at the same time. Each worker has its own DynamoDB instance,
+    while the SQS instance (message buffer and visibility extender) is shared.
+    The messages of different participants are scored concurrently,
+    while the messages of the same participant are scored in trial order, one job at a time.
+    A message received before the message of the previous trial is held for up to `args["reorder_wait"]` seconds
+    until the previous trial is submitted or settled. A message of a participant whose job is running is held until
+    the job has finished, so the workers never wait for each other.
+
+    Args:
+        process_name (str): The process name
+        args (Args): The arguments.
+    """
+    sqs = setup_sqs(args)
+    containers = setup_persistent_containers(args)
+    workers = setup_workers(args, sqs, containers)
+    running = RunningKeys()
+    reorder = setup_reorder_buffer(args, running)
+    cache = Cache(args["cache_max_trials"], args["cache_format"])  # cache for the trials history
+    pool: WorkerPool[ScoreWorker, ScoreJob] = WorkerPool(
+        workers,
+        lambda worker, job, claim: run_score_job(process_name, args, running, cache, worker, job, claim),
+    )
+
+    n_score = 0
+
+    try:
+        while True:
+            if args["num"] > 0 and n_score >= args["num"]:
+                LOGGER.info("Reached the maximum number of scores.")
+                break
+
+            worker = pool.acquire()
+
+            if is_stop_flag_set(process_name):
+                msg = f"Stop flag detected. Stop Scorer on the process {process_name}."
+                LOGGER.info(msg)
+                sys.exit(0)
+
+            limit = (
+                min(args["num"] - n_score, args["score_batch_size"]) if args["num"] > 0 else args["score_batch_size"]
             )
-            LOGGER.info("...Saved")
-
-            sqs.delete_message_from_queue()
-
-            try:
-                cache.append(
-                    {
-                        "trial_no": evaluation["trial_no"],
-                        "objective": evaluation["objective"],
-                        "constraint": evaluation["constraint"],
-                        "info": evaluation["info"],
-                        "feasible": evaluation["feasible"],
-                        "score": score_result["score"],
-                    },
-                )  # append trial scored in this iteration to the cache
-            except CacheWriteError:
-                msg = "Failed to write to cache."
-                LOGGER.warning(msg)
-
-        except (Exception, KeyboardInterrupt) as error:
-            if isinstance(error, KeyboardInterrupt):
-                signal.signal(signal.SIGTERM, signal.SIG_IGN)
-                signal.signal(signal.SIGINT, signal.SIG_IGN)
-            try:
-                started_at = started_at if started_at is not None else get_utcnow()
-                finished_at = finished_at if finished_at is not None else get_utcnow()
-                error_msg = format_exc() if isinstance(error, ContainerRuntimeError) else "Internal Server Error"
-                admin_error_msg = format_exc()
-                failed_score: FailedScoreCreateParams = {
-                    "match_id": match["id"],
-                    "participant_id": message["participant_id"],
-                    "trial_no": message["trial_no"],
-                    "created_at": get_utcnow(),
-                    "started_at": started_at,
-                    "finished_at": finished_at,
-                    "error_message": truncate_text_center(error_msg, 16384),
-                    "admin_error_message": truncate_text_center(admin_error_msg, 16384),
-                }
-                LOGGER.exception("Error occurred while calculating score.")
-                LOGGER.info("Saving Failed Score...")
-                LOGGER.debug("Failed Score: %s", failed_score)
-                save_failed_score(dynamodb, failed_score)
-                LOGGER.info("...Saved")
-                sqs.delete_message_from_queue()
-            except Exception:
-                LOGGER.exception("Error occurred while handling failed score.")
-                LOGGER.exception(format_exc())
-            if isinstance(error, KeyboardInterrupt):
-                signal.signal(signal.SIGTERM, signal.SIG_DFL)
-                signal.signal(signal.SIGINT, signal.SIG_DFL)
-                sys.exit(1)
-            continue
+            # Receive no more messages than the idle workers can take soon, leaving the rest to the other processes.
+            entry = receive_entry(args, sqs, reorder, process_name, pool.idle_count + limit)
+            if entry is None:
+                pool.release(worker)
+                continue
+
+            LOGGER.info("==================== Calculating score: %d ====================", n_score + 1)
+
+            job = collect_batch(args, sqs, reorder, entry, limit)
+            n_score += len(job["entries"])
+
+            # The key is added here, on the main thread, so the reorder buffer holds the next trials until the job ends.
+            key = get_participant_key(entry["message"])
+            running.add(key)
+            pool.submit(worker, job)
+            reorder.mark_submitted(key, int(job["entries"][-1]["message"]["trial_no"]))
+
+    except SystemExit as error:
+        if error.code == 0:  # stop flag detected: let the score calculations in flight finish
+            pool.join()
+        else:
+            save_interrupted_scores(pool)
+        raise
+    except KeyboardInterrupt:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        LOGGER.exception("Scorer interrupted.")
+        save_interrupted_scores(pool)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        sys.exit(1)
+    else:
+        pool.join()
+    finally:
+        LOGGER.info("History cache: %d hits, %d misses", cache.hits, cache.misses)
+        close_scorer(sqs, reorder, containers)
+
+
+def close_scorer(
+    sqs: ScorerSQS,
+    reorder: ReorderBuffer[ScoreEntry],
+    containers: PersistentContainerPool | None,
+) -> None:
+    """Release the held messages and close the SQS instance and the persistent containers before exiting.
+
+    Args:
+        sqs (ScorerSQS): The SQS instance.
+        reorder (ReorderBuffer[ScoreEntry]): The buffer of the messages held until the previous trial is settled.
+        containers (PersistentContainerPool | None): The pool of persistent containers, or None if disabled.
+    """
+    for held in reorder.release_all():
+        sqs.release_message(held["receipt_handle"])
+    sqs.close()
+    if containers is not None:
+        containers.close()
@@ -0,0 +1,157 @@
+"""This module provides a buffer to put the score messages received out of order back in trial order."""
+
+import logging
+from collections.abc import Callable
+from time import monotonic
+from typing import Generic, TypedDict, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+E = TypeVar("E")  # The entry of a message.
+
+RECHECK_SECONDS = 1.0  # the minimum interval to check again whether the previous trial of a held entry is settled
+MAX_POLL_SECONDS = 20  # the maximum time to wait for a message while entries are held
+
+
+class HeldTrial(TypedDict):
+    """The state of a trial held until the trial before it is settled.
+
+    key (str): The key of the participant.
+    trial_no (int): The trial number.
+    deadline (float): The monotonic time when the entry is released even if the previous trial is not settled.
+    checked_at (float | None): The monotonic time when it was last checked whether the previous trial is settled.
+    """
+
+    key: str
+    trial_no: int
+    deadline: float
+    checked_at: float | None
+
+
+class ReorderBuffer(Generic[E]):
+    """Hold the entries whose previous trial has been neither submitted nor settled, for up to a bounded time.
+
+    Standard SQS queues deliver the messages out of order. A trial scored before the trial preceding it has no
+    complete history, so the entry is held until the previous trial is submitted by this process or settled by another
+    one, or until the wait expires. Regardless of the wait, an entry is also held while a job of its participant is
+    running, so that a submitted trial has been scored or dropped before the entry released after it is scored.
+    The held messages stay tracked by the visibility extender.
+    The buffer is used only by the thread receiving the messages.
+    """
+
+    def __init__(self, wait: float, is_settled: Callable[[E], bool], is_running: Callable[[str], bool]) -> None:
+        """Initialize the buffer.
+
+        Args:
+            wait (float): The maximum seconds to hold an entry until the previous trial is submitted or settled.
+                If 0, the entries are held only while a job of the participant is running.
+            is_settled (Callable[[E], bool]): The function to check whether the trial before an entry is settled
+                (e.g. scored by another process).
+            is_running (Callable[[str], bool]): The function to check whether a job of a participant is running.
+        """
+        self.__wait = wait
+        self.__is_settled = is_settled
+        self.__is_running = is_running
+        self.__held: list[tuple[HeldTrial, E]] = []
+        self.__submitted: dict[str, int] = {}  # the latest trial number submitted for each participant
+
+    def __len__(self) -> int:
+        """The number of the held entries."""
+        return len(self.__held)
+
+    def add(self, entry: E, key: str, trial_no: int) -> None:
+        """Add a received entry to the buffer.
+
+        Args:
+            entry (E): The entry.
+            key (str): The key of the participant.
+            trial_no (int): The trial number.
+        """
+        trial: HeldTrial = {"key": key, "trial_no": trial_no, "deadline": monotonic() + self.__wait, "checked_at": None}
+        self.__held.append((trial, entry))
+        self.__held.sort(key=lambda held: (held[0]["key"], held[0]["trial_no"]))
+
+    def pop_ready(self) -> E | None:
+        """Take the first entry that is ready to score out of the buffer.
+
+        An entry is ready if no job of the participant is running, and if the previous trial has been submitted or
+        settled or the wait has expired.
+
+        Returns:
+            E | None: The entry, or None if no entry is ready.
+        """
+        now = monotonic()
+        for index, (trial, entry) in enumerate(self.__held):
+            if self.__is_ready(trial, entry, now):
+                return self.__held.pop(index)[1]
+        return None
+
+    def take(self, key: str, trial_no: int) -> E | None:
+        """Take the held entry of a trial out of the buffer, e.g. to score it together with the trial before it.
+
+        Args:
+            key (str): The key of the participant.
+            trial_no (int): The trial number.
+
+        Returns:
+            E | None: The entry, or None if it is not held.
+        """
+        for index, (trial, _) in enumerate(self.__held):
+            if trial["key"] == key and trial["trial_no"] == trial_no:
+                return self.__held.pop(index)[1]
+        return None
+
+    def mark_submitted(self, key: str, trial_no: int) -> None:
+        """Record that the trial has been submitted to score, so that the trial after it is ready after the job.
+
+        Args:
+            key (str): The key of the participant.
+            trial_no (int): The trial number.
+        """
+        self.__submitted[key] = max(self.__submitted.get(key, 0), trial_no)
+
+    def poll_seconds(self) -> int | None:
+        """The seconds to wait for a message before checking the held entries again.
+
+        Returns:
+            int | None: The seconds, or None if no entry is held.
+        """
+        if len(self.__held) == 0:
+            return None
+        now = monotonic()
+        due = min(min(trial["deadline"], (trial["checked_at"] or now) + RECHECK_SECONDS) for trial, _ in self.__held)
+        return min(max(int(due - now) + 1, 1), MAX_POLL_SECONDS)
+
+    def release_all(self) -> list[E]:
+        """Take all the held entries out of the buffer, e.g. to make their messages visible again before exiting.
+
+        Returns:
+            list[E]: The entries.
+        """
+        entries = [entry for _, entry in self.__held]
+        self.__held.clear()
+        return entries
+
+    def __is_ready(self, trial: HeldTrial, entry: E, now: float) -> bool:
+        """Check whether a held entry is ready to score.
+
+        Args:
+            trial (HeldTrial): The state of the held trial.
+            entry (E): The entry.
+            now (float): The current monotonic time.
+
+        Returns:
+            bool: True if the entry is ready, False otherwise.
+        """
+        if self.__is_running(trial["key"]):  # checked again when the job has finished, even after the wait expires
+            return False
+        if self.__submitted.get(trial["key"], 0) >= trial["trial_no"] - 1:
+            return True
+        if now >= trial["deadline"]:
+            if self.__wait > 0:
+                LOGGER.warning("The trial before %s#%d is not settled in time.", trial["key"], trial["trial_no"])
+            return True
+        if trial["checked_at"] is not None and now < trial["checked_at"] + RECHECK_SECONDS:
+            return False
+        trial["checked_at"] = now
+        return self.__is_settled(entry)
@@ -1,17 +1,90 @@
 """This module provides utility functions for Docker."""
 
+import logging
 import sys
+from threading import Lock
+from time import monotonic
 
 import click
 import docker
 from docker.errors import DockerException
 
+LOGGER = logging.getLogger(__name__)
 
-def check_docker() -> None:
-    """Check if Docker is running and accessible."""
+MIN_POOL_SIZE = 10  # the default pool size of docker-py
+CONNECTIONS_PER_WORKER = 2  # a worker uses a connection for the API requests and another for the attach socket
+HEALTH_CHECK_INTERVAL = 30.0  # the seconds after which the connection to the daemon is checked again
+
+
+class ManagedDockerClient:
+    """A Docker client shared by the workers of the process, connecting to the daemon again when it is lost.
+
+    The client keeps a pool of connections to the daemon, so the executions reuse the connections instead of
+    opening new ones. The connection is checked with a ping at most every HEALTH_CHECK_INTERVAL seconds,
+    and the client connects again if the check fails (e.g. after the daemon restarted).
+    """
+
+    def __init__(self) -> None:
+        """Initialize the client. It connects to the daemon when it is first used."""
+        self.__lock = Lock()
+        self.__client: docker.DockerClient | None = None
+        self.__max_pool_size = MIN_POOL_SIZE
+        self.__checked_at = 0.0  # the time (time.monotonic) when the connection was last checked
+
+    def configure(self, concurrency: int) -> None:
+        """Size the connection pool for the number of workers. The client connects again when it is next used.
+
+        Args:
+            concurrency (int): The number of workers running containers at the same time.
+        """
+        with self.__lock:
+            self.__max_pool_size = max(concurrency * CONNECTIONS_PER_WORKER, MIN_POOL_SIZE)
+            self.__close()
+
+    def get(self) -> docker.DockerClient:
+        """Get the client, connecting to the daemon if needed.
+
+        Returns:
+            docker.DockerClient: The Docker client.
+        """
+        with self.__lock:
+            if self.__client is not None and monotonic() - self.__checked_at > HEALTH_CHECK_INTERVAL:
+                try:
+                    self.__client.ping()
+                except Exception:
+                    LOGGER.warning("Lost the connection to the Docker daemon. Reconnecting...")
+                    self.__close()
+                else:
+                    self.__checked_at = monotonic()
+            if self.__client is None:
+                LOGGER.info("Connect to docker daemon...")
+                self.__client = docker.from_env(max_pool_size=self.__max_pool_size)
+                self.__checked_at = monotonic()
+                LOGGER.info("...Connected")
+            return self.__client
+
+    def __close(self) -> None:
+        """Close the client and its connections."""
+        if self.__client is not None:
+            try:
+                self.__client.close()
+            except Exception:
+                LOGGER.warning("Failed to close the Docker client.")
+            self.__client = None
+
+
+DOCKER_CLIENT = ManagedDockerClient()  # the Docker client shared in the process
+
+
+def check_docker(concurrency: int = 1) -> None:
+    """Check if Docker is running and accessible.
+
+    Args:
+        concurrency (int): The number of workers running containers at the same time.
+    """
     try:
-        client = docker.from_env()
-        client.ping()
+        DOCKER_CLIENT.configure(concurrency)
+        DOCKER_CLIENT.get().ping()
     except DockerException as error:
         click.echo(
             f"Error: Unable to communicate with Docker. Please ensure Docker is running and accessible. ({error!s})",
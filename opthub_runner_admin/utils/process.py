@@ -75,9 +75,6 @@ def is_stop_flag_set(process_name: str) -> bool:
             with lock:  # noqa: SIM117
                 with Path(flag_file).open("r") as file:
                     stop_flag: bool = json.load(file)["stop_flag"]
-                    from time import sleep
-
-                    sleep(30)
         except Timeout as e:
             if attempt == retry_num:
                 msg = f"Failed to read {flag_file}."
@@ -0,0 +1,196 @@
+"""This module provides a pool of workers to run evaluations and score calculations concurrently."""
+
+import logging
+from collections.abc import Callable
+from queue import Queue
+from threading import Lock, Thread
+from typing import Generic, TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+R = TypeVar("R")  # The resources owned by a worker.
+J = TypeVar("J")  # The job run by a worker.
+
+
+class WorkerPool(Generic[R, J]):
+    """A fixed number of workers, each owning its own resources, that run jobs concurrently.
+
+    Jobs run on daemon threads, so the process can exit without waiting for the running containers.
+    The jobs in flight are tracked so that the main thread can take them over (e.g. to save them as failed
+    when the process is interrupted). A SystemExit or KeyboardInterrupt raised by a job (e.g. sys.exit on a fatal
+    error) would only end its thread, so it is raised again on the main thread by `acquire` and `join`.
+    """
+
+    def __init__(self, resources: list[R], target: Callable[[R, J, Callable[[], bool]], None]) -> None:
+        """Initialize the pool.
+
+        Args:
+            resources (list[R]): The resources of each worker. The number of resources is the number of workers.
+            target (Callable[[R, J, Callable[[], bool]], None]): The function to run a job.
+                It receives the resources of the worker, the job, and a function to claim the job.
+                The claim function returns False if the job has already been taken over by `take_over`,
+                in which case the worker must not save the result.
+        """
+        if len(resources) == 0:
+            msg = "At least one worker is required."
+            raise ValueError(msg)
+
+        self.__idle: Queue[R] = Queue()
+        for resource in resources:
+            self.__idle.put(resource)
+        self.__size = len(resources)
+        self.__target = target
+
+        self.__lock = Lock()
+        self.__in_flight: dict[int, tuple[R, J]] = {}
+        self.__next_job_id = 0
+        self.__stopped: SystemExit | KeyboardInterrupt | None = None  # the first exit requested by a job
+
+    @property
+    def size(self) -> int:
+        """The number of workers."""
+        return self.__size
+
+    @property
+    def idle_count(self) -> int:
+        """The number of idle workers, not counting the reserved ones."""
+        return self.__idle.qsize()
+
+    def acquire(self) -> R:
+        """Wait until a worker is idle and reserve it.
+
+        Raises:
+            SystemExit | KeyboardInterrupt: If a job has requested to exit the process.
+
+        Returns:
+            R: The resources of the reserved worker.
+        """
+        resource = self.__idle.get()
+        if self.__stopped is not None:
+            self.__idle.put(resource)
+            raise self.__stopped
+        return resource
+
+    def release(self, resource: R) -> None:
+        """Return a reserved worker to the pool without running a job.
+
+        Args:
+            resource (R): The resources of the worker.
+        """
+        self.__idle.put(resource)
+
+    def submit(self, resource: R, job: J) -> None:
+        """Run a job on a reserved worker.
+
+        Args:
+            resource (R): The resources of the reserved worker.
+            job (J): The job to run.
+        """
+        with self.__lock:
+            job_id = self.__next_job_id
+            self.__next_job_id += 1
+            self.__in_flight[job_id] = (resource, job)
+
+        thread = Thread(target=self.__run, args=(job_id, resource, job), daemon=True)
+        thread.start()
+
+    def take_over(self) -> list[tuple[R, J]]:
+        """Take over all the jobs in flight. The workers can no longer claim them.
+
+        Returns:
+            list[tuple[R, J]]: The resources and the jobs taken over.
+        """
+        with self.__lock:
+            jobs = list(self.__in_flight.values())
+            self.__in_flight.clear()
+        return jobs
+
+    def join(self) -> None:
+        """Wait until all the workers are idle.
+
+        Raises:
+            SystemExit | KeyboardInterrupt: If a job has requested to exit the process.
+        """
+        resources = [self.__idle.get() for _ in range(self.__size)]
+        for resource in resources:
+            self.__idle.put(resource)
+        if self.__stopped is not None:
+            raise self.__stopped
+
+    def __run(self, job_id: int, resource: R, job: J) -> None:
+        """Run a job and return the worker to the pool.
+
+        Args:
+            job_id (int): The ID of the job.
+            resource (R): The resources of the worker.
+            job (J): The job to run.
+        """
+        try:
+            self.__target(resource, job, lambda: self.__claim(job_id))
+        except (SystemExit, KeyboardInterrupt) as error:
+            LOGGER.warning("The worker requested to exit the process.")
+            with self.__lock:
+                if self.__stopped is None:
+                    self.__stopped = error
+        except Exception:
+            LOGGER.exception("Unexpected error occurred in the worker.")
+        finally:
+            with self.__lock:
+                self.__in_flight.pop(job_id, None)
+            self.__idle.put(resource)
+
+    def __claim(self, job_id: int) -> bool:
+        """Claim a job so that it is not taken over.
+
+        Args:
+            job_id (int): The ID of the job.
+
+        Returns:
+            bool: True if the job is claimed, False if it has already been taken over.
+        """
+        with self.__lock:
+            return self.__in_flight.pop(job_id, None) is not None
+
+
+class RunningKeys:
+    """The keys of the jobs in flight, shared by the thread submitting the jobs and the workers.
+
+    The thread submitting the jobs adds the key of a job when it submits the job, and the worker discards the key when
+    the job has finished. A job whose key is running is kept by the submitting thread instead of being submitted,
+    so the jobs sharing a key run one at a time without making the workers wait for each other.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the keys."""
+        self.__lock = Lock()
+        self.__keys: set[str] = set()
+
+    def __contains__(self, key: object) -> bool:
+        """Check if a job with the key is running.
+
+        Args:
+            key (object): The key of the job.
+
+        Returns:
+            bool: True if a job with the key is running, False otherwise.
+        """
+        with self.__lock:
+            return key in self.__keys
+
+    def add(self, key: str) -> None:
+        """Record that a job with the key has been submitted.
+
+        Args:
+            key (str): The key of the job.
+        """
+        with self.__lock:
+            self.__keys.add(key)
+
+    def discard(self, key: str) -> None:
+        """Record that the job with the key has finished.
+
+        Args:
+            key (str): The key of the job.
+        """
+        with self.__lock:
+            self.__keys.discard(key)
@@ -1,6 +1,17 @@
 """Tests for docker_executor.py."""
 
-from opthub_runner_admin.lib.docker_executor import execute_in_docker
+import socket
+import struct
+from time import monotonic
+
+import pytest
+
+from opthub_runner_admin.lib.docker_executor import (
+    StdoutReader,
+    execute_in_docker,
+    parse_stdout_lines,
+    start_stdin_writer,
+)
 
 
 def test_execute_in_docker() -> None:
@@ -38,3 +49,89 @@ def test_execute_in_docker() -> None:
     if "score" not in std_out:
         msg = "score is not in std_out"
         raise ValueError(msg)
+
+
+def test_stdout_reader() -> None:
+    """Test StdoutReader class."""
+    sock, peer = socket.socketpair()
+
+    def frame(stream: int, payload: bytes) -> bytes:
+        return struct.pack(">BxxxL", stream, len(payload)) + payload
+
+    peer.sendall(
+        frame(1, b'progress\n{"objec')
+        + frame(2, b"stderr is ignored\n")
+        + frame(1, b'tive": 1.0}\n')
+        + frame(1, b"last line"),
+    )
+    peer.close()
+
+    reader = StdoutReader(sock)
+    lines = [reader.readline(monotonic() + 10) for _ in range(4)]
+
+    if lines != ["progress", '{"objective": 1.0}', "last line", None]:
+        msg = f"lines are not correct: {lines}"
+        raise ValueError(msg)
+
+
+def test_stdout_reader_long_lines() -> None:
+    """Test that the lines longer than the limit are truncated, whether or not they end in the same frame."""
+    sock, peer = socket.socketpair()
+
+    def frame(stream: int, payload: bytes) -> bytes:
+        return struct.pack(">BxxxL", stream, len(payload)) + payload
+
+    peer.sendall(
+        frame(1, b"short\n0123456789abcdef\n0123")
+        + frame(1, b"456789")
+        + frame(1, b"abcdef")
+        + frame(1, b"ghi\nnext\nlast 0123456789"),
+    )
+    peer.close()
+
+    reader = StdoutReader(sock, max_line_bytes=8)
+    lines = [reader.readline(monotonic() + 10) for _ in range(6)]
+
+    if lines != ["short", "01234567", "01234567", "next", "last 012", None]:
+        msg = f"lines are not correct: {lines}"
+        raise ValueError(msg)
+
+
+def test_stdout_reader_timeout() -> None:
+    """Test StdoutReader class when no line is written."""
+    sock, peer = socket.socketpair()
+    reader = StdoutReader(sock)
+
+    with pytest.raises(TimeoutError):
+        reader.readline(monotonic() + 0.1)
+
+    peer.close()
+
+
+def test_start_stdin_writer() -> None:
+    """Test that the standard input is sent while the standard output is not read yet, and then closed."""
+    sock, peer = socket.socketpair()
+    std_in = [b"x" * 1023 + b"\n" for _ in range(1024)]  # larger than the socket buffers
+
+    writer = start_stdin_writer(sock, std_in, close=True)
+    received = b""
+    peer.settimeout(10)
+    while chunk := peer.recv(65536):  # until the end of stdin
+        received += chunk
+    writer.join(timeout=10)
+
+    if received != b"".join(std_in) or writer.is_alive():
+        msg = "The standard input is not sent."
+        raise ValueError(msg)
+
+
+def test_parse_stdout_lines() -> None:
+    """Test parse_stdout_lines function."""
+    outs = parse_stdout_lines('progress\n{"objective": 1.0}\n\n{"objective": 2.0}\n', 2)
+    if outs != [{"objective": 1.0}, {"objective": 2.0}]:
+        msg = f"outs != [{{'objective': 1.0}}, {{'objective': 2.0}}]: {outs}"
+        raise ValueError(msg)
+
+    if parse_stdout_lines('{"objective": 1.0}\n', 2) is not None:
+        msg = "outs is not None though stdout has fewer lines"
+        raise ValueError(msg)
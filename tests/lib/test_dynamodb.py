@@ -3,10 +3,19 @@
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from typing import Any
 
+import pytest
 import yaml
 
-from opthub_runner_admin.lib.dynamodb import DynamoDB, DynamoDBOptions, PrimaryKey
+from opthub_runner_admin.lib import dynamodb as dynamodb_module
+from opthub_runner_admin.lib.dynamodb import (
+    MAX_BATCH_GET_ATTEMPTS,
+    DynamoDB,
+    DynamoDBOptions,
+    PrimaryKey,
+    UnprocessedKeysError,
+)
 from opthub_runner_admin.models.schema import SolutionSchema
 
 
@@ -74,6 +83,16 @@ def test_dynamodb() -> None:
         if got_items != expected_got_items:
             msg = f"expected_got_items: {expected_got_items}, but got_items: {got_items}"
             raise ValueError(msg)
+
+        existing_keys = dynamodb.get_existing_keys(
+            [
+                PrimaryKey({"ID": "Solutions#Match#" + match_uuid + "#User#00010", "Trial": "00001"}),
+                PrimaryKey({"ID": "Solutions#Match#" + match_uuid + "#User#00010", "Trial": "00006"}),
+            ],
+        )
+        if existing_keys != [{"ID": "Solutions#Match#" + match_uuid + "#User#00010", "Trial": "00001"}]:
+            msg = f"existing_keys: {existing_keys}"
+            raise ValueError(msg)
     finally:
         for i in range(5):
             dynamodb.client.delete_item(
@@ -154,3 +173,38 @@ def test_dynamodb_with_same_item() -> None:
                 TableName=dynamodb.table_name,
                 Key={"ID": put_items[i]["ID"], "Trial": put_items[i]["Trial"]},
             )
+
+
+def test_batch_get_items_unprocessed(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the unprocessed keys are requested again, up to MAX_BATCH_GET_ATTEMPTS times."""
+    monkeypatch.setattr(dynamodb_module, "sleep", lambda _: None)
+    requests: list[int] = []
+
+    class Resource:
+        def __init__(self, n_throttled: int) -> None:
+            self.n_throttled = n_throttled
+
+        def batch_get_item(self, RequestItems: dict[str, Any]) -> dict[str, Any]:  # noqa: N803
+            keys = RequestItems["table"]["Keys"]
+            requests.append(len(keys))
+            if len(requests) <= self.n_throttled:  # only the first key is processed
+                return {"Responses": {"table": keys[:1]}, "UnprocessedKeys": {"table": {"Keys": keys[1:]}}}
+            return {"Responses": {"table": keys}, "UnprocessedKeys": {}}
+
+    dynamodb = DynamoDB(
+        {"region_name": "ap-northeast-1", "aws_access_key_id": "", "aws_secret_access_key": "", "table_name": "table"},
+    )
+    keys: list[PrimaryKey] = [{"ID": "ID", "Trial": str(i)} for i in range(10)]
+
+    dynamodb.dynamoDB = Resource(3)  # type: ignore[assignment]
+    if len(dynamodb.batch_get_items(keys, [])) != len(keys) or requests != [10, 9, 8, 7]:
+        msg = f"The unprocessed keys are not requested again: {requests}"
+        raise ValueError(msg)
+
+    requests.clear()
+    dynamodb.dynamoDB = Resource(MAX_BATCH_GET_ATTEMPTS)  # type: ignore[assignment]
+    with pytest.raises(UnprocessedKeysError):
+        dynamodb.batch_get_items(keys, [])
+    if len(requests) != MAX_BATCH_GET_ATTEMPTS:
+        msg = f"The keys are requested {len(requests)} times."
+        raise ValueError(msg)
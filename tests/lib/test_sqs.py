@@ -3,11 +3,24 @@
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
+from threading import Event
+from typing import Any
 
+import botocore.exceptions
 import yaml
 
 from opthub_runner_admin.lib.dynamodb import DynamoDB, DynamoDBOptions
-from opthub_runner_admin.lib.sqs import EvaluationMessage, EvaluatorSQS, ScoreMessage, ScorerSQS, SQSOptions
+from opthub_runner_admin.lib.sqs import (
+    RETRY_VISIBILITY_TIMEOUT,
+    AckCollector,
+    EvaluationMessage,
+    EvaluatorSQS,
+    RunnerSQS,
+    ScoreMessage,
+    ScorerSQS,
+    SQSOptions,
+    VisibilityManager,
+)
 from opthub_runner_admin.models.schema import FailedEvaluationSchema, SolutionSchema, SuccessEvaluationSchema
 
 
@@ -196,3 +209,249 @@ def test_scorer_sqs() -> None:
             raise ValueError(msg)
 
         messages.remove(expected_message)
+
+
+def test_visibility_manager() -> None:
+    """Test that VisibilityManager extends the messages due in batches of up to 10."""
+    requests: list[list[dict[str, Any]]] = []
+    extended = Event()
+
+    class Client:
+        def change_message_visibility_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            requests.append(Entries)
+            if sum(len(entries) for entries in requests) == 11:  # noqa: PLR2004
+                extended.set()
+            return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    manager = VisibilityManager(Client(), "queue_url")  # type: ignore[arg-type]
+    manager.track([f"handle{i}" for i in range(12)])
+    manager.untrack("handle0")
+    manager.start()
+
+    if not extended.wait(timeout=5):
+        msg = "The visibility timeouts are not extended."
+        raise ValueError(msg)
+
+    if [len(entries) for entries in requests] != [10, 1]:
+        msg = f"The batches are not split into 10 entries: {[len(entries) for entries in requests]}"
+        raise ValueError(msg)
+    handles = [entry["ReceiptHandle"] for entries in requests for entry in entries]
+    if "handle0" in handles:
+        msg = "The untracked message is extended."
+        raise ValueError(msg)
+    if any(entry["VisibilityTimeout"] != 16 for entries in requests for entry in entries):  # noqa: PLR2004
+        msg = "The visibility timeouts are not doubled."
+        raise ValueError(msg)
+
+
+def test_visibility_manager_failed() -> None:
+    """Test that the failed extensions are retried unless the receipt handle is invalid."""
+    requests: list[list[str]] = []
+    retried = Event()
+
+    class Client:
+        def change_message_visibility_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            requests.append([entry["ReceiptHandle"] for entry in Entries])
+            if len(requests) == 1:
+                return {
+                    "Successful": [],
+                    "Failed": [
+                        {
+                            "Id": entry["Id"],
+                            "SenderFault": entry["ReceiptHandle"] == "invalid",
+                            "Code": "ReceiptHandleIsInvalid"
+                            if entry["ReceiptHandle"] == "invalid"
+                            else "InternalError",
+                        }
+                        for entry in Entries
+                    ],
+                }
+            retried.set()
+            return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    manager = VisibilityManager(Client(), "queue_url")  # type: ignore[arg-type]
+    manager.track(["invalid", "failed"])
+    manager.start()
+
+    if not retried.wait(timeout=5):
+        msg = "The failed extension is not retried."
+        raise ValueError(msg)
+    if requests[1] != ["failed"]:
+        msg = f"The retried messages are wrong: {requests}"
+        raise ValueError(msg)
+    if "invalid" in manager.timeouts:
+        msg = "The message with an invalid receipt handle is still tracked."
+        raise ValueError(msg)
+
+
+def test_visibility_manager_error() -> None:
+    """Test that the thread survives any error of a request and retries the messages."""
+    requests: list[list[str]] = []
+    retried = Event()
+
+    class Client:
+        def change_message_visibility_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            requests.append([entry["ReceiptHandle"] for entry in Entries])
+            if len(requests) == 1:
+                raise botocore.exceptions.EndpointConnectionError(endpoint_url="queue_url")
+            if len(requests) == 2:  # noqa: PLR2004
+                msg = "Unexpected error"
+                raise RuntimeError(msg)
+            retried.set()
+            return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    manager = VisibilityManager(Client(), "queue_url")  # type: ignore[arg-type]
+    manager.track(["handle"])
+    manager.start()
+
+    if not retried.wait(timeout=10):
+        msg = "The extension is not retried after the errors."
+        raise ValueError(msg)
+    if requests != [["handle"]] * 3:
+        msg = f"The retried messages are wrong: {requests}"
+        raise ValueError(msg)
+
+
+def test_ack_collector() -> None:
+    """Test that AckCollector deletes the messages in batches and retries the failed ones."""
+    requests: list[list[str]] = []
+
+    class Client:
+        def delete_message_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            requests.append([entry["ReceiptHandle"] for entry in Entries])
+            failed = [entry for entry in Entries if entry["ReceiptHandle"] == "handle0" and len(requests) == 1]
+            return {
+                "Successful": [{"Id": entry["Id"]} for entry in Entries if entry not in failed],
+                "Failed": [{"Id": entry["Id"], "SenderFault": False, "Code": "InternalError"} for entry in failed],
+            }
+
+    visibility = VisibilityManager(Client(), "queue_url")  # type: ignore[arg-type]
+    visibility.track([f"handle{i}" for i in range(12)])
+    acks = AckCollector(Client(), "queue_url", visibility)  # type: ignore[arg-type]
+    for i in range(12):
+        acks.add(f"handle{i}")
+    acks.close()
+
+    if [len(handles) for handles in requests] != [10, 3]:
+        msg = f"The messages are not deleted in batches: {requests}"
+        raise ValueError(msg)
+    if sorted(requests[1]) != ["handle0", "handle10", "handle11"]:
+        msg = f"The failed message is not retried: {requests}"
+        raise ValueError(msg)
+    if visibility.timeouts:
+        msg = "The deleted messages are still extended."
+        raise ValueError(msg)
+
+
+def test_release_message() -> None:
+    """Test that only the messages neither deleted nor released are made visible again."""
+    released: list[str] = []
+    timeouts: list[int] = []
+
+    class Client:
+        def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int) -> None:  # noqa: N803, ARG002
+            released.append(ReceiptHandle)
+            timeouts.append(VisibilityTimeout)
+
+        def delete_message_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    sqs = RunnerSQS(
+        {
+            "queue_url": "queue_url",
+            "region_name": "ap-northeast-1",
+            "aws_access_key_id": "",
+            "aws_secret_access_key": "",
+        },
+    )
+    sqs.sqs = Client()  # type: ignore[assignment]
+    sqs.acks.client = Client()  # type: ignore[assignment]
+    sqs.visibility.track(["handle0", "handle1", "handle2", "handle3"])
+
+    sqs.delete_message_from_queue("handle0")  # being deleted
+    sqs.release_message("handle1")
+    sqs.release_message("handle1")  # already released
+    for handle in ["handle0", "handle1", "handle2"]:
+        sqs.release_message(handle)
+    sqs.acks.close()
+    sqs.release_message("handle0")  # deleted
+    sqs.release_unprocessed(["handle0", "handle1", "handle3"])
+
+    if released != ["handle1", "handle2", "handle3"]:
+        msg = f"The messages are not released once: {released}"
+        raise ValueError(msg)
+    if timeouts != [0, 0, RETRY_VISIBILITY_TIMEOUT]:
+        msg = f"The unprocessed messages are not released with the backoff: {timeouts}"
+        raise ValueError(msg)
+
+
+def test_fill_buffer_malformed() -> None:
+    """Test that the messages that can not be parsed are deleted instead of being buffered."""
+    deleted: list[str] = []
+
+    class Client:
+        def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int, WaitTimeSeconds: int) -> dict[str, Any]:  # noqa: N803, ARG002
+            return {
+                "Messages": [
+                    {"ReceiptHandle": "invalid_json", "Body": "{"},
+                    {"ReceiptHandle": "missing_field", "Body": '{"MatchID": "Match#1"}'},
+                    {
+                        "ReceiptHandle": "valid",
+                        "Body": '{"MatchID": "Match#1", "ParticipantID": "Team#1", "TrialNo": "00001"}',
+                    },
+                ],
+            }
+
+        def delete_message_batch(self, QueueUrl: str, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803, ARG002
+            deleted.extend(entry["ReceiptHandle"] for entry in Entries)
+            return {"Successful": [{"Id": entry["Id"]} for entry in Entries], "Failed": []}
+
+    sqs = EvaluatorSQS(
+        {
+            "queue_url": "queue_url",
+            "region_name": "ap-northeast-1",
+            "aws_access_key_id": "",
+            "aws_secret_access_key": "",
+        },
+    )
+    sqs.sqs = Client()  # type: ignore[assignment]
+    sqs.acks.client = Client()  # type: ignore[assignment]
+
+    sqs.fill_buffer(wait_time_seconds=0, max_messages=3)
+    message = sqs.get_message_from_queue(wait_time_seconds=0)
+    sqs.acks.close()
+
+    if message is None or message["participant_id"] != "Team#1" or len(sqs.buffer) != 0:
+        msg = f"The valid message is not buffered: {message}"
+        raise ValueError(msg)
+    if sorted(deleted) != ["invalid_json", "missing_field"]:
+        msg = f"The malformed messages are not deleted: {deleted}"
+        raise ValueError(msg)
+
+
+def test_fill_buffer_max_messages() -> None:
+    """Test that the number of messages requested is limited to between 1 and 10."""
+    requested: list[int] = []
+
+    class Client:
+        def receive_message(self, QueueUrl: str, MaxNumberOfMessages: int, WaitTimeSeconds: int) -> dict[str, Any]:  # noqa: N803, ARG002
+            requested.append(MaxNumberOfMessages)
+            return {"Messages": []}
+
+    sqs = EvaluatorSQS(
+        {
+            "queue_url": "queue_url",
+            "region_name": "ap-northeast-1",
+            "aws_access_key_id": "",
+            "aws_secret_access_key": "",
+        },
+    )
+    sqs.sqs = Client()  # type: ignore[assignment]
+
+    for max_messages in [2, 0, 30]:
+        sqs.fill_buffer(wait_time_seconds=0, max_messages=max_messages)
+    sqs.receive_sqs_message(wait_time_seconds=0)
+
+    if requested != [2, 1, 10, 1]:
+        msg = f"The numbers of messages requested are wrong: {requested}"
+        raise ValueError(msg)
@@ -8,7 +8,7 @@ import yaml
 
 from opthub_runner_admin.lib.dynamodb import DynamoDB
 from opthub_runner_admin.models.schema import SolutionSchema
-from opthub_runner_admin.models.solution import fetch_solution_by_primary_key
+from opthub_runner_admin.models.solution import fetch_solution_by_primary_key, fetch_solutions_to_evaluate
 
 
 def test_solution_model() -> None:
@@ -52,3 +52,18 @@ def test_solution_model() -> None:
     if solution["variable"] != [0.01, 0.01]:
         msg = "Variable is not correct."
         raise ValueError(msg)
+
+    # the same trial may be given twice, e.g. when its message is delivered twice
+    solutions = fetch_solutions_to_evaluate(
+        dynamodb,
+        "Match#" + match_uuid,
+        [("Team#1", "00001"), ("Team#1", "00002"), ("Team#1", "00001")],
+    )
+
+    if solutions != [
+        {"solution": {"variable": [0.01, 0.01]}, "evaluated": False},
+        {"solution": None, "evaluated": False},
+        {"solution": {"variable": [0.01, 0.01]}, "evaluated": False},
+    ]:
+        msg = f"Solutions are not correct: {solutions}"
+        raise ValueError(msg)
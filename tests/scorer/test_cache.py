@@ -1,8 +1,12 @@
 """Test for cache.py."""
 
+import json
+from pathlib import Path
+
 import pytest
 
 from opthub_runner_admin.scorer.cache import Cache, Trial
+from opthub_runner_admin.utils.dir import get_opthub_runner_dir
 
 
 def test_cache() -> None:
@@ -59,3 +63,98 @@ def test_cache() -> None:
     if cache.get_values() != values_of_cache1:
         msg = "cache.get_values() != values_of_cache1"
         raise ValueError(msg)
+
+
+def test_cache_lru() -> None:
+    """Test that Cache keeps the recently used histories in memory up to max_trials."""
+    cache = Cache(max_trials=2)
+    trial = Trial({"trial_no": "1", "objective": 0.1, "constraint": None, "info": {}, "score": 0.1, "feasible": True})
+
+    try:
+        cache.load("Match#LRU#Team#1")
+        cache.append(trial)
+        cache.load("Match#LRU#Team#2")
+        cache.append(trial)
+        cache.load("Match#LRU#Team#1")  # hit
+        cache.load("Match#LRU#Team#3")
+        cache.append(trial)  # Team#2 is evicted
+        cache.load("Match#LRU#Team#2")  # miss, read from the file
+
+        if cache.get_values() != [trial]:
+            msg = "cache.get_values() != [trial]"
+            raise ValueError(msg)
+        if (cache.hits, cache.misses) != (1, 4):
+            msg = f"(hits, misses) != (1, 4): {(cache.hits, cache.misses)}"
+            raise ValueError(msg)
+    finally:
+        for i in range(1, 4):
+            for extension in (".jsonl", ".jsonl.idx", ".jsonl.lock"):
+                Path.unlink(get_opthub_runner_dir() / "cache" / f"Match#LRU#Team#{i}{extension}", missing_ok=True)
+
+
+def test_cache_shared_file() -> None:
+    """Test that Cache reads the trials appended to the cache file by another instance (e.g. another process)."""
+    cache1 = Cache()
+    cache2 = Cache()
+    trials = [
+        Trial({"trial_no": str(i), "objective": 0.1, "constraint": None, "info": {}, "score": 0.1, "feasible": True})
+        for i in range(1, 4)
+    ]
+
+    try:
+        cache1.load("Match#Shared#Team#1")
+        cache1.append(trials[0])
+        cache2.load("Match#Shared#Team#1")
+        cache2.append(trials[1])
+
+        if cache1.get_values() != trials[:2]:
+            msg = f"cache1.get_values() != trials[:2]: {cache1.get_values()}"
+            raise ValueError(msg)
+
+        cache1.append(trials[2])
+        if cache2.get_latest_trial_no() != 3 or cache2.get_values() != trials:  # noqa: PLR2004
+            msg = f"cache2.get_values() != trials: {cache2.get_values()}"
+            raise ValueError(msg)
+
+        cache2.truncate_after(1)
+        if cache1.get_values() != trials[:1]:
+            msg = f"cache1.get_values() != trials[:1]: {cache1.get_values()}"
+            raise ValueError(msg)
+    finally:
+        for extension in (".jsonl", ".jsonl.idx", ".jsonl.lock"):
+            Path.unlink(get_opthub_runner_dir() / "cache" / f"Match#Shared#Team#1{extension}", missing_ok=True)
+
+
+def test_cache_serialized_values() -> None:
+    """Test that Cache serializes the values incrementally the same as json.dumps."""
+    cache = Cache()
+    trials = [
+        Trial(
+            {
+                "trial_no": f"{i:05}",
+                "objective": [i, 0.5],
+                "constraint": None,
+                "info": {},
+                "score": i,
+                "feasible": None,
+            },
+        )
+        for i in range(1, 4)
+    ]
+
+    try:
+        cache.load("Match#Serialized#Team#1")
+        if cache.get_serialized_values() != b"[]":
+            msg = f"cache.get_serialized_values() != b'[]': {cache.get_serialized_values()!r}"
+            raise ValueError(msg)
+        for trial in trials:
+            cache.append(trial)
+            if cache.get_serialized_values() != json.dumps(cache.get_values()).encode():
+                msg = f"cache.get_serialized_values() != json.dumps(values): {cache.get_serialized_values()!r}"
+                raise ValueError(msg)
+        if cache.get_serialized_values(up_to="00002") != json.dumps(trials[:2]).encode():
+            msg = "cache.get_serialized_values(up_to) != json.dumps(trials[:2])"
+            raise ValueError(msg)
+    finally:
+        for extension in (".jsonl", ".jsonl.idx", ".jsonl.lock"):
+            Path.unlink(get_opthub_runner_dir() / "cache" / f"Match#Serialized#Team#1{extension}", missing_ok=True)
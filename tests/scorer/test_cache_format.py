@@ -0,0 +1,131 @@
+"""Tests for cache_format.py."""
+
+import json
+from pathlib import Path
+from threading import Thread
+
+from filelock import Timeout
+
+from opthub_runner_admin.scorer.cache import Trial
+from opthub_runner_admin.scorer.cache_format import (
+    MAGIC,
+    append_trial,
+    encode_trial,
+    get_index_path,
+    get_latest_trial_no,
+    lock_cache_file,
+    migrate_file,
+    read_trials,
+    share_cache_file,
+    truncate_after,
+)
+
+TRIALS = [
+    Trial(
+        {"trial_no": "00001", "objective": [0.1, 0.2], "constraint": None, "info": {}, "score": 0.1, "feasible": True},
+    ),
+    Trial({"trial_no": "00002", "objective": 1, "constraint": [1, 2.5], "info": None, "score": 0.2, "feasible": None}),
+    Trial(
+        {"trial_no": "00003", "objective": 0.3, "constraint": 0.0, "info": {"a": [1]}, "score": 1, "feasible": False},
+    ),
+]
+
+
+def test_binary_format(tmp_path: Path) -> None:
+    """Test that the trials are read back from the binary format as they were written."""
+    path = tmp_path / "Match#1#Team#1.bin"
+    for trial in TRIALS:
+        append_trial(path, trial)
+
+    if not path.read_bytes().startswith(MAGIC):
+        msg = "The binary file does not start with MAGIC."
+        raise ValueError(msg)
+    if read_trials(path) != TRIALS:
+        msg = f"read_trials(path) != TRIALS: {read_trials(path)}"
+        raise ValueError(msg)
+
+    # a record cut off by a crash is ignored
+    with Path.open(path, "ab") as file:
+        file.write(encode_trial(TRIALS[0])[:-3])
+    if read_trials(path) != TRIALS:
+        msg = "The incomplete record is not ignored."
+        raise ValueError(msg)
+
+
+def test_migrate_file(tmp_path: Path) -> None:
+    """Test that a JSONL cache file is converted into the binary format."""
+    path = tmp_path / "Match#1#Team#1.jsonl"
+    path.write_text("".join(json.dumps(trial) + "\n" for trial in TRIALS))
+
+    if read_trials(path) != TRIALS:
+        msg = "read_trials(path) != TRIALS for JSONL"
+        raise ValueError(msg)
+
+    binary_path = migrate_file(path)
+
+    if path.exists():
+        msg = "The JSONL file is not removed."
+        raise ValueError(msg)
+    if read_trials(binary_path) != TRIALS:
+        msg = f"read_trials(binary_path) != TRIALS: {read_trials(binary_path)}"
+        raise ValueError(msg)
+
+
+def test_index(tmp_path: Path) -> None:
+    """Test that the index serves the latest trial and the truncation in both formats."""
+    for extension in (".jsonl", ".bin"):
+        path = tmp_path / ("Match#1#Team#1" + extension)
+        for trial in TRIALS:
+            append_trial(path, trial)
+
+        if get_latest_trial_no(path) != 3:  # noqa: PLR2004
+            msg = f"get_latest_trial_no(path) != 3: {get_latest_trial_no(path)}"
+            raise ValueError(msg)
+
+        if truncate_after(path, 1) != 2 or read_trials(path) != TRIALS[:1]:  # noqa: PLR2004
+            msg = "The trials after 1 are not truncated."
+            raise ValueError(msg)
+        append_trial(path, TRIALS[1])
+        if read_trials(path) != TRIALS[:2] or get_latest_trial_no(path) != 2:  # noqa: PLR2004
+            msg = "The trial is not appended after the truncation."
+            raise ValueError(msg)
+
+        # a missing index is rebuilt from the cache file
+        get_index_path(path).unlink()
+        append_trial(path, TRIALS[2])
+        if read_trials(path) != TRIALS or get_latest_trial_no(path) != 3:  # noqa: PLR2004
+            msg = "The index is not rebuilt."
+            raise ValueError(msg)
+
+
+def test_share_cache_file(tmp_path: Path) -> None:
+    """Test that the readers share the lock of a cache file and keep the writers out."""
+    path = tmp_path / "Match#1#Team#1.bin"
+    for trial in TRIALS:
+        append_trial(path, trial)
+
+    results: list[object] = []
+
+    def write() -> None:
+        try:
+            lock_cache_file(path).acquire(timeout=0)
+        except Timeout:
+            results.append("timeout")
+        results.append(read_trials(path))
+
+    with share_cache_file(path):
+        if read_trials(path) != TRIALS:
+            msg = "The trials are not read under the shared lock."
+            raise ValueError(msg)
+        thread = Thread(target=write)
+        thread.start()
+        thread.join()
+
+    if results != ["timeout", TRIALS]:
+        msg = f"The writer is not kept out by the reader: {results}"
+        raise ValueError(msg)
+
+    with lock_cache_file(path), share_cache_file(path):  # the exclusive lock of the thread covers reading
+        if read_trials(path) != TRIALS:
+            msg = "The trials are not read under the exclusive lock."
+            raise ValueError(msg)
@@ -9,13 +9,17 @@ import yaml
 
 from opthub_runner_admin.lib.dynamodb import DynamoDB
 from opthub_runner_admin.scorer.cache import Cache, Trial
-from opthub_runner_admin.scorer.history import make_history
+from opthub_runner_admin.scorer.history import (
+    make_currents_and_history,
+    make_history,
+    split_trial_range,
+)
 
 if TYPE_CHECKING:
     from opthub_runner_admin.models.schema import FailedScoreSchema, SuccessEvaluationSchema, SuccessScoreSchema
 
 
-def test_history_all_success() -> None:
+def test_history_all_success() -> None:  # noqa: C901
     """Test for make_history and write_to_cache."""
     config_file = "opthub_runner/opthub-runner.yml"
     if not Path(config_file).exists():
@@ -96,6 +100,28 @@ def test_history_all_success() -> None:
         msg = "Cache values are not correct."
         raise ValueError(msg)
 
+    currents, history = make_currents_and_history("Match#" + match_uuid, "Team#1", ["00003"], cache, dynamodb)
+
+    if currents[0] != {"trial_no": "00003", "objective": [3, 3], "constraint": None, "info": None, "feasible": None}:
+        msg = "Current is not correct."
+        raise ValueError(msg)
+
+    if history != expected_history[:2]:
+        msg = "History is not correct."
+        raise ValueError(msg)
+
+    currents, history = make_currents_and_history(
+        "Match#" + match_uuid,
+        "Team#1",
+        ["00003", "00004"],
+        cache,
+        dynamodb,
+    )
+
+    if [current["trial_no"] for current in currents] != ["00003", "00004"] or history != expected_history[:2]:
+        msg = "Currents or history are not correct."
+        raise ValueError(msg)
+
     history = make_history("Match#" + match_uuid, "Team#1", "00006", cache, dynamodb)
 
     if history != expected_history[:6]:
@@ -223,3 +249,20 @@ def test_history_not_all_success() -> None:
     if history != expected_history:
         msg = "History is not correct."
         raise ValueError(msg)
+
+
+def test_split_trial_range() -> None:
+    """Test for split_trial_range."""
+    ranges = split_trial_range(1, 2500, 5)
+    expected_ranges = [
+        ("Success#00001", "Success#01000"),
+        ("Success#01001", "Success#02000"),
+        ("Success#02001", "Success#02500"),
+    ]
+    if ranges != expected_ranges:
+        msg = f"Ranges are not correct: {ranges}"
+        raise ValueError(msg)
+
+    if split_trial_range(3, 2, 5) != []:
+        msg = "Empty range is not empty."
+        raise ValueError(msg)
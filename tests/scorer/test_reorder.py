@@ -0,0 +1,80 @@
+"""Tests for reorder.py."""
+
+from time import sleep
+
+from opthub_runner_admin.scorer.reorder import ReorderBuffer
+
+
+def test_reorder_buffer() -> None:
+    """Test that an entry is held until the previous trial is submitted or settled, or the wait expires."""
+    settled: set[str] = set()
+    reorder: ReorderBuffer[str] = ReorderBuffer(0.5, lambda entry: entry in settled, lambda _: False)
+
+    reorder.add("A#3", "A", 3)
+    reorder.add("A#1", "A", 1)
+    if reorder.pop_ready() != "A#1":
+        msg = "The first trial is not ready."
+        raise ValueError(msg)
+    if reorder.pop_ready() is not None or len(reorder) != 1:
+        msg = "The trial is not held while the previous trial is neither submitted nor settled."
+        raise ValueError(msg)
+
+    reorder.mark_submitted("A", 1)
+    reorder.add("A#2", "A", 2)
+    reorder.add("B#5", "B", 5)
+    if reorder.pop_ready() != "A#2" or reorder.take("A", 3) != "A#3":
+        msg = "The held successor is not taken after the previous trial is submitted."
+        raise ValueError(msg)
+
+    if reorder.pop_ready() is not None:
+        msg = "The trial is not held while the previous trial is not settled."
+        raise ValueError(msg)
+    settled.add("B#5")
+    if reorder.pop_ready() is not None:
+        msg = "The settlement is checked again before the recheck interval."
+        raise ValueError(msg)
+
+    if reorder.poll_seconds() != 1 or reorder.release_all() != ["B#5"] or reorder.poll_seconds() is not None:
+        msg = "The held entries are not released."
+        raise ValueError(msg)
+
+    # an entry is released when the wait expires even if the previous trial is not settled
+    reorder.add("C#9", "C", 9)
+    if reorder.pop_ready() is not None:
+        msg = "The entry is not held before the wait expires."
+        raise ValueError(msg)
+    sleep(0.6)
+    if reorder.pop_ready() != "C#9":
+        msg = "The entry is not released after the wait expires."
+        raise ValueError(msg)
+
+
+def test_reorder_buffer_disabled() -> None:
+    """Test that the entries are never held if the wait is 0."""
+    reorder: ReorderBuffer[str] = ReorderBuffer(0, lambda _: False, lambda _: False)
+    reorder.add("A#3", "A", 3)
+    if reorder.pop_ready() != "A#3":
+        msg = "The entry is held while the reorder buffer is disabled."
+        raise ValueError(msg)
+
+
+def test_reorder_buffer_running() -> None:
+    """Test that an entry is held while a job of its participant is running, even after the wait expires."""
+    running: set[str] = set()
+    reorder: ReorderBuffer[str] = ReorderBuffer(0, lambda _: True, running.__contains__)
+
+    running.add("A")
+    reorder.mark_submitted("A", 1)
+    reorder.add("A#2", "A", 2)
+    reorder.add("B#7", "B", 7)
+    if reorder.pop_ready() != "B#7" or reorder.pop_ready() is not None:
+        msg = "The entry is not held while the job of the participant is running."
+        raise ValueError(msg)
+    if reorder.poll_seconds() != 1:
+        msg = "The held entry is not checked again soon."
+        raise ValueError(msg)
+
+    running.discard("A")
+    if reorder.pop_ready() != "A#2":
+        msg = "The entry is not released after the job of the participant has finished."
+        raise ValueError(msg)
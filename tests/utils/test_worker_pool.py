@@ -0,0 +1,129 @@
+"""Tests for worker_pool.py."""
+
+import sys
+from collections.abc import Callable
+from threading import Event, Lock
+
+import pytest
+
+from opthub_runner_admin.utils.worker_pool import RunningKeys, WorkerPool
+
+
+def test_worker_pool() -> None:
+    """Test that the jobs run concurrently up to the number of workers."""
+    lock = Lock()
+    running: list[int] = []
+    max_running: list[int] = [0]
+    done: list[int] = []
+    release = Event()
+
+    def target(resource: str, job: int, claim: Callable[[], bool]) -> None:  # noqa: ARG001
+        with lock:
+            running.append(job)
+            max_running[0] = max(max_running[0], len(running))
+        release.wait(timeout=10)
+        if claim():
+            with lock:
+                done.append(job)
+        with lock:
+            running.remove(job)
+
+    pool: WorkerPool[str, int] = WorkerPool(["worker1", "worker2"], target)
+
+    if pool.size != 2:  # noqa: PLR2004
+        msg = "pool.size != 2"
+        raise ValueError(msg)
+
+    pool.submit(pool.acquire(), 1)
+    pool.submit(pool.acquire(), 2)
+    release.set()
+    pool.submit(pool.acquire(), 3)
+    pool.join()
+
+    if sorted(done) != [1, 2, 3]:
+        msg = f"done != [1, 2, 3]: {done}"
+        raise ValueError(msg)
+    if max_running[0] != 2:  # noqa: PLR2004
+        msg = f"max_running != 2: {max_running[0]}"
+        raise ValueError(msg)
+
+
+def test_worker_pool_take_over() -> None:
+    """Test that the jobs taken over can not be claimed by the workers."""
+    started = Event()
+    release = Event()
+    claimed: list[bool] = []
+
+    def target(resource: str, job: int, claim: Callable[[], bool]) -> None:  # noqa: ARG001
+        started.set()
+        release.wait(timeout=10)
+        claimed.append(claim())
+
+    pool: WorkerPool[str, int] = WorkerPool(["worker"], target)
+    pool.submit(pool.acquire(), 1)
+    started.wait(timeout=10)
+
+    if pool.idle_count != 0:
+        msg = f"The busy worker is counted as idle: {pool.idle_count}"
+        raise ValueError(msg)
+    if pool.take_over() != [("worker", 1)]:
+        msg = "The job in flight is not taken over."
+        raise ValueError(msg)
+
+    release.set()
+    pool.join()
+
+    if claimed != [False]:
+        msg = f"The job taken over is claimed: {claimed}"
+        raise ValueError(msg)
+    if pool.take_over() != []:
+        msg = "The finished job remains in flight."
+        raise ValueError(msg)
+
+
+def test_worker_pool_exit() -> None:
+    """Test that the exit requested by a job is raised on the main thread."""
+
+    def target(resource: str, job: int, claim: Callable[[], bool]) -> None:  # noqa: ARG001
+        sys.exit(job)
+
+    pool: WorkerPool[str, int] = WorkerPool(["worker"], target)
+    pool.submit(pool.acquire(), 1)
+
+    with pytest.raises(SystemExit) as exit_info:
+        pool.acquire()
+    if exit_info.value.code != 1:
+        msg = f"The exit code is not passed: {exit_info.value.code}"
+        raise ValueError(msg)
+
+    with pytest.raises(SystemExit):
+        pool.join()
+
+
+def test_worker_pool_without_workers() -> None:
+    """Test that a pool without workers can not be created."""
+    with pytest.raises(ValueError, match="At least one worker is required."):
+        WorkerPool([], lambda resource, job, claim: None)  # noqa: ARG005
+
+
+def test_running_keys() -> None:
+    """Test that the key of a job is running from its submission until the worker discards it."""
+    running = RunningKeys()
+    release = Event()
+
+    def target(resource: str, job: str, claim: Callable[[], bool]) -> None:  # noqa: ARG001
+        release.wait(timeout=10)
+        running.discard(job)
+
+    pool: WorkerPool[str, str] = WorkerPool(["worker1", "worker2"], target)
+    running.add("Team#1")
+    pool.submit(pool.acquire(), "Team#1")
+
+    if "Team#1" not in running or "Team#2" in running:
+        msg = "The key of the submitted job is not running."
+        raise ValueError(msg)
+    release.set()
+    pool.join()
+    if "Team#1" in running:
+        msg = "The key of the finished job is still running."
+        raise ValueError(msg)